@@ -0,0 +1,108 @@
+"""
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Per-route request metrics, served in the Prometheus text format.
+
+Each API worker process records its own metrics. When the
+PROMETHEUS_MULTIPROC_DIR environment variable points to a directory, set
+before the workers start (e.g. with the uwsgi ``env`` option), the workers
+write their metrics to files in that directory and the ``/metrics``
+endpoint aggregates the files of every worker, whichever worker serves it.
+The directory must be emptied when the service is restarted.
+"""
+
+import os
+import time
+
+import falcon
+import prometheus_client
+from prometheus_client import multiprocess
+
+MULTIPROC_DIR_ENV = 'PROMETHEUS_MULTIPROC_DIR'
+
+UNMATCHED_ROUTE = 'unmatched'
+
+REGISTRY = prometheus_client.CollectorRegistry()
+
+REQUESTS = prometheus_client.Counter(
+    'freezer_api_requests',
+    'Requests served, by route template and method.',
+    ['route', 'method'], registry=REGISTRY)
+
+ERRORS = prometheus_client.Counter(
+    'freezer_api_request_errors',
+    'Requests answered with a 4xx or 5xx status.',
+    ['route', 'method', 'status'], registry=REGISTRY)
+
+LATENCY = prometheus_client.Histogram(
+    'freezer_api_request_duration_seconds',
+    'Time spent serving the requests.',
+    ['route', 'method'], registry=REGISTRY,
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+             30.0))
+
+RESPONSE_SIZE = prometheus_client.Histogram(
+    'freezer_api_response_size_bytes',
+    'Size of the response bodies.',
+    ['route', 'method'], registry=REGISTRY,
+    buckets=(128, 512, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304,
+             16777216))
+
+START_TIME_KEY = 'freezer.metrics.start'
+
+
+def _response_size(resp):
+    if resp.stream is not None:
+        return resp.content_length or 0
+    # the serialized media is cached, falcon does not serialize it again
+    body = resp.render_body()
+    return len(body) if body else 0
+
+
+class MetricsMiddleware(object):
+    """Falcon middleware recording the metrics of every request.
+
+    Requests are labelled with the template of the route they matched,
+    e.g. ``/{project_id}/jobs``, never with their path, to keep the number
+    of time series bounded.
+    """
+
+    def process_request(self, req, resp):
+        req.env[START_TIME_KEY] = time.monotonic()
+
+    def process_response(self, req, resp, resource, req_succeeded):
+        start = req.env.get(START_TIME_KEY)
+        if start is None:
+            return
+        route = req.uri_template if resource is not None else None
+        labels = {'route': route or UNMATCHED_ROUTE, 'method': req.method}
+        REQUESTS.labels(**labels).inc()
+        LATENCY.labels(**labels).observe(time.monotonic() - start)
+        RESPONSE_SIZE.labels(**labels).observe(_response_size(resp))
+        status = falcon.http_status_to_code(resp.status)
+        if status >= 400:
+            ERRORS.labels(status=str(status), **labels).inc()
+
+
+def get_registry():
+    """Registry of the metrics of every worker or of this process only"""
+    if os.environ.get(MULTIPROC_DIR_ENV):
+        registry = prometheus_client.CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+def app_factory(global_conf, **local_conf):
+    """Paste factory of the /metrics application"""
+    return prometheus_client.make_wsgi_app(get_registry())
@@ -15,14 +15,20 @@ limitations under the License.
 
 """
 
+import time
+
 import falcon
+from oslo_config import cfg
 from oslo_log import log
 import webob.dec
 import webob.exc
 
+from freezer_api.api.common import streaming
 from freezer_api.common import exceptions as freezer_api_exc
 from freezer_api import context
+from freezer_api.db.sqlalchemy import query_stats
 
+CONF = cfg.CONF
 LOG = log.getLogger(__name__)
 
 
@@ -129,13 +135,65 @@ class HookableMiddlewareMixin(object):
 
 class RequireJSON(HookableMiddlewareMixin, object):
     def process_request(self, req, resp):
-        if not req.client_accepts_json:
+        if not req.client_accepts_json and not req.client_accepts(
+                streaming.NDJSON):
             raise falcon.HTTPNotAcceptable(
                 description='Freezer-api only supports responses encoded '
-                            'as JSON.',
+                            'as JSON or, for the listings, as newline '
+                            'delimited JSON.',
                 href='http://docs.examples.com/api/json')
 
 
+class QueryStatsMiddleware(object):
+    """Count and time the SQL statements run for each request.
+
+    The totals are returned in a Server-Timing header and logged with the
+    request. Requests running more statements than
+    [database]/request_query_warning_threshold are logged as warnings
+    with the fingerprints of their most frequent statements. The
+    statements a streamed listing runs after its first batch are not
+    counted, as they run once the response has started.
+    """
+
+    START_TIME_KEY = 'freezer.query_stats.start'
+
+    def process_request(self, req, resp):
+        req.env[self.START_TIME_KEY] = time.monotonic()
+
+    def process_resource(self, req, resp, resource, params):
+        ctx = req.context
+        if isinstance(ctx, context.FreezerContext):
+            ctx.update_store()
+            ctx.db_stats = query_stats.QueryStats()
+
+    def process_response(self, req, resp, resource, req_succeeded):
+        start = req.env.get(self.START_TIME_KEY)
+        stats = getattr(req.context, 'db_stats', None)
+        if start is None or stats is None:
+            return
+        req.context.db_stats = None
+        total_ms = (time.monotonic() - start) * 1000
+        db_ms = stats.duration * 1000
+        resp.set_header(
+            'Server-Timing',
+            'db;dur={0:.3f};desc="{1} queries", total;dur={2:.3f}'.format(
+                db_ms, stats.count, total_ms))
+        LOG.info('%(method)s %(path)s status: %(status)s queries: '
+                 '%(queries)d db time: %(db).1fms total time: %(total).1fms',
+                 {'method': req.method, 'path': req.path,
+                  'status': resp.status, 'queries': stats.count,
+                  'db': db_ms, 'total': total_ms})
+        threshold = CONF.database.request_query_warning_threshold
+        if threshold and stats.count > threshold:
+            LOG.warning('%(method)s %(path)s ran %(queries)d SQL statements, '
+                        'more than %(threshold)d. Most frequent: %(top)s',
+                        {'method': req.method, 'path': req.path,
+                         'queries': stats.count, 'threshold': threshold,
+                         'top': '; '.join(
+                             '{0} x {1}'.format(count, statement)
+                             for statement, count in stats.most_common())})
+
+
 class BaseContextMiddleware(Middleware):
     def process_response(self, response):
         try:
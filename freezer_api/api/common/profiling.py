@@ -0,0 +1,175 @@
+"""
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+On-demand profiling of single requests.
+
+When [request_profiling]/enabled is set, a request sent with the
+``X-Freezer-Profile: cpu`` header by a user allowed by the
+``admin:profile_request`` policy is run under cProfile. The functions in
+which the request spent the most time are returned in the
+``X-Freezer-Profile-Summary`` response header and, when
+[request_profiling]/output_dir is set, the full statistics are written to
+a pstats file of that directory, named in the ``X-Freezer-Profile-File``
+response header. Other requests are not slowed down.
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import re
+import threading
+import time
+
+import falcon
+from oslo_config import cfg
+from oslo_log import log
+from oslo_utils import uuidutils
+
+from freezer_api import policy
+
+CONF = cfg.CONF
+LOG = log.getLogger(__name__)
+
+PROFILING_OPTS = [
+    cfg.BoolOpt('enabled',
+                default=False,
+                help='Profile the requests sent with the X-Freezer-Profile '
+                     'header by the users allowed by the '
+                     'admin:profile_request policy.'),
+    cfg.IntOpt('top',
+               default=10,
+               min=1,
+               help='Number of functions listed in the '
+                    'X-Freezer-Profile-Summary response header.'),
+    cfg.StrOpt('sort',
+               default='cumulative',
+               choices=['cumulative', 'tottime', 'ncalls'],
+               help='Order of the functions in the summary.'),
+    cfg.StrOpt('output_dir',
+               help='Directory where the full statistics of each profiled '
+                    'request are written as a pstats file, to be loaded '
+                    'with the pstats module or a viewer such as snakeviz. '
+                    'The files are not written when unset.'),
+]
+
+CONF.register_opts(PROFILING_OPTS, group='request_profiling')
+
+PROFILE_HEADER = 'X-Freezer-Profile'
+SUMMARY_HEADER = 'X-Freezer-Profile-Summary'
+FILE_HEADER = 'X-Freezer-Profile-File'
+
+MODES = ('cpu',)
+
+PROFILER_KEY = 'freezer.profiling.profiler'
+START_TIME_KEY = 'freezer.profiling.start'
+
+# the interpreter runs a single profiler at a time
+_LOCK = threading.Lock()
+
+_UNSAFE_FILENAME_CHARS = re.compile(r'[^\w-]')
+
+
+def summary(stats, sort, top):
+    """Functions in which the request spent the most time, on one line"""
+    stats.sort_stats(sort)
+    entries = []
+    for func in stats.fcn_list[:top]:
+        primitive_calls, calls, tottime, cumtime, callers = stats.stats[func]
+        filename, line, name = func
+        location = name if filename == '~' else '{0}:{1}({2})'.format(
+            os.path.basename(filename), line, name)
+        entries.append('{0} calls={1} tottime={2:.6f} cumtime={3:.6f}'.format(
+            location, calls, tottime, cumtime))
+    return '; '.join(entries)
+
+
+class ProfilingMiddleware(object):
+    """Run the requests asking for it under cProfile.
+
+    Only one request of a worker is profiled at a time: the others asking
+    for it meanwhile are served without being profiled.
+    """
+
+    def process_resource(self, req, resp, resource, params):
+        mode = req.get_header(PROFILE_HEADER)
+        if not mode or not CONF.request_profiling.enabled:
+            return
+        ctx = req.env.get('freezer.context')
+        if ctx is None or not policy.can('admin:profile_request', ctx,
+                                         do_raise=False):
+            LOG.warning('Ignoring the %s header of a request not allowed to '
+                        'be profiled', PROFILE_HEADER)
+            return
+        if mode.strip().lower() not in MODES:
+            raise falcon.HTTPBadRequest(
+                title='Bad Request',
+                description='Unsupported {0} value {1}, supported: '
+                            '{2}'.format(PROFILE_HEADER, mode,
+                                         ', '.join(MODES)))
+        if not _LOCK.acquire(blocking=False):
+            LOG.info('Another request is being profiled, not profiling '
+                     '%s %s', req.method, req.path)
+            return
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError as e:
+            # another profiling tool is active, e.g. a debugger
+            _LOCK.release()
+            LOG.warning('Unable to profile %s %s: %s', req.method, req.path,
+                        e)
+            return
+        req.env[PROFILER_KEY] = profile
+        req.env[START_TIME_KEY] = time.monotonic()
+
+    def process_response(self, req, resp, resource, req_succeeded):
+        profile = req.env.pop(PROFILER_KEY, None)
+        if profile is None:
+            return
+        try:
+            profile.disable()
+            duration = time.monotonic() - req.env[START_TIME_KEY]
+            stats = pstats.Stats(profile, stream=io.StringIO())
+            resp.set_header(SUMMARY_HEADER, summary(
+                stats, CONF.request_profiling.sort,
+                CONF.request_profiling.top))
+            filename = self._dump(req, stats)
+            if filename:
+                resp.set_header(FILE_HEADER, filename)
+            LOG.info('Profiled %(method)s %(path)s in %(duration).3fs%(file)s',
+                     {'method': req.method, 'path': req.path,
+                      'duration': duration,
+                      'file': ', stored in ' + filename if filename else ''})
+        finally:
+            _LOCK.release()
+
+    @staticmethod
+    def _dump(req, stats):
+        output_dir = CONF.request_profiling.output_dir
+        if not output_dir:
+            return None
+        ctx = req.env.get('freezer.context')
+        # the request id comes from a header, keep it out of the path
+        request_id = _UNSAFE_FILENAME_CHARS.sub(
+            '', getattr(ctx, 'request_id', None) or '')
+        request_id = request_id or uuidutils.generate_uuid()
+        filename = '{0}-{1}.pstats'.format(
+            time.strftime('%Y%m%d%H%M%S'), request_id)
+        try:
+            stats.dump_stats(os.path.join(output_dir, filename))
+        except OSError as e:
+            LOG.error('Unable to store the profile of %s %s: %s',
+                      req.method, req.path, e)
+            return None
+        return filename
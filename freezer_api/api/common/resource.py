@@ -17,8 +17,8 @@ Base resource with utility functions
 """
 
 import falcon
-from oslo_serialization import jsonutils as json
 
+from freezer_api.api.common import json_backend
 from freezer_api.common import exceptions as freezer_api_exc
 
 
@@ -35,7 +35,7 @@ class BaseResource(object):
             raise freezer_api_exc.BadDataFormat('Empty request body. A valid '
                                                 'JSON document is required.')
         try:
-            json_data = json.loads(raw_json, encoding='utf-8')
+            json_data = json_backend.loads(raw_json)
         except ValueError:
             raise falcon.HTTPError(falcon.HTTP_753,
                                    title='Malformed JSON')
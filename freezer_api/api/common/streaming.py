@@ -0,0 +1,92 @@
+"""
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Streamed responses of the collection listings.
+
+A listing requested with ``Accept: application/x-ndjson`` is returned as
+newline delimited JSON, one document per line, and a listing requested
+with the ``stream=true`` query parameter as the usual JSON document. In
+both cases the documents are encoded and written while they are read from
+the database, in chunks of about CHUNK_SIZE bytes, instead of being
+gathered in a list first.
+
+The first document is read before the response starts, so that an error
+of the query is returned as any other error. An error while the next ones
+are read can only interrupt the response, which the client sees as a
+truncated body.
+"""
+
+import falcon
+from oslo_log import log
+
+from freezer_api.api.common import json_backend
+
+LOG = log.getLogger(__name__)
+
+NDJSON = 'application/x-ndjson'
+
+CHUNK_SIZE = 64 * 1024
+
+_END = object()
+
+
+def requested(req):
+    """Media type of the streamed response requested, None otherwise"""
+    if req.client_prefers([falcon.MEDIA_JSON, NDJSON]) == NDJSON:
+        return NDJSON
+    if req.get_param_as_bool('stream'):
+        return falcon.MEDIA_JSON
+    return None
+
+
+def _chunks(pieces, chunk_size=CHUNK_SIZE):
+    buffered = []
+    size = 0
+    for piece in pieces:
+        buffered.append(piece)
+        size += len(piece)
+        if size >= chunk_size:
+            yield b''.join(buffered)
+            buffered = []
+            size = 0
+    if buffered:
+        yield b''.join(buffered)
+
+
+def _ndjson(first, documents):
+    if first is _END:
+        return
+    yield json_backend.dumps(first) + b'\n'
+    for document in documents:
+        yield json_backend.dumps(document) + b'\n'
+
+
+def _json(key, first, documents):
+    yield b'{' + json_backend.dumps(key) + b': ['
+    if first is not _END:
+        yield json_backend.dumps(first)
+        for document in documents:
+            yield b', ' + json_backend.dumps(document)
+    yield b']}'
+
+
+def stream_collection(resp, key, documents, media_type):
+    """Stream the documents of a listing, {key: [documents]} in JSON"""
+    documents = iter(documents)
+    first = next(documents, _END)
+    if media_type == NDJSON:
+        pieces = _ndjson(first, documents)
+    else:
+        pieces = _json(key, first, documents)
+    resp.content_type = media_type
+    resp.stream = _chunks(pieces)
@@ -16,9 +16,8 @@ limitations under the License.
 """
 
 from oslo_log import log
-from oslo_serialization import jsonutils
-from oslo_utils import encodeutils
 
+from freezer_api.api.common import json_backend
 from freezer_api import context
 
 LOG = log.getLogger(__name__)
@@ -55,11 +54,11 @@ def before_hooks():
 
 
 def json_encode(obj):
-    return encodeutils.safe_encode(jsonutils.dumps(obj), 'utf-8')
+    return json_backend.dumps(obj)
 
 
 def json_decode(binary):
-    return jsonutils.loads(binary, 'utf-8')
+    return json_backend.loads(binary)
 
 
 class FuncMiddleware(object):
@@ -16,10 +16,12 @@ limitations under the License.
 """
 
 from freezer_api.api.v2 import actions
+from freezer_api.api.v2 import admin
 from freezer_api.api.v2 import backups
 from freezer_api.api.v2 import clients
 from freezer_api.api.v2 import homedoc
 from freezer_api.api.v2 import jobs
+from freezer_api.api.v2 import projects
 from freezer_api.api.v2 import sessions
 
 
@@ -41,6 +43,12 @@ def public_endpoints(storage_driver):
         ('/',
          homedoc.Resource()),
 
+        ('/admin/db-pool',
+         admin.PoolStatisticsResource(storage_driver)),
+
+        ('/{project_id}',
+         projects.ProjectsResource(storage_driver)),
+
         ('/{project_id}/backups',
          backups.BackupsCollectionResource(storage_driver)),
 
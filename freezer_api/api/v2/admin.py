@@ -0,0 +1,31 @@
+"""
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+"""
+
+from freezer_api.api.common import resource
+from freezer_api import policy
+
+
+class PoolStatisticsResource(resource.BaseResource):
+    """
+    Handler for endpoint: /v2/admin/db-pool
+    """
+    def __init__(self, storage_driver):
+        self.db = storage_driver
+
+    @policy.enforce('admin:pool_statistics')
+    def on_get(self, req, resp):
+        # GET /v2/admin/db-pool
+        # Connection pool of the API worker serving the request
+        resp.media = self.db.pool_statistics()
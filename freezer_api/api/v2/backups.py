@@ -18,6 +18,7 @@ limitations under the License.
 import falcon
 
 from freezer_api.api.common import resource
+from freezer_api.api.common import streaming
 from freezer_api.common import exceptions as freezer_api_exc
 from freezer_api import policy
 
@@ -35,6 +36,13 @@ class BackupsCollectionResource(resource.BaseResource):
         offset = req.get_param_as_int('offset') or 0
         limit = req.get_param_as_int('limit') or 10
         search = self.json_body(req)
+        media_type = streaming.requested(req)
+        if media_type:
+            backups = self.db.iter_backup(project_id=project_id,
+                                          offset=offset, limit=limit,
+                                          search=search)
+            streaming.stream_collection(resp, 'backups', backups, media_type)
+            return
         obj_list = self.db.search_backup(project_id=project_id, offset=offset,
                                          limit=limit, search=search)
         resp.media = {'backups': obj_list}
@@ -18,6 +18,7 @@ limitations under the License.
 import falcon
 
 from freezer_api.api.common import resource
+from freezer_api.api.common import streaming
 from freezer_api.common import exceptions as freezer_api_exc
 from freezer_api import policy
 
@@ -35,6 +36,14 @@ class ClientsCollectionResource(resource.BaseResource):
         offset = req.get_param_as_int('offset') or 0
         limit = req.get_param_as_int('limit') or 10
         search = self.json_body(req)
+        media_type = streaming.requested(req)
+        if media_type:
+            clients = self.db.iter_client(project_id=project_id,
+                                          offset=offset, limit=limit,
+                                          search=search)
+            streaming.stream_collection(resp, 'clients', clients,
+                                        media_type)
+            return
         obj_list = self.db.get_client(project_id=project_id,
                                       offset=offset,
                                       limit=limit,
@@ -21,6 +21,8 @@ import falcon
 from oslo_config import cfg
 
 from freezer_api.api.common import resource
+from freezer_api.api.common import streaming
+from freezer_api.common import elasticv2_utils as utilsv2
 from freezer_api.common import exceptions as freezer_api_exc
 from freezer_api.keystone_client import KeystoneClient
 from freezer_api import policy
@@ -49,11 +51,18 @@ class JobsBaseResource(resource.BaseResource):
     def update_actions_in_job(self, project_id, user_id, job_doc):
         """
         Looks into a job document and creates actions in the db.
-        Actions are given an action_id if they don't have one yet
+        Actions are given an action_id if they don't have one yet.
+        Actions identical to one already stored reuse its action_id.
+        The new actions are added together, with bulk requests on
+        elasticsearch
         """
         job = Job(job_doc)
+        new_actions = []
         for action in job.actions():
             if action.action_id:
+                if not action.doc.get('freezer_action'):
+                    # reference to an existing action, checked by the driver
+                    continue
                 # action has action_id, let's see if it's in the db
                 found_action_doc = self.get_action(project_id=project_id,
                                                    action_id=action.action_id)
@@ -65,9 +74,17 @@ class JobsBaseResource(resource.BaseResource):
                         # action is different, generate new action_id
                         action.action_id = ''
                 # action not found in db, leave current action_id
-            self.db.add_action(project_id=project_id,
-                               user_id=user_id,
-                               doc=action.doc)
+            if not action.action_id:
+                identical_action_id = self.db.find_identical_action(
+                    project_id=project_id, doc=action.doc)
+                if identical_action_id:
+                    action.action_id = identical_action_id
+                    continue
+            new_actions.append(action.doc)
+        if new_actions:
+            self.db.add_actions(project_id=project_id,
+                                user_id=user_id,
+                                docs=new_actions)
 
     def _filter_pid(self, req, project_id, obj_list):
         context = req.env.get('freezer.context')
@@ -86,6 +103,11 @@ class JobsBaseResource(resource.BaseResource):
                 if 'job_schedule' in obj:
                     obj['job_schedule'].pop('current_pid', None)
 
+    def _iter_filter_pid(self, req, project_id, jobs):
+        for job in jobs:
+            self._filter_pid(req, project_id, job)
+            yield job
+
     def _should_create_trust(self, project_id, job_doc):
         """
         Implements internal logic on when trusts should be created.
@@ -126,6 +148,16 @@ class JobsCollectionResource(JobsBaseResource):
             'jobs:get_all_projects', req.env['freezer.context'],
             do_raise=False
         )
+        media_type = streaming.requested(req)
+        if media_type:
+            jobs = self.db.iter_job(project_id=project_id,
+                                    all_projects=all_projects,
+                                    offset=offset, limit=limit,
+                                    search=search)
+            if not all_projects:
+                jobs = self._iter_filter_pid(req, project_id, jobs)
+            streaming.stream_collection(resp, 'jobs', jobs, media_type)
+            return
         obj_list = self.db.search_job(project_id=project_id,
                                       all_projects=all_projects,
                                       offset=offset, limit=limit,
@@ -276,17 +308,13 @@ class Action(object):
     def create_new_action_id(self):
         self.doc['action_id'] = uuid.uuid4().hex
 
+    @property
+    def freezer_action_hash(self):
+        return utilsv2.ActionDoc.freezer_action_hash(
+            self.doc.get('freezer_action'))
+
     def __eq__(self, other):
-        # return self.doc == other.doc
-        dont_care_keys = ['_version', 'user_id']
-        lh = self.doc.get('freezer_action', None)
-        rh = other.doc.get('freezer_action', None)
-        diffkeys = [k for k in lh if lh[k] != rh.get(k)]
-        diffkeys += [k for k in rh if rh[k] != lh.get(k)]
-        for k in diffkeys:
-            if k not in dont_care_keys:
-                return False
-        return True
+        return self.freezer_action_hash == other.freezer_action_hash
 
     def __ne__(self, other):
         return not (self.__eq__(other))
@@ -0,0 +1,37 @@
+"""
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+"""
+
+from freezer_api.api.common import resource
+from freezer_api import policy
+
+
+class ProjectsResource(resource.BaseResource):
+    """
+    Handler for endpoint: /v2/{project_id}
+    """
+    def __init__(self, storage_driver):
+        self.db = storage_driver
+
+    @policy.enforce('projects:purge')
+    def on_delete(self, req, resp, project_id):
+        # DELETE /v2/{project_id}(?hard_delete,batch_size)
+        # Purges every client, job, action, session and backup of a project
+        hard_delete = req.get_param_as_bool('hard_delete') or False
+        batch_size = req.get_param_as_int('batch_size', default=1000,
+                                          min_value=1)
+        purged = self.db.purge_project(project_id=project_id,
+                                       hard_delete=hard_delete,
+                                       batch_size=batch_size)
+        resp.media = {'project_id': project_id, 'purged': purged}
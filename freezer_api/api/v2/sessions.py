@@ -20,6 +20,7 @@ import time
 import falcon
 
 from freezer_api.api.common import resource
+from freezer_api.api.common import streaming
 from freezer_api.common import exceptions as freezer_api_exc
 from freezer_api import policy
 
@@ -37,6 +38,14 @@ class SessionsCollectionResource(resource.BaseResource):
         offset = req.get_param_as_int('offset') or 0
         limit = req.get_param_as_int('limit') or 10
         search = self.json_body(req)
+        media_type = streaming.requested(req)
+        if media_type:
+            sessions = self.db.iter_session(project_id=project_id,
+                                            offset=offset, limit=limit,
+                                            search=search)
+            streaming.stream_collection(resp, 'sessions', sessions,
+                                        media_type)
+            return
         obj_list = self.db.search_session(project_id=project_id, offset=offset,
                                           limit=limit, search=search)
         resp.media = {'sessions': obj_list}
@@ -16,6 +16,7 @@ limitations under the License.
 
 """
 
+import socket
 import sys
 
 import falcon
@@ -24,12 +25,16 @@ from oslo_log import log
 from paste import deploy
 from paste import httpserver
 
+from freezer_api.api.common import json_backend
+from freezer_api.api.common import metrics
 from freezer_api.api.common import middleware
+from freezer_api.api.common import profiling
 from freezer_api.api.common import utils
 from freezer_api.api import v2
 from freezer_api.common import _i18n
 from freezer_api.common import config
 from freezer_api.common import exceptions as freezer_api_exc
+from freezer_api.common import profiler
 from freezer_api.db import manager
 from freezer_api import policy
 
@@ -48,6 +53,7 @@ def configure_app(app, db=None):
     db_driver = manager.get_db_driver(CONF.storage.driver,
                                       backend=CONF.storage.backend)
     db = db_driver.get_api()
+    db_driver.warm_up()
 
     # setup freezer policy
     policy.setup_policy(CONF)
@@ -74,21 +80,32 @@ def build_app_v2():
     (both approaches were available for versions 0.2.0 - 0.3.0)
     :return: falcon WSGI app
     """
+    profiler.setup('freezer-api', socket.gethostname())
+
     # injecting FreezerContext & hooks
     middleware_list = [utils.FuncMiddleware(hook) for hook in
                        utils.before_hooks()]
+    middleware_list.append(metrics.MetricsMiddleware())
+    middleware_list.append(middleware.QueryStatsMiddleware())
+    middleware_list.append(profiling.ProfilingMiddleware())
     middleware_list.append(middleware.RequireJSON())
 
     app = falcon.App(middleware=middleware_list)
     db_driver = manager.get_db_driver(CONF.storage.driver,
                                       backend=CONF.storage.backend)
     db = db_driver.get_api()
+    db_driver.warm_up()
 
     # Set options to keep behavior compatible to pre-2.0.0 falcon
     app.req_options.auto_parse_qs_csv = True
     app.req_options.keep_blank_qs_values = False
     app.req_options.strip_url_path_trailing_slash = True
 
+    json_backend.set_backend(CONF.json_backend)
+    json_handler = json_backend.media_handler()
+    app.req_options.media_handlers[falcon.MEDIA_JSON] = json_handler
+    app.resp_options.media_handlers[falcon.MEDIA_JSON] = json_handler
+
     # setup freezer policy
     policy.setup_policy(CONF)
 
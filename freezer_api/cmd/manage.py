@@ -19,6 +19,7 @@ import sys
 from oslo_config import cfg
 from oslo_log import log
 from oslo_serialization import jsonutils as json
+from oslo_utils import timeutils
 
 from freezer_api import __version__ as FREEZER_API_VERSION
 from freezer_api.common import config
@@ -37,9 +38,122 @@ def add_db_opts(subparser):
     parser = subparser.add_parser('db')
     parser.add_argument(
         'options',
-        choices=['sync', 'update', 'remove', 'show', 'update-settings'],
+        choices=['sync', 'update', 'remove', 'show', 'update-settings',
+                 'purge-project', 'archive-deleted', 'partition-backups',
+                 'drop-backup-partitions', 'reindex',
+                 'migrate-from-elasticsearch', 'slow-queries',
+                 'generate-fixture'],
         help='Create/update/delete freezer-api mappings in DB backend.'
     )
+    parser.add_argument(
+        '--project-id',
+        dest='project_id',
+        help='Project whose resources are purged by purge-project.'
+    )
+    parser.add_argument(
+        '--hard-delete',
+        dest='hard_delete',
+        action='store_true',
+        default=False,
+        help='Remove the rows of purge-project from the database instead '
+             'of soft-deleting them.'
+    )
+    parser.add_argument(
+        '--batch-size',
+        dest='batch_size',
+        type=int,
+        default=1000,
+        help='Number of rows deleted per transaction by purge-project '
+             'and archive-deleted, of documents copied per transaction '
+             'by migrate-from-elasticsearch, and of rows inserted per '
+             'transaction by generate-fixture.'
+    )
+    parser.add_argument(
+        '--before',
+        dest='before',
+        help='ISO 8601 date, archive-deleted removes the rows soft-deleted '
+             'before it and drop-backup-partitions the partitions, or '
+             'monthly elasticsearch indices, of the months ending before '
+             'it.'
+    )
+    parser.add_argument(
+        '--source-backend',
+        dest='source_backend',
+        default='elasticsearch',
+        help='Configuration section of the Elasticsearch database read by '
+             'migrate-from-elasticsearch.'
+    )
+    parser.add_argument(
+        '--checkpoint-file',
+        dest='checkpoint_file',
+        help='File where migrate-from-elasticsearch records its progress. '
+             'An interrupted migration run again with the same file '
+             'resumes after the last batch copied.'
+    )
+    parser.add_argument(
+        '--months-ahead',
+        dest='months_ahead',
+        type=int,
+        default=3,
+        help='Number of upcoming monthly partitions, or monthly '
+             'elasticsearch indices, partition-backups keeps created in '
+             'advance.'
+    )
+    parser.add_argument(
+        '--limit',
+        dest='limit',
+        type=int,
+        default=10,
+        help='Number of statements listed by slow-queries, those which '
+             'took the longest in total first.'
+    )
+    for option, default, help_text in (
+            ('projects', 10, 'projects'),
+            ('clients', 1000, 'clients, spread over the projects'),
+            ('jobs', 5000, 'jobs, spread over the clients'),
+            ('backups', 100000, 'backups, spread over the jobs'),
+            ('sessions', 1000, 'sessions, spread over the projects'),
+            ('actions-per-job', 2, 'actions of each job')):
+        parser.add_argument(
+            '--' + option,
+            dest=option.replace('-', '_'),
+            type=int,
+            default=default,
+            help='Number of {0} written by generate-fixture.'.format(
+                help_text)
+        )
+    parser.add_argument(
+        '--skew',
+        dest='skew',
+        type=float,
+        default=0.0,
+        help='Exponent of the distributions of generate-fixture, e.g. 1 '
+             'gives the first project twice the clients of the second '
+             'one. 0 spreads the rows evenly.'
+    )
+    parser.add_argument(
+        '--seed',
+        dest='seed',
+        type=int,
+        default=0,
+        help='Seed of generate-fixture, which writes the same catalog for '
+             'the same seed.'
+    )
+    parser.add_argument(
+        '--days',
+        dest='days',
+        type=int,
+        default=365,
+        help='Age in days of the oldest rows written by generate-fixture.'
+    )
+    parser.add_argument(
+        '--metadata-size',
+        dest='metadata_size',
+        type=int,
+        default=2048,
+        help='Approximate size in bytes of the JSON metadata of the '
+             'backups written by generate-fixture.'
+    )
 
 
 def parse_config():
@@ -64,6 +178,82 @@ def parse_config():
          )
 
 
+def purge_project(db_driver):
+    if not CONF.db.project_id:
+        raise Exception('purge-project requires --project-id')
+
+    def progress(table, count):
+        print('{0}: {1} purged'.format(table, count))
+
+    purged = db_driver.get_api().purge_project(
+        project_id=CONF.db.project_id,
+        hard_delete=CONF.db.hard_delete,
+        batch_size=CONF.db.batch_size,
+        progress=progress)
+    print(json.dumps(purged))
+
+
+def _parse_before(option):
+    if not CONF.db.before:
+        raise Exception('{0} requires --before'.format(option))
+    return timeutils.normalize_time(timeutils.parse_isotime(CONF.db.before))
+
+
+def archive_deleted(db_driver):
+    before = _parse_before('archive-deleted')
+
+    def progress(table, count):
+        print('{0}: {1} removed'.format(table, count))
+
+    archived = db_driver.get_api().archive_deleted(
+        before=before,
+        batch_size=CONF.db.batch_size,
+        progress=progress)
+    print(json.dumps(archived))
+
+
+def migrate_from_elasticsearch(db_driver):
+    source = manager.get_db_driver('elasticsearch',
+                                   backend=CONF.db.source_backend)
+
+    def progress(doc_type, report):
+        print('{0}: {1} migrated, {2} skipped, {3} invalid '
+              '({4} docs/s)'.format(doc_type, report['migrated'],
+                                    report['skipped'], report['invalid'],
+                                    report['docs_per_second']))
+
+    migrated = db_driver.migrate_from_elasticsearch(
+        source.get_api(),
+        batch_size=CONF.db.batch_size,
+        checkpoint_path=CONF.db.checkpoint_file,
+        progress=progress)
+    print(json.dumps(migrated))
+
+
+def generate_fixture(db_driver):
+    def progress(report):
+        print('{0} rows/s: {1}'.format(
+            report['rows_per_second'],
+            ', '.join('{0} {1}'.format(count, table)
+                      for table, count in sorted(report.items())
+                      if table not in ('seconds', 'rows_per_second'))))
+
+    generated = db_driver.generate_fixture(
+        projects=CONF.db.projects,
+        clients=CONF.db.clients,
+        jobs=CONF.db.jobs,
+        backups=CONF.db.backups,
+        sessions=CONF.db.sessions,
+        actions_per_job=CONF.db.actions_per_job,
+        skew=CONF.db.skew,
+        seed=CONF.db.seed,
+        days=CONF.db.days,
+        metadata_size=CONF.db.metadata_size,
+        batch_size=CONF.db.batch_size,
+        progress=progress)
+    print(json.dumps(generated))
+
+
 def main():
     parse_config()
     config.setup_logging()
@@ -87,6 +277,27 @@ def main():
                 print(json.dumps(db_tables))
             else:
                 print("No Tables/Mappings found!")
+        elif CONF.db.options.lower() == 'purge-project':
+            purge_project(db_driver)
+        elif CONF.db.options.lower() == 'archive-deleted':
+            archive_deleted(db_driver)
+        elif CONF.db.options.lower() == 'migrate-from-elasticsearch':
+            migrate_from_elasticsearch(db_driver)
+        elif CONF.db.options.lower() == 'generate-fixture':
+            generate_fixture(db_driver)
+        elif CONF.db.options.lower() == 'slow-queries':
+            print(json.dumps(db_driver.slow_query_report(
+                limit=CONF.db.limit), indent=2))
+        elif CONF.db.options.lower() == 'reindex':
+            print(json.dumps(db_driver.db_reindex()))
+        elif CONF.db.options.lower() == 'partition-backups':
+            created = db_driver.partition_backups(
+                months_ahead=CONF.db.months_ahead)
+            print(json.dumps({'created': created}))
+        elif CONF.db.options.lower() == 'drop-backup-partitions':
+            dropped = db_driver.drop_backup_partitions(
+                before=_parse_before('drop-backup-partitions'))
+            print(json.dumps({'dropped': dropped}))
         else:
             raise Exception('Option {0} not found !'.format(CONF.db.options))
     except Exception as e:
@@ -22,6 +22,11 @@ from oslo_log import log
 from oslo_policy import policy
 
 from freezer_api import __version__ as FREEZER_API_VERSION
+from freezer_api.api.common import json_backend
+from freezer_api.api.common import profiling
+from freezer_api.db.sqlalchemy import pooling
+from freezer_api.db.sqlalchemy import query_stats
+from freezer_api.db.sqlalchemy import slow_queries
 
 CONF = cfg.CONF
 LOG = log.getLogger(__name__)
@@ -212,9 +217,12 @@ def find_paste_config():
 
 def list_opts():
     _OPTS = {
-        None: api_common_opts(),
+        None: [*api_common_opts(), *json_backend.JSON_OPTS],
         'paste_deploy': paste_deploy,
-        AUTH_GROUP: AUTH_OPTS
+        AUTH_GROUP: AUTH_OPTS,
+        'database': [*pooling.POOL_OPTS, *query_stats.QUERY_STATS_OPTS,
+                     *slow_queries.SLOW_QUERY_OPTS],
+        'request_profiling': profiling.PROFILING_OPTS,
     }
     # update the current list of opts with db backend drivers opts
     _OPTS.update({"storage": _DB_DRIVERS})
@@ -16,6 +16,8 @@ limitations under the License.
 
 """
 
+import datetime
+
 
 clients_mapping = {
     "properties": {
@@ -424,3 +426,35 @@ def get_mappings():
         "backups": backups_mapping,
         "clients": clients_mapping
     }
+
+
+DOC_TYPES = ('backups', 'clients', 'jobs', 'actions', 'sessions')
+
+
+def get_type_index(index, doc_type):
+    """
+    Name of the alias of the index holding doc_type when documents are
+    split in one index per type
+    """
+    return '{0}-{1}'.format(index, doc_type)
+
+
+def get_write_alias(alias):
+    """Name of the alias of the time-based index receiving new documents"""
+    return '{0}-write'.format(alias)
+
+
+def get_monthly_index(alias, month):
+    """Name of the time-based index holding the documents of a month"""
+    return '{0}-{1:%Y.%m}'.format(alias, month)
+
+
+def get_months(first, last):
+    """First day of every month from first to last, both included"""
+    month = datetime.datetime(first.year, first.month, 1)
+    months = []
+    while month <= last:
+        months.append(month)
+        month = datetime.datetime(month.year + month.month // 12,
+                                  month.month % 12 + 1, 1)
+    return months
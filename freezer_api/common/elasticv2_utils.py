@@ -15,6 +15,7 @@ limitations under the License.
 """
 
 import copy
+import hashlib
 import time
 import uuid
 
@@ -22,7 +23,9 @@ import jsonschema
 
 from freezer_api.common import exceptions as freezer_api_exc
 from freezer_api.common import json_schemas
+from freezer_api.common import profiler
 from oslo_log import log
+from oslo_serialization import jsonutils
 
 LOG = log.getLogger(__name__)
 
@@ -44,12 +47,14 @@ class BackupMetadataDoc(object):
         self.data = data if data is not None else {}
 
     @staticmethod
+    @profiler.trace('jsonschema', hide_args=True)
     def validate_patch(doc):
         try:
             BackupMetadataDoc.backup_patch_validator.validate(doc)
         except Exception as e:
             raise freezer_api_exc.BadDataFormat(str(e).splitlines()[0])
 
+    @profiler.trace('jsonschema', hide_args=True)
     def is_valid(self):
         try:
             assert (self.project_id != '')
@@ -85,6 +90,7 @@ class JobDoc(object):
         schema=json_schemas.job_patch_schema)
 
     @staticmethod
+    @profiler.trace('jsonschema', hide_args=True)
     def validate(doc):
         try:
             JobDoc.job_doc_validator.validate(doc)
@@ -92,6 +98,7 @@ class JobDoc(object):
             raise freezer_api_exc.BadDataFormat(str(e).splitlines()[0])
 
     @staticmethod
+    @profiler.trace('jsonschema', hide_args=True)
     def validate_patch(doc):
         try:
             JobDoc.job_patch_validator.validate(doc)
@@ -141,8 +148,11 @@ class ActionDoc(object):
         schema=json_schemas.action_schema)
     action_patch_validator = jsonschema.Draft4Validator(
         schema=json_schemas.action_patch_schema)
+    # freezer_action keys that do not change what an action does
+    hash_ignored_keys = ('_version', 'user_id')
 
     @staticmethod
+    @profiler.trace('jsonschema', hide_args=True)
     def validate(doc):
         try:
             ActionDoc.action_doc_validator.validate(doc)
@@ -150,6 +160,7 @@ class ActionDoc(object):
             raise freezer_api_exc.BadDataFormat(str(e).splitlines()[0])
 
     @staticmethod
+    @profiler.trace('jsonschema', hide_args=True)
     def validate_patch(doc):
         try:
             ActionDoc.action_patch_validator.validate(doc)
@@ -185,6 +196,21 @@ class ActionDoc(object):
         ActionDoc.validate(doc)
         return doc
 
+    @staticmethod
+    def freezer_action_hash(freezer_action):
+        """
+        Returns the canonical SHA-256 hex digest of a freezer_action.
+        Keys set to None are treated as missing, so a definition hashes the
+        same whether it comes from a request or is rebuilt from the database.
+        """
+        canonical = {}
+        for key, value in (freezer_action or {}).items():
+            if value is not None and key not in ActionDoc.hash_ignored_keys:
+                canonical[key] = value
+        encoded = jsonutils.dumps(canonical, sort_keys=True,
+                                  separators=(',', ':'))
+        return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
 
 class SessionDoc(object):
     session_doc_validator = jsonschema.Draft4Validator(
@@ -193,6 +219,7 @@ class SessionDoc(object):
         schema=json_schemas.session_patch_schema)
 
     @staticmethod
+    @profiler.trace('jsonschema', hide_args=True)
     def validate(doc):
         LOG.debug("Debugging Session validate: {0}".format(doc))
         try:
@@ -201,6 +228,7 @@ class SessionDoc(object):
             raise freezer_api_exc.BadDataFormat(str(e).splitlines()[0])
 
     @staticmethod
+    @profiler.trace('jsonschema', hide_args=True)
     def validate_patch(doc):
         try:
             SessionDoc.session_patch_validator.validate(doc)
@@ -246,6 +274,7 @@ class ClientDoc(object):
         schema=json_schemas.client_schema)
 
     @staticmethod
+    @profiler.trace('jsonschema', hide_args=True)
     def validate(doc):
         try:
             ClientDoc.client_doc_validator.validate(doc)
@@ -18,19 +18,23 @@
 import itertools
 
 from freezer_api.common.policies import action
+from freezer_api.common.policies import admin
 from freezer_api.common.policies import backup
 from freezer_api.common.policies import base
 from freezer_api.common.policies import client
 from freezer_api.common.policies import job
+from freezer_api.common.policies import project
 from freezer_api.common.policies import session
 
 
 def list_rules():
     return itertools.chain(
         action.list_rules(),
+        admin.list_rules(),
         backup.list_rules(),
         base.list_rules(),
         client.list_rules(),
         job.list_rules(),
+        project.list_rules(),
         session.list_rules()
     )
@@ -0,0 +1,51 @@
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+from oslo_policy import policy
+
+from freezer_api.common.policies import base
+
+ADMIN = 'admin:%s'
+
+rules = [
+    policy.DocumentedRuleDefault(
+        name=ADMIN % 'pool_statistics',
+        check_str=base.ADMIN,
+        scope_types=['project'],
+        description='Show the database connection pool statistics of the '
+                    'API worker.',
+        operations=[
+            {
+                'path': '/v2/admin/db-pool',
+                'method': 'GET'
+            }
+        ]
+    ),
+    policy.DocumentedRuleDefault(
+        name=ADMIN % 'profile_request',
+        check_str=base.ADMIN,
+        scope_types=['project'],
+        description='Profile a request sent with the X-Freezer-Profile '
+                    'header, when [request_profiling]/enabled is set.',
+        operations=[
+            {
+                'path': '/v2/*',
+                'method': method
+            } for method in ('GET', 'POST', 'PUT', 'PATCH', 'DELETE')
+        ]
+    )
+]
+
+
+def list_rules():
+    return rules
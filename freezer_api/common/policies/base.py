@@ -17,6 +17,7 @@
 
 from oslo_policy import policy
 
+ADMIN = 'rule:context_is_admin'
 ADMIN_OR_SERVICE = 'rule:admin_or_service'
 ADMIN_OR_OWNER = 'rule:admin_or_owner'
 ADMIN_OR_OWNER_OR_SERVICE = 'rule:admin_or_owner_or_service'
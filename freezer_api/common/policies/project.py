@@ -0,0 +1,37 @@
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+from oslo_policy import policy
+
+from freezer_api.common.policies import base
+
+PROJECTS = 'projects:%s'
+
+rules = [
+    policy.DocumentedRuleDefault(
+        name=PROJECTS % 'purge',
+        check_str=base.ADMIN,
+        scope_types=['project'],
+        description='Purge every freezer resource of a project.',
+        operations=[
+            {
+                'path': '/v2/{project_id}',
+                'method': 'DELETE'
+            }
+        ]
+    )
+]
+
+
+def list_rules():
+    return rules
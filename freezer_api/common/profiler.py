@@ -0,0 +1,73 @@
+"""
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+osprofiler integration. Every helper is a no-op when osprofiler is not
+installed, and the trace points only report when a request carrying a
+trace header signed with one of the [profiler]/hmac_keys is profiled.
+"""
+
+import contextlib
+
+from oslo_config import cfg
+from oslo_log import log
+from oslo_utils import importutils
+import sqlalchemy as sa
+
+osprofiler_initializer = importutils.try_import('osprofiler.initializer')
+profiler = importutils.try_import('osprofiler.profiler')
+profiler_opts = importutils.try_import('osprofiler.opts')
+osprofiler_sqlalchemy = importutils.try_import('osprofiler.sqlalchemy')
+
+CONF = cfg.CONF
+LOG = log.getLogger(__name__)
+
+if profiler_opts:
+    # trace the SQL statements as well once profiling is enabled
+    profiler_opts.set_defaults(CONF, trace_sqlalchemy=True)
+
+
+def setup(binary, host):
+    """Send the traces of this service to [profiler]/connection_string"""
+    if not profiler or not CONF.profiler.enabled:
+        return
+    osprofiler_initializer.init_from_conf(
+        conf=CONF, context={}, project='freezer', service=binary, host=host)
+    LOG.info('osprofiler is enabled')
+
+
+def trace_engine(engine):
+    """on_engine_create hook of the enginefacade tracing every statement"""
+    if profiler and CONF.profiler.enabled and \
+            CONF.profiler.trace_sqlalchemy:
+        osprofiler_sqlalchemy.add_tracing(sa, engine, 'db')
+
+
+def trace(name, **kwargs):
+    """Trace point decorator of a function"""
+    if profiler:
+        return profiler.trace(name, **kwargs)
+    return lambda func: func
+
+
+def trace_cls(name, **kwargs):
+    """Trace point decorator of the public methods of a class"""
+    if profiler:
+        return profiler.trace_cls(name, **kwargs)
+    return lambda cls: cls
+
+
+def trace_block(name, info=None):
+    """Trace point context manager of a block of code"""
+    if profiler:
+        return profiler.Trace(name, info=info)
+    return contextlib.nullcontext()
@@ -50,6 +50,8 @@ class FreezerContext(context.RequestContext):
             roles=roles)
         self.auth_token_info = auth_token_info
         self._keystone_client = None
+        # QueryStats of the SQL statements run for the request
+        self.db_stats = None
 
     @classmethod
     def from_dict(cls, values):
@@ -52,3 +52,38 @@ class DBDriver(metaclass=abc.ABCMeta):
 
     def get_instance(self):
         pass
+
+    def warm_up(self):
+        """Open the connections of the API worker ahead of the requests"""
+        pass
+
+    def db_reindex(self):
+        raise NotImplementedError(
+            'Reindexing is not supported by the {0} driver'.format(
+                self.name()))
+
+    def partition_backups(self, months_ahead=3):
+        raise NotImplementedError(
+            'Partitioning is not supported by the {0} driver'.format(
+                self.name()))
+
+    def drop_backup_partitions(self, before):
+        raise NotImplementedError(
+            'Partitioning is not supported by the {0} driver'.format(
+                self.name()))
+
+    def slow_query_report(self, limit=10):
+        raise NotImplementedError(
+            'The slow query log is not supported by the {0} driver'.format(
+                self.name()))
+
+    def generate_fixture(self, progress=None, **sizes):
+        raise NotImplementedError(
+            'Generating a synthetic catalog is not supported by the {0} '
+            'driver'.format(self.name()))
+
+    def migrate_from_elasticsearch(self, es_api, batch_size=1000,
+                                   checkpoint_path=None, progress=None):
+        raise NotImplementedError(
+            'Migrating from Elasticsearch is not supported by the {0} '
+            'driver'.format(self.name()))
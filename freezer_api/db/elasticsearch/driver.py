@@ -55,11 +55,55 @@ class ElasticSearchDB(db_base.DBDriver):
                     help='turn on SSL certs verification'),
         cfg.StrOpt('ca_certs',
                    help='path to CA certs on disk'),
+        cfg.StrOpt('refresh',
+                   default='wait_for',
+                   choices=['false', 'wait_for', 'true'],
+                   help='Refresh policy sent with every write. "true" '
+                        'refreshes the affected shards right away, '
+                        '"wait_for" returns once the next periodic refresh '
+                        'made the change searchable and "false" returns '
+                        'without waiting for it.'),
         cfg.IntOpt('number_of_replicas',
                    default=0,
                    help='Number of replicas for elk cluster. Default is 0. '
                         'Use 0 for no replicas. This should be set to (number '
                         'of node in the ES cluter -1).'),
+        cfg.BoolOpt('index_per_type',
+                    default=False,
+                    help='Store each document type (backups, clients, jobs, '
+                         'actions, sessions) in its own index, reached '
+                         'through the alias <index>-<type>. Run '
+                         '"freezer-manage db reindex" to move the documents '
+                         'of an existing shared index.'),
+        cfg.BoolOpt('monthly_backup_indices',
+                    default=False,
+                    help='Store backups in one index per month, named '
+                         '<index>-backups-YYYY.MM, read through the alias '
+                         '<index>-backups and written through the alias '
+                         '<index>-backups-write. Run "freezer-manage db '
+                         'partition-backups" monthly to create the upcoming '
+                         'indices and "freezer-manage db '
+                         'drop-backup-partitions" to drop the old ones. '
+                         'Run "freezer-manage db reindex" before starting '
+                         'the API to copy the backups of an existing shared '
+                         'index behind <index>-backups.'),
+        cfg.DictOpt('type_shards',
+                    default={},
+                    help='Number of primary shards of the index of each '
+                         'document type when index_per_type is set, e.g. '
+                         'backups:3,jobs:1. Unlisted types use the '
+                         'elasticsearch default.'),
+        cfg.DictOpt('type_replicas',
+                    default={},
+                    help='Number of replicas of the index of each document '
+                         'type when index_per_type is set, e.g. backups:1. '
+                         'Unlisted types use number_of_replicas.'),
+        cfg.DictOpt('type_refresh_interval',
+                    default={},
+                    help='Refresh interval of the index of each document '
+                         'type when index_per_type is set, e.g. '
+                         'backups:30s,jobs:1s. Unlisted types use the '
+                         'elasticsearch default.'),
         cfg.StrOpt('mapping',
                    dest='select_mapping',
                    default='',
@@ -114,6 +158,22 @@ class ElasticSearchDB(db_base.DBDriver):
             self._manage_engine = self.get_manage_engine()
         self._manage_engine.remove_mappings()
 
+    def db_reindex(self):
+        if not self._manage_engine:
+            self._manage_engine = self.get_manage_engine()
+        return self._manage_engine.reindex()
+
+    def partition_backups(self, months_ahead=3):
+        if not self._manage_engine:
+            self._manage_engine = self.get_manage_engine()
+        return self._manage_engine.rotate_backup_indices(
+            months_ahead=months_ahead)
+
+    def drop_backup_partitions(self, before):
+        if not self._manage_engine:
+            self._manage_engine = self.get_manage_engine()
+        return self._manage_engine.drop_backup_indices(before)
+
     def db_show(self):
         if not self._manage_engine:
             self._manage_engine = self.get_manage_engine()
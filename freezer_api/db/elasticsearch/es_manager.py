@@ -13,9 +13,13 @@
 #    under the License.
 
 
+import datetime
+import re
+
 import elasticsearch
 from oslo_config import cfg
 from oslo_log import log
+from oslo_utils import timeutils
 
 from freezer_api.common import db_mappings
 
@@ -26,6 +30,28 @@ LOG = log.getLogger(__name__)
 DEFAULT_INDEX = 'freezer'
 DEFAULT_REPLICAS = 0
 
+# queries selecting the documents of each type in a shared index
+TYPE_QUERIES = {
+    'backups': {'bool': {'filter': [{'exists': {'field': 'backup_id'}}]}},
+    'clients': {'bool': {'filter': [
+        {'exists': {'field': 'client.client_id'}}]}},
+    'jobs': {'bool': {'filter': [{'exists': {'field': 'job_id'}}],
+                      'must_not': [{'exists': {'field': 'backup_id'}}]}},
+    'actions': {'bool': {'filter': [{'exists': {'field': 'action_id'}}]}},
+    'sessions': {'bool': {'filter': [{'exists': {'field': 'session_id'}}],
+                          'must_not': [{'exists': {'field': 'job_id'}}]}},
+}
+
+_MONTHLY_INDEX_RE = re.compile(r'-(\d{4})\.(\d{2})$')
+
+
+def _index_month(name):
+    """Month held by a monthly index, None for other indices"""
+    match = _MONTHLY_INDEX_RE.search(name)
+    if not match:
+        return None
+    return datetime.datetime(int(match.group(1)), int(match.group(2)), 1)
+
 
 class ElasticSearchManager(object):
     """
@@ -102,6 +128,11 @@ class ElasticSearchManager(object):
         if self.conf.get('erase'):
             self.remove_mappings()
 
+        if self.conf.get('index_per_type'):
+            return self._sync_type_indices()
+        if self.conf.get('monthly_backup_indices'):
+            self.rotate_backup_indices()
+
         # check if index does not exists create it
         if not self._check_index_exists(self.index):
             self._create_index()
@@ -117,6 +148,201 @@ class ElasticSearchManager(object):
                 print("Couldn't update {0}. Request returned {1}".format(
                     doc_type, check.get('acknowledged')))
 
+    def _type_settings(self, doc_type):
+        """
+        Settings of the index of doc_type, from the type_shards,
+        type_replicas and type_refresh_interval options
+        :param doc_type: the document type, e.g. backups
+        :return: dict
+        """
+        replicas = self.conf.get('type_replicas') or {}
+        settings = {
+            'number_of_replicas': int(replicas.get(
+                doc_type,
+                self.conf.get('number_of_replicas') or DEFAULT_REPLICAS))
+        }
+        shards = self.conf.get('type_shards') or {}
+        if doc_type in shards:
+            settings['number_of_shards'] = int(shards[doc_type])
+        refresh_interval = self.conf.get('type_refresh_interval') or {}
+        if doc_type in refresh_interval:
+            settings['refresh_interval'] = refresh_interval[doc_type]
+        return settings
+
+    def _alias_indices(self, alias):
+        """
+        Concrete indices an alias points to
+        :param alias: name of the alias
+        :return: list of index names, empty if the alias does not exist
+        """
+        if not self.elk.indices.exists_alias(name=alias):
+            return []
+        return sorted(self.elk.indices.get_alias(name=alias).keys())
+
+    def _create_type_index(self, doc_type, index, alias=None):
+        """
+        Create the index of one document type, with its settings and
+        mappings
+        :param doc_type: the document type, e.g. backups
+        :param index: name of the concrete index
+        :param alias: optional alias pointing to the new index
+        :return: {u'acknowledged': True} if success
+        """
+        body = {'settings': self._type_settings(doc_type)}
+        if doc_type in self.mappings:
+            body['mappings'] = self.mappings[doc_type]
+        if alias:
+            body['aliases'] = {alias: {}}
+        return self.elk.indices.create(index=index, body=body)
+
+    def _sync_type_indices(self):
+        """
+        Create the missing indices of the document types, each behind the
+        alias <index>-<type>, and update the mappings of the existing ones
+        """
+        doc_types = db_mappings.DOC_TYPES
+        if self.conf.get('select_mapping'):
+            doc_types = list(self.get_required_mappings().keys())
+        for doc_type in doc_types:
+            alias = db_mappings.get_type_index(self.index, doc_type)
+            if doc_type == 'backups' and self.conf.get(
+                    'monthly_backup_indices'):
+                self.rotate_backup_indices()
+                continue
+            if not self._alias_indices(alias):
+                check = self._create_type_index(
+                    doc_type, '{0}-{1:06d}'.format(alias, 1), alias=alias)
+            elif doc_type in self.mappings:
+                check = self.create_one_mapping(doc_type,
+                                                self.mappings[doc_type],
+                                                index=alias)
+            else:
+                continue
+            print("Creating or Updating {0} is {1}".format(
+                alias, check.get('acknowledged')))
+
+    def reindex(self):
+        """
+        Copy the documents of each type into a new index behind its alias
+        <index>-<type> and atomically switch the alias to it. The first run
+        splits the shared index by document type; later runs rebuild the
+        per type indices, e.g. to apply a new number of shards. The shared
+        index is left in place. Documents written during the copy may be
+        lost, so stop the API first.
+        With monthly_backup_indices, only the backups are copied when
+        index_per_type is not set. The backups of the shared index are
+        then copied once, into <index>-backups-000001 added next to the
+        monthly indices behind <index>-backups, and the monthly indices
+        are not rebuilt.
+        :return: {doc_type: number of documents copied}
+        """
+        monthly = self.conf.get('monthly_backup_indices')
+        if self.conf.get('index_per_type'):
+            doc_types = db_mappings.DOC_TYPES
+        elif monthly:
+            doc_types = ('backups',)
+        else:
+            raise Exception('reindex requires the index_per_type or '
+                            'monthly_backup_indices option')
+        copied = {}
+        for doc_type in doc_types:
+            alias = db_mappings.get_type_index(self.index, doc_type)
+            old_indices = self._alias_indices(alias)
+            if doc_type == 'backups' and monthly:
+                if any(not _index_month(name) for name in old_indices):
+                    # copied by a previous run
+                    continue
+                # the monthly indices stay behind the alias
+                old_indices = []
+            generation = 1
+            if old_indices:
+                source = {'index': alias}
+                for name in old_indices:
+                    suffix = name.rsplit('-', 1)[-1]
+                    if suffix.isdigit():
+                        generation = max(generation, int(suffix) + 1)
+            elif self._check_index_exists(self.index):
+                source = {'index': self.index,
+                          'query': TYPE_QUERIES[doc_type]}
+            else:
+                source = None
+            new_index = '{0}-{1:06d}'.format(alias, generation)
+            self._create_type_index(doc_type, new_index)
+            if source:
+                res = self.elk.reindex(
+                    body={'source': source, 'dest': {'index': new_index}},
+                    wait_for_completion=True, refresh=True)
+                copied[doc_type] = res.get('total', 0)
+            else:
+                copied[doc_type] = 0
+            actions = [{'add': {'index': new_index, 'alias': alias}}]
+            actions.extend({'remove_index': {'index': name}}
+                           for name in old_indices)
+            self.elk.indices.update_aliases(body={'actions': actions})
+            LOG.info('{0} document(s) reindexed into {1}'.format(
+                copied[doc_type], new_index))
+        return copied
+
+    def rotate_backup_indices(self, months_ahead=1, now=None):
+        """
+        Create the monthly backup indices <index>-backups-YYYY.MM of the
+        current month and of the months_ahead next ones, all behind the
+        read alias <index>-backups, and atomically move the write alias
+        <index>-backups-write to the index of the current month. Run it
+        at least monthly, e.g. from cron: backups keep being written to
+        the previous month until it runs.
+        :param months_ahead: number of upcoming months created in advance
+        :param now: current date, defaults to now
+        :return: names of the indices created
+        """
+        alias = db_mappings.get_type_index(self.index, 'backups')
+        write_alias = db_mappings.get_write_alias(alias)
+        current = (now or timeutils.utcnow()).replace(
+            day=1, hour=0, minute=0, second=0, microsecond=0)
+        last = datetime.datetime(
+            current.year + (current.month + months_ahead - 1) // 12,
+            (current.month + months_ahead - 1) % 12 + 1, 1)
+        existing = self._alias_indices(alias)
+        created = []
+        for month in db_mappings.get_months(current, last):
+            name = db_mappings.get_monthly_index(alias, month)
+            if name not in existing:
+                self._create_type_index('backups', name, alias=alias)
+                created.append(name)
+        current_index = db_mappings.get_monthly_index(alias, current)
+        if self._alias_indices(write_alias) != [current_index]:
+            actions = [{'remove': {'index': name, 'alias': write_alias}}
+                       for name in self._alias_indices(write_alias)]
+            actions.append({'add': {'index': current_index,
+                                    'alias': write_alias,
+                                    'is_write_index': True}})
+            self.elk.indices.update_aliases(body={'actions': actions})
+        LOG.info('{0} backup index(es) created, writing to {1}'.format(
+            len(created), current_index))
+        return created
+
+    def drop_backup_indices(self, before):
+        """
+        Delete the monthly backup indices of the months ending before
+        before. The index receiving new backups is never deleted.
+        :param before: datetime
+        :return: names of the indices deleted
+        """
+        alias = db_mappings.get_type_index(self.index, 'backups')
+        writing = self._alias_indices(db_mappings.get_write_alias(alias))
+        dropped = []
+        for name in self._alias_indices(alias):
+            month = _index_month(name)
+            if not month or name in writing:
+                continue
+            end = datetime.datetime(month.year + month.month // 12,
+                                    month.month % 12 + 1, 1)
+            if end <= before:
+                self.elk.indices.delete(index=name)
+                dropped.append(name)
+        LOG.info('{0} backup index(es) deleted'.format(len(dropped)))
+        return dropped
+
     def _create_index(self):
         """
         Create the index that will allow us to put the mappings under it
@@ -132,28 +358,30 @@ class ElasticSearchManager(object):
     def delete_index(self):
         return self.elk.indices.delete(index=self.index)
 
-    def create_one_mapping(self, doc_type, body):
+    def create_one_mapping(self, doc_type, body, index=None):
         """
         Create one document type and update its mappings
         :param doc_type: the document type to be created jobs, clients, backups
         :param body: the structure of the document
+        :param index: index or alias to update, defaults to the shared index
         :return: dict
         """
+        index = index or self.index
         # check if doc_type exists or not
         if self._check_mapping_exists(doc_type):
             do_update = self.prompt(
                 '[[[ {0} ]]] already exists in index => {1}'
                 ' <= Do you want to update it ? (y/n) '.format(doc_type,
-                                                               self.index)
+                                                               index)
             )
             if do_update:
                 # Call elasticsearch library and put the mappings
                 return self.elk.indices.put_mapping(body=body,
-                                                    index=self.index)
+                                                    index=index)
             else:
                 return {'acknowledged': False}
 
-        return self.elk.indices.put_mapping(body=body, index=self.index)
+        return self.elk.indices.put_mapping(body=body, index=index)
 
     def remove_one_mapping(self, doc_type):
         """
@@ -170,6 +398,15 @@ class ElasticSearchManager(object):
         Remove mappings from elasticsearch
         :return: dict
         """
+        doc_types = ()
+        if self.conf.get('index_per_type'):
+            doc_types = db_mappings.DOC_TYPES
+        elif self.conf.get('monthly_backup_indices'):
+            doc_types = ('backups',)
+        for doc_type in doc_types:
+            alias = db_mappings.get_type_index(self.index, doc_type)
+            for index in self._alias_indices(alias):
+                self.elk.indices.delete(index=index)
         # check if index doesn't exist return
         if not self._check_index_exists(index=self.index):
             print("Index {0} doesn't exists.".format(self.index))
@@ -201,6 +438,16 @@ class ElasticSearchManager(object):
         Update number of replicas
         :return: dict
         """
+        if self.conf.get('index_per_type'):
+            # the number of shards can only be changed by a reindex
+            results = {}
+            for doc_type in db_mappings.DOC_TYPES:
+                alias = db_mappings.get_type_index(self.index, doc_type)
+                settings = self._type_settings(doc_type)
+                settings.pop('number_of_shards', None)
+                results[alias] = self.elk.indices.put_settings(
+                    body=settings, index=alias)
+            return results
         body = {
             'number_of_replicas':
                 self.conf['number_of_replicas'] or DEFAULT_REPLICAS
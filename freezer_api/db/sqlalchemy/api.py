@@ -13,16 +13,23 @@
 #    under the License.
 
 
+import datetime
+import itertools
 import threading
 
 from oslo_config import cfg
 from oslo_db import api as db_api
 from oslo_db import exception as db_exc
+from oslo_db import options as db_options
 from oslo_db.sqlalchemy import enginefacade
 from oslo_db.sqlalchemy import utils as sqlalchemyutils
 from oslo_log import log
 from oslo_utils import timeutils
+from sqlalchemy import and_
+from sqlalchemy import exists
+from sqlalchemy import func
 from sqlalchemy import or_
+from sqlalchemy import select
 from typing import NamedTuple
 import uuid
 
@@ -35,13 +42,25 @@ from freezer_api.common.json_schemas import SUPPORTED_ACTIONS
 from freezer_api.common.json_schemas import SUPPORTED_ENGINES
 from freezer_api.common.json_schemas import SUPPORTED_MODES
 from freezer_api.common.json_schemas import SUPPORTED_STORAGES
+from freezer_api.common import profiler
 from freezer_api.db.sqlalchemy import models
+from freezer_api.db.sqlalchemy import pooling
+from freezer_api.db.sqlalchemy import query_stats
+from freezer_api.db.sqlalchemy import slow_queries
+from freezer_api.db.sqlalchemy import timing
 
 
 CONF = cfg.CONF
+CONF.register_opts(pooling.POOL_OPTS, group='database')
 LOG = log.getLogger(__name__)
 
 
+# rows read per transaction by the generators of the streamed listings
+STREAM_BATCH_SIZE = 500
+# created_at of the rows without one in the keyset of the streamed
+# listings, which sorts them first
+_NO_CREATED_AT = datetime.datetime(1970, 1, 1)
+
 main_context_lock = threading.Lock()
 main_context_manager = None
 main_context = None
@@ -61,9 +80,22 @@ def _get_main_context_manager():
     with main_context_lock:
         if not main_context_manager:
             main_context_manager = enginefacade.transaction_context()
+            CONF.register_opts(db_options.database_opts, group='database')
+            database = CONF.database
             # NOTE(noonedeadpunk): Disable foreign key enforcement by default
             # to avoid breaking tests that have incomplete data setup.
-            main_context_manager.configure(sqlite_fk=False)
+            main_context_manager.configure(
+                sqlite_fk=False,
+                max_pool_size=database.max_pool_size,
+                max_overflow=database.max_overflow,
+                pool_timeout=database.pool_timeout,
+                connection_recycle_time=database.connection_recycle_time)
+            main_context_manager.append_on_engine_create(pooling.instrument)
+            main_context_manager.append_on_engine_create(timing.instrument)
+            timing.subscribe(query_stats.on_statement)
+            timing.subscribe(slow_queries.on_statement)
+            main_context_manager.append_on_engine_create(
+                profiler.trace_engine)
 
     return main_context_manager
 
@@ -106,6 +138,17 @@ def get_engine():
     return _get_main_context_manager().writer.get_engine()
 
 
+def warm_up():
+    """Open the [database]/pool_warm_size connections of this worker"""
+    pooling.warm_pool_at_worker_start(get_engine,
+                                      CONF.database.pool_warm_size)
+
+
+def pool_statistics():
+    """Connection pool occupation and checkout waits of this worker"""
+    return pooling.pool_statistics(get_engine())
+
+
 def model_query(session, model,
                 args=None,
                 read_deleted='no',
@@ -143,23 +186,32 @@ def model_query(session, model,
     return query
 
 
+def _soft_delete_query(query):
+    """Soft-delete every row matched by ``query`` with a single UPDATE.
+
+    :returns: the number of rows deleted
+    """
+    return query.update(models.FreezerBase.delete_values(),
+                        synchronize_session=False)
+
+
 @db_api.wrap_db_retry(max_retries=50, retry_interval=0.5,
                       inc_retry_interval=False, retry_on_deadlock=True)
-def delete_tuple(tablename, user_id, tuple_id, project_id=None):
+def delete_tuples(tablename, user_id, tuple_ids, project_id=None):
+    """Soft-delete several tuples of a table with a single UPDATE.
+
+    Ids that do not exist, are already deleted or belong to another project
+    are ignored.
+
+    :returns: the number of tuples deleted
+    """
+    if not tuple_ids:
+        return 0
     with session_for_write() as session:
         try:
             query = model_query(session, tablename, project_id=project_id)
-            query = query.filter_by(id=tuple_id)
-            result = query.all()
-            if 1 == len(result):
-                result[0].delete(session=session)
-                LOG.info('Tuple delete, Tuple_id: '
-                         '{0} deleted in Table {1}'.
-                         format(tuple_id, tablename))
-            else:
-                LOG.info('Tuple delete, Tuple_id: '
-                         '{0} not found in Table {1}'.
-                         format(tuple_id, tablename))
+            query = query.filter(tablename.id.in_(tuple_ids))
+            result = _soft_delete_query(query)
         except db_exc.DBError:
             message = "Database operation failed."
             LOG.exception(message)
@@ -168,6 +220,18 @@ def delete_tuple(tablename, user_id, tuple_id, project_id=None):
             message = "An unexpected error occurred."
             LOG.exception(message)
             raise freezer_api_exc.StorageEngineError(message=message)
+    return result
+
+
+def delete_tuple(tablename, user_id, tuple_id, project_id=None):
+    if delete_tuples(tablename, user_id, [tuple_id], project_id=project_id):
+        LOG.info('Tuple delete, Tuple_id: '
+                 '{0} deleted in Table {1}'.
+                 format(tuple_id, tablename))
+    else:
+        LOG.info('Tuple delete, Tuple_id: '
+                 '{0} not found in Table {1}'.
+                 format(tuple_id, tablename))
     return tuple_id
 
 
@@ -281,6 +345,18 @@ def replace_tuple(tablename, user_id, tuple_id, tuple_values, project_id=None):
     return tuple_id
 
 
+def _search_query(session, tablename, project_id=None, all_projects=False):
+    if tablename == models.Client and not all_projects:
+        # Special case for clients: include central clients even if
+        # project doesn't match the requester
+        query = model_query(session, tablename)
+        return query.filter(or_(
+            models.Client.project_id == project_id,
+            models.Client.is_central.is_(True)
+        ))
+    return model_query(session, tablename, project_id=project_id)
+
+
 @db_api.wrap_db_retry(max_retries=50, retry_interval=0.5,
                       inc_retry_interval=False, retry_on_deadlock=True)
 def search_tuple(tablename, project_id=None, all_projects=False,
@@ -292,16 +368,8 @@ def search_tuple(tablename, project_id=None, all_projects=False,
 
     with session_for_read() as session:
         try:
-            if tablename == models.Client and not all_projects:
-                # Special case for clients: include central clients even if
-                # project doesn't match the requester
-                query = model_query(session, tablename)
-                query = query.filter(or_(
-                    models.Client.project_id == project_id,
-                    models.Client.is_central.is_(True)
-                ))
-            else:
-                query = model_query(session, tablename, project_id=project_id)
+            query = _search_query(session, tablename, project_id=project_id,
+                                  all_projects=all_projects)
 
             #  If search option isn't valid or set, we use limit and offset
             #  in sqlalchemy level
@@ -321,6 +389,76 @@ def search_tuple(tablename, project_id=None, all_projects=False,
     return result, search
 
 
+def _iter_rows(tablename, convert, project_id=None, all_projects=False,
+               offset=0, limit=None, batch_size=STREAM_BATCH_SIZE):
+    # keyset on (created_at, id): the rows come in the order they were
+    # created, as the listings read in a single query return them
+    created_at = func.coalesce(tablename.created_at, _NO_CREATED_AT)
+    last = None
+    while limit is None or limit > 0:
+        size = batch_size if limit is None else min(batch_size, limit)
+        with session_for_read() as session:
+            try:
+                query = _search_query(session, tablename,
+                                      project_id=project_id,
+                                      all_projects=all_projects)
+                query = query.order_by(created_at, tablename.id)
+                if last is None:
+                    query = query.offset(offset)
+                else:
+                    last_created_at, last_id = last
+                    query = query.filter(or_(
+                        created_at > last_created_at,
+                        and_(created_at == last_created_at,
+                             tablename.id > last_id)))
+                rows = query.limit(size).all()
+                documents = [convert(row) for row in rows]
+            except db_exc.DBError:
+                message = "Database operation failed."
+                LOG.exception(message)
+                raise freezer_api_exc.StorageEngineError(message=message)
+            except Exception:
+                message = "An unexpected error occurred."
+                LOG.exception(message)
+                raise freezer_api_exc.StorageEngineError(message=message)
+        # yielded once the transaction is over
+        yield from documents
+        if len(rows) < size:
+            return
+        last = (rows[-1].created_at or _NO_CREATED_AT, rows[-1].id)
+        if limit is not None:
+            limit -= len(rows)
+
+
+def iter_tuple(tablename, convert, project_id=None, all_projects=False,
+               offset=0, limit=100, search=None,
+               batch_size=STREAM_BATCH_SIZE):
+    """Generator of the documents search_tuple would return.
+
+    The rows are read batch_size at a time in creation order, each batch
+    in its own transaction, and converted by ``convert`` before the transaction
+    ends. No transaction is open while the documents are consumed, so
+    they can be written to a slow client with a bounded memory. With a
+    search option, the rows are scanned until limit documents match
+    instead of being all loaded.
+    """
+    search = valid_and_get_search_option(search=search)
+
+    if all_projects:
+        project_id = None
+
+    if not search:
+        yield from _iter_rows(tablename, convert, project_id=project_id,
+                              all_projects=all_projects, offset=offset,
+                              limit=limit, batch_size=batch_size)
+        return
+    # offset and limit apply to the matching documents
+    documents = _iter_rows(tablename, convert, project_id=project_id,
+                           all_projects=all_projects, batch_size=batch_size)
+    yield from itertools.islice(iter_filter_by_search_opt(documents, search),
+                                offset, offset + limit)
+
+
 def get_recursively(source_dict, search_keys):
     """
     Takes a dict with nested lists and dicts,
@@ -379,13 +517,9 @@ def valid_and_get_search_option(search=None):
     return search
 
 
-def filter_tuple_by_search_opt(tuples, offset=0, limit=100, search=None):
-    search = search or {}
+def iter_filter_by_search_opt(tuples, search):
+    """Generator of the tuples matching the search option"""
     search_key = {}
-    result_last = []
-    # search opt is null, all tuples will be filtered in.
-    if len(search) == 0:
-        return tuples
     for m in search.get('match', []):
         for key, value in m.items():
             search_key[key] = value
@@ -393,11 +527,7 @@ def filter_tuple_by_search_opt(tuples, offset=0, limit=100, search=None):
         for key, value in m.items():
             search_key[key] = value
 
-    jobs_search_offset = 0
-    jobs_search_count = 0
     for tuple in tuples:
-        if jobs_search_count >= limit:
-            return result_last
         filter_out = False
         search_keys_found = get_recursively(tuple, search_key)
         # If all keys and values are in search_keys_found, this tuple will be
@@ -415,11 +545,16 @@ def filter_tuple_by_search_opt(tuples, offset=0, limit=100, search=None):
                     filter_out = True
                     break
         if not filter_out:
-            jobs_search_offset += 1
-            if jobs_search_offset > offset:
-                jobs_search_count += 1
-                result_last.append(tuple)
-    return result_last
+            yield tuple
+
+
+def filter_tuple_by_search_opt(tuples, offset=0, limit=100, search=None):
+    search = search or {}
+    # search opt is null, all tuples will be filtered in.
+    if len(search) == 0:
+        return tuples
+    matching = iter_filter_by_search_opt(tuples, search)
+    return list(itertools.islice(matching, offset, offset + limit))
 
 
 @db_api.wrap_db_retry(max_retries=50, retry_interval=0.5,
@@ -457,10 +592,29 @@ def decode_capability(db_field):
     return decoded
 
 
+def _client_to_dict(client):
+    clientmap = {}
+    clientmap['project_id'] = client.project_id
+    clientmap['user_id'] = client.user_id
+    clientmap['client'] = {'uuid': client.uuid,
+                           'hostname': client.hostname,
+                           'client_id': client.client_id,
+                           'is_central': client.is_central,
+                           'description': client.description,
+                           'supported_actions': decode_capability(
+                               client.supported_actions),
+                           'supported_modes': decode_capability(
+                               client.supported_modes),
+                           'supported_storages': decode_capability(
+                               client.supported_storages),
+                           'supported_engines': decode_capability(
+                               client.supported_engines)}
+    return clientmap
+
+
 def get_client(project_id=None, client_id=None, offset=0,
                limit=100, search=None):
 
-    clients = []
     search_key = {}
     if client_id:
         result = get_client_byid(client_id, project_id=project_id)
@@ -469,24 +623,7 @@ def get_client(project_id=None, client_id=None, offset=0,
                                           project_id=project_id, offset=offset,
                                           limit=limit, search=search)
 
-    for client in result:
-        clientmap = {}
-        clientmap['project_id'] = client.project_id
-        clientmap['user_id'] = client.user_id
-        clientmap['client'] = {'uuid': client.uuid,
-                               'hostname': client.hostname,
-                               'client_id': client.client_id,
-                               'is_central': client.is_central,
-                               'description': client.description,
-                               'supported_actions': decode_capability(
-                                   client.supported_actions),
-                               'supported_modes': decode_capability(
-                                   client.supported_modes),
-                               'supported_storages': decode_capability(
-                                   client.supported_storages),
-                               'supported_engines': decode_capability(
-                                   client.supported_engines)}
-        clients.append(clientmap)
+    clients = [_client_to_dict(client) for client in result]
 
     # If search opt is wrong, filter will not work,
     # return all tuples.
@@ -496,6 +633,12 @@ def get_client(project_id=None, client_id=None, offset=0,
     return clients
 
 
+def iter_client(project_id=None, offset=0, limit=100, search=None):
+    """Generator of the clients of get_client, for streamed listings"""
+    return iter_tuple(models.Client, _client_to_dict, project_id=project_id,
+                      offset=offset, limit=limit, search=search)
+
+
 def add_client(user_id, doc, project_id=None):
 
     client_doc = utilsv2.ClientDoc.create(doc, project_id, user_id)
@@ -619,17 +762,29 @@ def delete_action(user_id: str, action_id: str,
     # An action may still be referenced by jobs. Soft-delete those JobAction
     # rows in the same transaction so the jobs stop listing a deleted action
     # (the Job.job_actions relationship filters out deleted rows) instead of
-    # keeping a dangling reference.
+    # keeping a dangling reference. Each step is a single UPDATE, however
+    # many jobs share the action.
     with session_for_write() as session:
-        job_actions = model_query(
-            session, models.JobAction).filter_by(action_id=action_id).all()
-        for job_action in job_actions:
-            job_action.delete(session)
-
-        delete_tuple(tablename=models.Action, user_id=user_id,
-                     tuple_id=action_id, project_id=project_id)
-        delete_tuple(tablename=models.ActionReport, user_id=user_id,
-                     tuple_id=action_id, project_id=project_id)
+        if delete_tuples(tablename=models.Action, user_id=user_id,
+                         tuple_ids=[action_id], project_id=project_id):
+            try:
+                _soft_delete_query(model_query(
+                    session, models.JobAction).filter_by(action_id=action_id))
+            except db_exc.DBError:
+                message = "Database operation failed."
+                LOG.exception(message)
+                raise freezer_api_exc.StorageEngineError(message=message)
+            except Exception:
+                message = "An unexpected error occurred."
+                LOG.exception(message)
+                raise freezer_api_exc.StorageEngineError(message=message)
+            LOG.info('Action delete, action_id: {0} deleted'.
+                     format(action_id))
+        else:
+            LOG.info('Action delete, action_id: {0} not found'.
+                     format(action_id))
+        delete_tuples(tablename=models.ActionReport, user_id=user_id,
+                      tuple_ids=[action_id], project_id=project_id)
     return action_id
 
 
@@ -677,6 +832,7 @@ def add_action(user_id: str, doc: dict,
     actionvalue['backup_metadata'] = json_utils.json_encode(freezer_action)
 
     action.update(actionvalue)
+    action.freezer_action_hash = freezer_action_hash(action)
 
     add_tuple(tuple=action)
 
@@ -696,6 +852,31 @@ def add_action(user_id: str, doc: dict,
     return action_id
 
 
+def add_actions(user_id: str, docs: list[dict],
+                project_id: str | None = None) -> list[str]:
+    """Register several actions, such as the inline actions of a job.
+
+    The actions are added in one transaction. An action without
+    action_id identical to one added before it reuses its action_id, as
+    find_identical_action would have found it.
+    """
+    added = {}
+    action_ids = []
+    with session_for_write():
+        for doc in docs:
+            key = (utilsv2.ActionDoc.freezer_action_hash(
+                doc.get('freezer_action')),
+                doc.get('max_retries', 5),
+                doc.get('max_retries_interval', 6))
+            if not doc.get('action_id') and key in added:
+                doc['action_id'] = added[key]
+            else:
+                added.setdefault(key, add_action(user_id=user_id, doc=doc,
+                                                 project_id=project_id))
+            action_ids.append(doc['action_id'])
+    return action_ids
+
+
 def convert_action_to_dict(action: models.Action) -> dict:
     values = dict()
     values['project_id'] = action.get('project_id')
@@ -720,6 +901,61 @@ def convert_action_to_dict(action: models.Action) -> dict:
     return values
 
 
+def freezer_action_hash(action: models.Action) -> str:
+    """Hash the freezer_action of an action row as the API returns it."""
+    freezer_action = convert_action_to_dict(action)['freezer_action']
+    return utilsv2.ActionDoc.freezer_action_hash(freezer_action)
+
+
+def _action_hash_after_write(action_id: str, values: dict,
+                             project_id: str | None = None) -> str:
+    """Hash of an action once values are written over its stored row.
+
+    Called within the write transaction, so that the hash is written by
+    the same UPDATE as the values.
+    """
+    existing = get_tuple(tablename=models.Action, tuple_id=action_id,
+                         project_id=project_id)
+    merged = {}
+    if existing:
+        merged = {column.name: getattr(existing[0], column.name)
+                  for column in models.Action.__table__.columns}
+    merged.update(values)
+    return freezer_action_hash(models.Action(**merged))
+
+
+@db_api.wrap_db_retry(max_retries=50, retry_interval=0.5,
+                      inc_retry_interval=False, retry_on_deadlock=True)
+def find_identical_action(doc: dict,
+                          project_id: str | None = None) -> str | None:
+    """Return the id of a stored action identical to ``doc``, if any.
+
+    Actions are matched on the hash of their ``freezer_action`` (one indexed
+    lookup) plus their retry settings, within the given project.
+    """
+    freezer_action_hash = utilsv2.ActionDoc.freezer_action_hash(
+        doc.get('freezer_action'))
+    with session_for_read() as session:
+        try:
+            query = model_query(session, models.Action,
+                                args=(models.Action.id,),
+                                project_id=project_id)
+            query = query.filter_by(
+                freezer_action_hash=freezer_action_hash,
+                max_retries=doc.get('max_retries', 5),
+                max_retries_interval=doc.get('max_retries_interval', 6))
+            result = query.first()
+        except db_exc.DBError:
+            message = "Database operation failed."
+            LOG.exception(message)
+            raise freezer_api_exc.StorageEngineError(message=message)
+        except Exception:
+            message = "An unexpected error occurred."
+            LOG.exception(message)
+            raise freezer_api_exc.StorageEngineError(message=message)
+    return result.id if result else None
+
+
 def get_action(action_id: str, project_id: str | None = None) -> dict:
     actions = get_tuple(tablename=models.Action,
                         tuple_id=action_id, project_id=project_id)
@@ -745,39 +981,39 @@ def _get_actions_by_id(action_ids: list[str],
                 for action in actions}
 
 
+def _action_to_dict(action, project_id):
+    actionmap = {}
+    actionmap['project_id'] = project_id
+    actionmap['user_id'] = action.user_id
+    actionmap['timeout'] = action.timeout
+    actionmap['max_retries_interval'] = action.max_retries_interval
+    actionmap['max_retries'] = action.max_retries
+    actionmap['action_id'] = action.id
+    actionmap['mandatory'] = action.mandatory
+
+    actionmap['freezer_action'] = json_utils.\
+        json_decode(action.get('backup_metadata'))
+    actionmap['freezer_action']['backup_name'] = action.\
+        get('backup_name')
+    actionmap['freezer_action']['mode'] = action.get('actionmode')
+    actionmap['freezer_action']['action'] = action.get('action')
+    actionmap['freezer_action']['container'] = action.\
+        get('container')
+    actionmap['freezer_action']['timeout'] = action.get('timeout')
+    actionmap['freezer_action']['priority'] = action.get('priority')
+    actionmap['freezer_action']['path_to_backup'] = action.\
+        get('path_to_backup')
+    actionmap['freezer_action']['log_file'] = action.get('log_file')
+    return actionmap
+
+
 def search_action(project_id=None, offset=0,
                   limit=100, search=None):
 
-    actions = []
-
     result, search_key = search_tuple(tablename=models.Action,
                                       project_id=project_id, offset=offset,
                                       limit=limit, search=search)
-    for action in result:
-        actionmap = {}
-        actionmap['project_id'] = project_id
-        actionmap['user_id'] = action.user_id
-        actionmap['timeout'] = action.timeout
-        actionmap['max_retries_interval'] = action.max_retries_interval
-        actionmap['max_retries'] = action.max_retries
-        actionmap['action_id'] = action.id
-        actionmap['mandatory'] = action.mandatory
-
-        actionmap['freezer_action'] = json_utils.\
-            json_decode(action.get('backup_metadata'))
-        actionmap['freezer_action']['backup_name'] = action.\
-            get('backup_name')
-        actionmap['freezer_action']['mode'] = action.get('actionmode')
-        actionmap['freezer_action']['action'] = action.get('action')
-        actionmap['freezer_action']['container'] = action.\
-            get('container')
-        actionmap['freezer_action']['timeout'] = action.get('timeout')
-        actionmap['freezer_action']['priority'] = action.get('priority')
-        actionmap['freezer_action']['path_to_backup'] = action.\
-            get('path_to_backup')
-        actionmap['freezer_action']['log_file'] = action.get('log_file')
-
-        actions.append(actionmap)
+    actions = [_action_to_dict(action, project_id) for action in result]
     # If search opt is wrong, filter will not work,
     # return all tuples.
     actions = filter_tuple_by_search_opt(actions, offset=offset, limit=limit,
@@ -785,6 +1021,14 @@ def search_action(project_id=None, offset=0,
     return actions
 
 
+def iter_action(project_id=None, offset=0, limit=100, search=None):
+    """Generator of the actions of search_action, for streamed listings"""
+    return iter_tuple(models.Action,
+                      lambda action: _action_to_dict(action, project_id),
+                      project_id=project_id, offset=offset, limit=limit,
+                      search=search)
+
+
 def update_action(user_id, action_id, patch_doc, project_id=None):
     # changes in user_id or action_id are not allowed
     valid_patch = utilsv2.ActionDoc.create_patch(patch_doc)
@@ -811,8 +1055,12 @@ def update_action(user_id, action_id, patch_doc, project_id=None):
     values['actionmode'] = freezer_action.get('mode', None)
     values['backup_metadata'] = json_utils.json_encode(freezer_action)
 
-    update_tuple(tablename=models.Action, user_id=user_id, tuple_id=action_id,
-                 tuple_values=values, project_id=project_id)
+    with session_for_write():
+        values['freezer_action_hash'] = _action_hash_after_write(
+            action_id, values, project_id=project_id)
+        update_tuple(tablename=models.Action, user_id=user_id,
+                     tuple_id=action_id, tuple_values=values,
+                     project_id=project_id)
 
     return action_id
 
@@ -839,9 +1087,12 @@ def replace_action(user_id, action_id, doc, project_id=None):
             values[key] = freezer_action.get(key)
     values['actionmode'] = freezer_action.get('mode', None)
     values['backup_metadata'] = json_utils.json_encode(freezer_action)
-    replace_tuple(tablename=models.Action, user_id=user_id,
-                  tuple_id=action_id, tuple_values=values,
-                  project_id=project_id)
+    with session_for_write():
+        values['freezer_action_hash'] = _action_hash_after_write(
+            action_id, values, project_id=project_id)
+        replace_tuple(tablename=models.Action, user_id=user_id,
+                      tuple_id=action_id, tuple_values=values,
+                      project_id=project_id)
 
     LOG.info('action replaced, action_id: {0}'.format(action_id))
     return action_id
@@ -871,8 +1122,9 @@ def _resolve_actions_from_job_actions(
 
     Entries that reference an existing action by ``action_id`` take their
     definition from the actions table (fetched in one query to avoid an N+1);
-    inline entries create the action from their ``freezer_action``. The
-    original order is preserved and an unknown ``action_id`` is rejected.
+    inline entries reuse an identical stored action when there is one and
+    otherwise create the action from their ``freezer_action``. The original
+    order is preserved and an unknown ``action_id`` is rejected.
     """
     # Fetch every referenced action up front in a single query. The read
     # session is closed before any add_action() below, since oslo.db forbids
@@ -891,8 +1143,9 @@ def _resolve_actions_from_job_actions(
                     message='Action id: {0} not found.'.format(action_id))
             freezer_action = action['freezer_action']
         else:
-            action_id = add_action(user_id=user_id, doc=job_action,
-                                   project_id=project_id)
+            action_id = find_identical_action(job_action, project_id) or \
+                add_action(user_id=user_id, doc=job_action,
+                           project_id=project_id)
             freezer_action = job_action.get('freezer_action') or {}
         resolved_actions.append(
             ResolvedAction(action_id=action_id, freezer_action=freezer_action))
@@ -960,17 +1213,23 @@ def _replace_job_actions(job_id: str,
 
 
 def delete_job(user_id, job_id, project_id=None):
+    # The job, its credentials and its JobAction rows are soft-deleted with
+    # one UPDATE each instead of loading and saving every ORM object.
     trust_id = None
     with session_for_write() as session:
         try:
-            job = model_query(session, models.Job, project_id=project_id).\
-                filter_by(id=job_id).first()
-            if job:
-                if job.user_credentials:
-                    trust_id = job.user_credentials.trust_id
-                    job.user_credentials.delete(session)
-                job.job_actions = []
-                job.delete(session)
+            deleted = _soft_delete_query(
+                model_query(session, models.Job, project_id=project_id).
+                filter_by(id=job_id))
+            if deleted:
+                credentials = model_query(
+                    session, models.UserCredentials).filter_by(job_id=job_id)
+                row = credentials.with_entities(
+                    models.UserCredentials.trust_id).first()
+                trust_id = row.trust_id if row else None
+                _soft_delete_query(credentials)
+                _soft_delete_query(model_query(
+                    session, models.JobAction).filter_by(job_id=job_id))
         except db_exc.DBError:
             message = "Database operation failed."
             LOG.exception(message)
@@ -1071,34 +1330,35 @@ def trust_in_use(trust_id):
         return query.count() > 0
 
 
+def _job_to_dict(job):
+    jobmap = {}
+    jobmap['job_id'] = job.get('id')
+    jobmap['project_id'] = job.get('project_id')
+    jobmap['user_id'] = job.get('user_id')
+    jobmap['job_schedule'] = json_utils.json_decode(job.get('schedule'))
+    jobmap['client_id'] = job.get('client_id')
+    jobmap['session_id'] = job.get('session_id')
+    jobmap['session_tag'] = job.get('session_tag')
+    jobmap['description'] = job.get('description')
+    jobmap['job_actions'] = _job_actions_from_rows(
+        job.job_actions, project_id=job.get('project_id'))
+    user_credentials = job.get('user_credentials', None)
+    if user_credentials:
+        jobmap['user_credentials'] = {
+            'trust_id': user_credentials.get('trust_id'),
+            'trustor_user_id': user_credentials.get('trustor_user_id'),
+        }
+    return jobmap
+
+
 def search_job(project_id=None, all_projects=False, offset=0,
                limit=100, search=None):
-    jobs = []
     result, search_key = search_tuple(tablename=models.Job,
                                       project_id=project_id,
                                       all_projects=all_projects,
                                       offset=offset, limit=limit,
                                       search=search)
-    for job in result:
-        jobmap = {}
-        jobmap['job_id'] = job.get('id')
-        jobmap['project_id'] = job.get('project_id')
-        jobmap['user_id'] = job.get('user_id')
-        jobmap['job_schedule'] = json_utils.json_decode(job.get('schedule'))
-        jobmap['client_id'] = job.get('client_id')
-        jobmap['session_id'] = job.get('session_id')
-        jobmap['session_tag'] = job.get('session_tag')
-        jobmap['description'] = job.get('description')
-        jobmap['job_actions'] = _job_actions_from_rows(
-            job.job_actions, project_id=job.get('project_id'))
-        user_credentials = job.get('user_credentials', None)
-        if user_credentials:
-            jobmap['user_credentials'] = {
-                'trust_id': user_credentials.get('trust_id'),
-                'trustor_user_id': user_credentials.get('trustor_user_id'),
-            }
-
-        jobs.append(jobmap)
+    jobs = [_job_to_dict(job) for job in result]
     # If search opt is wrong, filter will not work,
     # return all tuples.
     jobs = filter_tuple_by_search_opt(jobs, offset=offset, limit=limit,
@@ -1106,6 +1366,14 @@ def search_job(project_id=None, all_projects=False, offset=0,
     return jobs
 
 
+def iter_job(project_id=None, all_projects=False, offset=0,
+             limit=100, search=None):
+    """Generator of the jobs of search_job, for streamed listings"""
+    return iter_tuple(models.Job, _job_to_dict, project_id=project_id,
+                      all_projects=all_projects, offset=offset, limit=limit,
+                      search=search)
+
+
 def update_job(user_id: str, job_id: str, patch_doc: dict,
                project_id: str | None = None) -> int:
 
@@ -1277,22 +1545,23 @@ def update_backup(user_id, backup_id, patch_doc, project_id=None):
     return backup_id
 
 
+def _backup_to_dict(backup, project_id):
+    backupmap = {}
+    backupmap['project_id'] = project_id
+    backupmap['user_id'] = backup.user_id
+    backupmap['backup_id'] = backup.id
+    backupmap['status'] = backup.status
+    backupmap['backup_metadata'] = json_utils.\
+        json_decode(backup.get('backup_metadata'))
+    return backupmap
+
+
 def search_backup(project_id=None, offset=0,
                   limit=100, search=None):
-    backups = []
-
     result, search_key = search_tuple(tablename=models.Backup,
                                       project_id=project_id, offset=offset,
                                       limit=limit, search=search)
-    for backup in result:
-        backupmap = {}
-        backupmap['project_id'] = project_id
-        backupmap['user_id'] = backup.user_id
-        backupmap['backup_id'] = backup.id
-        backupmap['status'] = backup.status
-        backupmap['backup_metadata'] = json_utils.\
-            json_decode(backup.get('backup_metadata'))
-        backups.append(backupmap)
+    backups = [_backup_to_dict(backup, project_id) for backup in result]
     # If search opt is wrong, filter will not work,
     # return all tuples.
     backups = filter_tuple_by_search_opt(backups, offset=offset, limit=limit,
@@ -1300,6 +1569,14 @@ def search_backup(project_id=None, offset=0,
     return backups
 
 
+def iter_backup(project_id=None, offset=0, limit=100, search=None):
+    """Generator of the backups of search_backup, for streamed listings"""
+    return iter_tuple(models.Backup,
+                      lambda backup: _backup_to_dict(backup, project_id),
+                      project_id=project_id, offset=offset, limit=limit,
+                      search=search)
+
+
 def get_session(session_id, project_id=None):
     jobt = {}
     values = {}
@@ -1442,37 +1719,199 @@ def replace_session(user_id, session_id, doc, project_id=None):
     return session_id
 
 
+def _session_to_dict(sessiont, project_id):
+    sessionmap = {}
+    sessionmap['project_id'] = project_id
+    sessionmap['user_id'] = sessiont.get('user_id')
+    sessionmap['session_id'] = sessiont.get('id')
+    sessionmap['description'] = sessiont.get('description')
+    sessionmap['session_tag'] = sessiont.get('session_tag')
+    sessionmap['result'] = sessiont.get('result')
+    sessionmap['hold_off'] = sessiont.get('hold_off')
+    sessionmap['status'] = sessiont.get('status')
+    sessionmap['time_ended'] = sessiont.get('time_ended')
+    sessionmap['time_end'] = sessiont.get('time_end')
+    sessionmap['time_started'] = sessiont.get('time_started')
+    sessionmap['time_start'] = sessiont.get('time_start')
+    sessionmap['schedule'] = json_utils.\
+        json_decode(sessiont.get('schedule'))
+    jobt = sessiont.get('job')
+    if jobt is not None:
+        sessionmap['jobs'] = json_utils.json_decode(sessiont.get('job'))
+    return sessionmap
+
+
 def search_session(project_id=None, offset=0,
                    limit=100, search=None):
-    sessions = []
-    jobt = {}
 
     result, search_key = search_tuple(tablename=models.Session,
                                       project_id=project_id, offset=offset,
                                       limit=limit, search=search)
-    for sessiont in result:
-        sessionmap = {}
-        sessionmap['project_id'] = project_id
-        sessionmap['user_id'] = sessiont.get('user_id')
-        sessionmap['session_id'] = sessiont.get('id')
-        sessionmap['description'] = sessiont.get('description')
-        sessionmap['session_tag'] = sessiont.get('session_tag')
-        sessionmap['result'] = sessiont.get('result')
-        sessionmap['hold_off'] = sessiont.get('hold_off')
-        sessionmap['status'] = sessiont.get('status')
-        sessionmap['time_ended'] = sessiont.get('time_ended')
-        sessionmap['time_end'] = sessiont.get('time_end')
-        sessionmap['time_started'] = sessiont.get('time_started')
-        sessionmap['time_start'] = sessiont.get('time_start')
-        sessionmap['schedule'] = json_utils.\
-            json_decode(sessiont.get('schedule'))
-        jobt = sessiont.get('job')
-        if jobt is not None:
-            sessionmap['jobs'] = json_utils.json_decode(sessiont.get('job'))
-        sessions.append(sessionmap)
+    sessions = [_session_to_dict(sessiont, project_id) for sessiont in result]
     # If search opt is wrong, filter will not work,
     # return all tuples.
     sessions = filter_tuple_by_search_opt(sessions, offset=offset,
                                           limit=limit, search=search_key)
 
     return sessions
+
+
+def iter_session(project_id=None, offset=0, limit=100, search=None):
+    """Generator of the sessions of search_session, for streamed listings"""
+    return iter_tuple(models.Session,
+                      lambda sessiont: _session_to_dict(sessiont, project_id),
+                      project_id=project_id, offset=offset, limit=limit,
+                      search=search)
+
+
+def _project_purge_plan(project_id):
+    """Return the ``(model, criterion)`` pairs selecting a project's rows.
+
+    Children come before the rows they reference, so a hard delete never
+    leaves a dangling foreign key. The job and action subqueries also match
+    soft-deleted parents, so an interrupted purge can be resumed.
+    """
+    project_jobs = select(models.Job.id).where(
+        models.Job.project_id == project_id)
+    project_actions = select(models.Action.id).where(
+        models.Action.project_id == project_id)
+    return [
+        (models.JobAction, or_(models.JobAction.job_id.in_(project_jobs),
+                               models.JobAction.action_id.in_(
+                                   project_actions))),
+        (models.UserCredentials,
+         models.UserCredentials.job_id.in_(project_jobs)),
+        (models.Job, models.Job.project_id == project_id),
+        (models.ActionReport, models.ActionReport.project_id == project_id),
+        (models.Action, models.Action.project_id == project_id),
+        (models.Session, models.Session.project_id == project_id),
+        (models.Backup, models.Backup.project_id == project_id),
+        (models.Client, models.Client.project_id == project_id),
+    ]
+
+
+@db_api.wrap_db_retry(max_retries=50, retry_interval=0.5,
+                      inc_retry_interval=False, retry_on_deadlock=True)
+def _purge_batch(model, criterion, hard_delete, batch_size):
+    """Delete one batch of rows in its own transaction.
+
+    :returns: the number of rows deleted, 0 once nothing is left
+    """
+    read_deleted = 'yes' if hard_delete else 'no'
+    with session_for_write() as session:
+        try:
+            ids = [row.id for row in model_query(
+                session, model, args=(model.id,),
+                read_deleted=read_deleted).filter(criterion).limit(batch_size)]
+            if not ids:
+                return 0
+            query = model_query(session, model, read_deleted=read_deleted)
+            query = query.filter(model.id.in_(ids))
+            if hard_delete:
+                query.delete(synchronize_session=False)
+            else:
+                _soft_delete_query(query)
+        except db_exc.DBError:
+            message = "Database operation failed."
+            LOG.exception(message)
+            raise freezer_api_exc.StorageEngineError(message=message)
+        except Exception:
+            message = "An unexpected error occurred."
+            LOG.exception(message)
+            raise freezer_api_exc.StorageEngineError(message=message)
+    return len(ids)
+
+
+def purge_project(project_id, hard_delete=False, batch_size=1000,
+                  progress=None):
+    """Delete every client, job, action, session and backup of a project.
+
+    Rows are deleted in batches of ``batch_size``, each batch committed in
+    its own transaction, so no long lock is held and an interrupted purge
+    is resumed by running it again. Soft-deleted rows are kept unless
+    ``hard_delete`` is set, in which case they are removed as well.
+
+    :param progress: optional callable, called after every batch with the
+                     table name and the number of rows purged so far in it
+    :returns: ``{table name: number of rows purged}``
+    """
+    if not project_id:
+        raise freezer_api_exc.BadDataFormat(
+            message='A project id is required to purge a project')
+    if batch_size < 1:
+        raise freezer_api_exc.BadDataFormat(
+            message='Batch size must be a positive integer')
+
+    purged = {}
+    for model, criterion in _project_purge_plan(project_id):
+        count = 0
+        while True:
+            deleted = _purge_batch(model, criterion, hard_delete, batch_size)
+            if not deleted:
+                break
+            count += deleted
+            if progress:
+                progress(model.__tablename__, count)
+        purged[model.__tablename__] = count
+        LOG.info('Project purge, project_id: {0}: {1} tuple(s) purged in '
+                 'Table {2}'.format(project_id, count, model.__tablename__))
+    return purged
+
+
+def _archive_deleted_plan(before):
+    """Return the ``(model, criterion)`` pairs selecting archivable rows.
+
+    A row is archivable once it has been soft-deleted before ``before``.
+    Children come first, and jobs and actions still referenced by a row
+    that is kept are skipped, so no foreign key is left dangling.
+    """
+    def expired(model):
+        return and_(model.deleted.is_(True), model.deleted_at < before)
+
+    return [
+        (models.JobAction, expired(models.JobAction)),
+        (models.UserCredentials, expired(models.UserCredentials)),
+        (models.ActionReport, expired(models.ActionReport)),
+        (models.Backup, expired(models.Backup)),
+        (models.Session, expired(models.Session)),
+        (models.Client, expired(models.Client)),
+        (models.Job, and_(
+            expired(models.Job),
+            ~exists().where(models.JobAction.job_id == models.Job.id),
+            ~exists().where(models.UserCredentials.job_id == models.Job.id))),
+        (models.Action, and_(
+            expired(models.Action),
+            ~exists().where(models.JobAction.action_id == models.Action.id))),
+    ]
+
+
+def archive_deleted(before, batch_size=1000, progress=None):
+    """Remove rows soft-deleted before ``before`` from the database.
+
+    Rows are removed in batches of ``batch_size``, each batch committed in
+    its own transaction, so the tables are never locked for long and an
+    interrupted run is resumed by running it again.
+
+    :param before: naive UTC datetime, rows deleted at or after it are kept
+    :param progress: optional callable, called after every batch with the
+                     table name and the number of rows removed so far in it
+    :returns: ``{table name: number of rows removed}``
+    """
+    if batch_size < 1:
+        raise freezer_api_exc.BadDataFormat(
+            message='Batch size must be a positive integer')
+
+    archived = {}
+    for model, criterion in _archive_deleted_plan(before):
+        count = 0
+        while True:
+            deleted = _purge_batch(model, criterion, True, batch_size)
+            if not deleted:
+                break
+            count += deleted
+            if progress:
+                progress(model.__tablename__, count)
+        archived[model.__tablename__] = count
+        LOG.info('{0} tuple(s) deleted before {1} removed from '
+                 'Table {2}'.format(count, before, model.__tablename__))
+    return archived
@@ -25,7 +25,11 @@ from oslo_log import log
 
 from freezer_api.db import base as db_base
 from freezer_api.db.sqlalchemy import api as db_session
+from freezer_api.db.sqlalchemy import es_migration
+from freezer_api.db.sqlalchemy import fixture_generator
 from freezer_api.db.sqlalchemy import models
+from freezer_api.db.sqlalchemy import partitioning
+from freezer_api.db.sqlalchemy import slow_queries
 
 
 CONF = cfg.CONF
@@ -93,6 +97,9 @@ class SQLDriver(db_base.DBDriver):
         self.get_engine()
         return self.IMPL
 
+    def warm_up(self):
+        db_session.warm_up()
+
     def db_sync(self, version=None, engine=None):
         """Migrate the database to `version` or the most recent version."""
         # If the user requested a specific version, check if it's an integer:
@@ -135,5 +142,26 @@ class SQLDriver(db_base.DBDriver):
             self._engine = self.get_engine()
         models.unregister_models(self._engine)
 
+    def partition_backups(self, months_ahead=3):
+        return partitioning.partition_backups(self.get_engine(),
+                                              months_ahead=months_ahead)
+
+    def drop_backup_partitions(self, before):
+        return partitioning.drop_partitions(self.get_engine(), before)
+
+    def slow_query_report(self, limit=10):
+        return slow_queries.report(self.get_engine(), limit=limit)
+
+    def generate_fixture(self, progress=None, **sizes):
+        self.get_engine()
+        return fixture_generator.generate(progress=progress, **sizes)
+
+    def migrate_from_elasticsearch(self, es_api, batch_size=1000,
+                                   checkpoint_path=None, progress=None):
+        self.get_engine()
+        return es_migration.migrate(es_api, batch_size=batch_size,
+                                    checkpoint_path=checkpoint_path,
+                                    progress=progress)
+
     def name(self):
         return "sqlalchemy"
@@ -0,0 +1,338 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Streaming migration of an Elasticsearch catalog to the SQL tables.
+
+The documents of each type are read page by page with search_after
+cursors, checked with the same ``*Doc`` validators as the API, turned into
+rows the way the ``add_*`` functions of the API do and written with
+multi-row inserts, one transaction per page.
+
+After each page the cursor is saved in the checkpoint file, so an
+interrupted migration resumes after the last page written. Documents whose
+row already exists are skipped, which makes replaying a page harmless.
+"""
+
+import copy
+import functools
+import os
+import time
+import uuid
+
+from oslo_db import exception as db_exc
+from oslo_log import log
+from oslo_serialization import jsonutils as json
+
+from freezer_api.api.common import utils as json_utils
+from freezer_api.common import elasticv2_utils as utilsv2
+from freezer_api.common import exceptions as freezer_api_exc
+from freezer_api.common.json_schemas import SUPPORTED_ACTIONS
+from freezer_api.common.json_schemas import SUPPORTED_ENGINES
+from freezer_api.common.json_schemas import SUPPORTED_MODES
+from freezer_api.common.json_schemas import SUPPORTED_STORAGES
+from freezer_api.db.sqlalchemy import api
+from freezer_api.db.sqlalchemy import models
+
+
+LOG = log.getLogger(__name__)
+
+# clients and sessions first, they are referenced by jobs
+DOC_TYPES = ('clients', 'sessions', 'actions', 'jobs', 'backups')
+
+# rows per INSERT statement, well below the bind parameter limits
+INSERT_CHUNK_SIZE = 100
+
+
+def _client_rows(doc):
+    utilsv2.ClientDoc.validate(doc)
+    client = doc['client']
+    values = {
+        'id': client['uuid'],
+        'uuid': client['uuid'],
+        'project_id': doc.get('project_id'),
+        'user_id': doc['user_id'],
+        'client_id': client['client_id'],
+        'hostname': client.get('hostname'),
+        'description': client.get('description'),
+        'supported_actions': json_utils.json_encode(
+            client.get('supported_actions', SUPPORTED_ACTIONS)),
+        'supported_modes': json_utils.json_encode(
+            client.get('supported_modes', SUPPORTED_MODES)),
+        'supported_storages': json_utils.json_encode(
+            client.get('supported_storages', SUPPORTED_STORAGES)),
+        'supported_engines': json_utils.json_encode(
+            client.get('supported_engines', SUPPORTED_ENGINES)),
+        'is_central': client.get('is_central', False),
+    }
+    return {models.Client: [values]}
+
+
+def _action_rows(doc):
+    utilsv2.ActionDoc.validate(doc)
+    freezer_action = doc.get('freezer_action', {})
+    values = {
+        'id': doc['action_id'],
+        'project_id': doc.get('project_id'),
+        'user_id': doc['user_id'],
+        'max_retries': doc.get('max_retries', 5),
+        'max_retries_interval': doc.get('max_retries_interval', 6),
+        'actionmode': freezer_action.get('mode'),
+        'backup_metadata': json_utils.json_encode(freezer_action),
+    }
+    for key in models.ACTION_KEYS:
+        if key in freezer_action:
+            values[key] = freezer_action[key]
+    values['freezer_action_hash'] = api.freezer_action_hash(
+        models.Action(**values))
+    report = {
+        'id': doc['action_id'],
+        'project_id': doc.get('project_id'),
+        'user_id': doc['user_id'],
+        'result': freezer_action.get('result'),
+        'time_elapsed': freezer_action.get('time_elapsed'),
+        'report_date': freezer_action.get('report_date'),
+    }
+    return {models.Action: [values], models.ActionReport: [report]}
+
+
+def _job_rows(doc, known_actions):
+    """Rows of a job, with the actions of its job_actions not stored yet"""
+    utilsv2.JobDoc.validate(doc)
+    job_id = doc['job_id']
+    rows = {models.Job: [{
+        'id': job_id,
+        'project_id': doc.get('project_id'),
+        'user_id': doc['user_id'],
+        'schedule': json_utils.json_encode(doc.get('job_schedule', '')),
+        'client_id': doc.get('client_id', ''),
+        'session_id': doc.get('session_id', ''),
+        'session_tag': doc.get('session_tag', 0),
+        'description': doc.get('description', ''),
+    }], models.Action: [], models.ActionReport: [], models.JobAction: []}
+    for position, job_action in enumerate(doc.get('job_actions') or []):
+        action_id = job_action.get('action_id')
+        if action_id not in known_actions:
+            action_doc = utilsv2.ActionDoc.create(
+                copy.deepcopy(job_action), doc['user_id'],
+                doc.get('project_id'))
+            action_id = action_doc['action_id']
+            for model, model_rows in _action_rows(action_doc).items():
+                rows[model].extend(model_rows)
+            known_actions.add(action_id)
+        rows[models.JobAction].append({'id': uuid.uuid4().hex,
+                                       'job_id': job_id,
+                                       'action_id': action_id,
+                                       'position': position})
+    if 'user_credentials' in doc:
+        rows[models.UserCredentials] = [{
+            'id': uuid.uuid4().hex,
+            'trust_id': doc['user_credentials']['trust_id'],
+            'trustor_user_id': doc['user_credentials']['trustor_user_id'],
+            'job_id': job_id}]
+    return rows
+
+
+def _session_rows(doc):
+    utilsv2.SessionDoc.validate(doc)
+    values = {
+        'id': doc['session_id'],
+        'project_id': doc.get('project_id'),
+        'user_id': doc['user_id'],
+        'description': doc.get('description'),
+        'hold_off': doc.get('hold_off', 30),
+        'session_tag': doc.get('session_tag', 0),
+        'status': doc.get('status'),
+        'time_ended': doc.get('time_ended', -1),
+        'time_started': doc.get('time_started', -1),
+        'time_end': doc.get('time_end', -1),
+        'time_start': doc.get('time_start', -1),
+        'result': doc.get('result'),
+        'schedule': json_utils.json_encode(doc.get('schedule')),
+    }
+    if doc.get('jobs'):
+        values['job'] = json_utils.json_encode(doc['jobs'])
+    return {models.Session: [values]}
+
+
+def _backup_rows(doc):
+    backup_metadata = doc.get('backup_metadata') or {}
+    try:
+        utilsv2.BackupMetadataDoc.backup_doc_validator.validate(
+            backup_metadata)
+    except Exception as e:
+        raise freezer_api_exc.BadDataFormat(str(e).splitlines()[0])
+    values = {
+        'id': doc['backup_id'],
+        'project_id': doc.get('project_id'),
+        'user_id': doc['user_id'],
+        'job_id': backup_metadata.get('job_id'),
+        'status': doc.get('status', 'available'),
+        'backup_metadata': json_utils.json_encode(backup_metadata),
+    }
+    return {models.Backup: [values]}
+
+
+_TYPES = {
+    # doc_type: (model, id field, row builder)
+    'clients': (models.Client,
+                lambda doc: (doc.get('client') or {}).get('uuid'),
+                _client_rows),
+    'sessions': (models.Session, lambda doc: doc.get('session_id'),
+                 _session_rows),
+    'actions': (models.Action, lambda doc: doc.get('action_id'),
+                _action_rows),
+    'jobs': (models.Job, lambda doc: doc.get('job_id'), _job_rows),
+    'backups': (models.Backup, lambda doc: doc.get('backup_id'),
+                _backup_rows),
+}
+
+
+def _existing_ids(session, model, ids):
+    if not ids:
+        return set()
+    query = api.model_query(session, model, args=(model.id,),
+                            read_deleted='yes').filter(model.id.in_(ids))
+    return {row.id for row in query}
+
+
+def _insert(session, model, rows):
+    rows = models.fill_defaults(model, rows)
+    for start in range(0, len(rows), INSERT_CHUNK_SIZE):
+        session.execute(model.__table__.insert().values(
+            rows[start:start + INSERT_CHUNK_SIZE]))
+
+
+def migrate_page(doc_type, docs):
+    """Write one page of documents in a single transaction.
+
+    :returns: (migrated, skipped, invalid) document counts
+    """
+    model, get_id, build_rows = _TYPES[doc_type]
+    migrated = skipped = invalid = 0
+    rows = {}
+    with api.session_for_write() as session:
+        try:
+            docs_with_id = [doc for doc in docs if get_id(doc)]
+            invalid += len(docs) - len(docs_with_id)
+            docs = docs_with_id
+            existing = _existing_ids(session, model,
+                                     [get_id(doc) for doc in docs])
+            if doc_type == 'jobs':
+                action_ids = [job_action.get('action_id')
+                              for doc in docs
+                              for job_action in doc.get('job_actions') or []
+                              if job_action.get('action_id')]
+                known_actions = _existing_ids(session, models.Action,
+                                              action_ids)
+                build_rows = functools.partial(_job_rows,
+                                               known_actions=known_actions)
+            for doc in docs:
+                if get_id(doc) in existing:
+                    skipped += 1
+                    continue
+                doc = copy.deepcopy(doc)
+                doc.pop('_version', None)
+                try:
+                    doc_rows = build_rows(doc)
+                except (freezer_api_exc.BadDataFormat, KeyError) as e:
+                    LOG.warning('Skipping invalid {0} document {1}: '
+                                '{2}'.format(doc_type, get_id(doc), e))
+                    invalid += 1
+                    continue
+                existing.add(get_id(doc))
+                for table_model, table_rows in doc_rows.items():
+                    rows.setdefault(table_model, []).extend(table_rows)
+                migrated += 1
+            # parents before the rows referencing them
+            for table_model in (models.Client, models.Session, models.Action,
+                                models.ActionReport, models.Job,
+                                models.JobAction, models.UserCredentials,
+                                models.Backup):
+                if rows.get(table_model):
+                    _insert(session, table_model, rows[table_model])
+        except db_exc.DBError:
+            message = "Database operation failed."
+            LOG.exception(message)
+            raise freezer_api_exc.StorageEngineError(message=message)
+    return migrated, skipped, invalid
+
+
+def load_checkpoint(path):
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path) as checkpoint_file:
+        return json.loads(checkpoint_file.read())
+
+
+def save_checkpoint(path, checkpoint):
+    """Replace the checkpoint file atomically"""
+    if not path:
+        return
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as checkpoint_file:
+        checkpoint_file.write(json.dumps(checkpoint))
+    os.replace(tmp_path, path)
+
+
+def migrate(es_api, doc_types=DOC_TYPES, batch_size=1000,
+            checkpoint_path=None, progress=None):
+    """Copy every document of the Elasticsearch catalog to the SQL tables.
+
+    :param es_api: the Elasticsearch storage engine, anything providing
+                   scan_pages(doc_type, all_projects, page_size,
+                   search_after)
+    :param batch_size: documents read and written per page
+    :param checkpoint_path: file recording the progress, resumed if present
+    :param progress: optional callable(doc_type, report) called per page
+    :returns: {doc_type: report}, the report holding the migrated, skipped
+              and invalid counts, the elapsed seconds and the throughput
+    """
+    checkpoint = load_checkpoint(checkpoint_path)
+    reports = {}
+    for doc_type in doc_types:
+        state = checkpoint.setdefault(doc_type, {
+            'search_after': None, 'migrated': 0, 'skipped': 0,
+            'invalid': 0, 'done': False})
+        report = {'migrated': 0, 'skipped': 0, 'invalid': 0}
+        reports[doc_type] = report
+        started = time.monotonic()
+        if not state['done']:
+            pages = es_api.scan_pages(doc_type, all_projects=True,
+                                      page_size=batch_size,
+                                      search_after=state['search_after'])
+            for docs, cursor in pages:
+                counts = migrate_page(doc_type, docs)
+                for key, count in zip(('migrated', 'skipped', 'invalid'),
+                                      counts):
+                    report[key] += count
+                    state[key] += count
+                state['search_after'] = cursor
+                save_checkpoint(checkpoint_path, checkpoint)
+                if progress:
+                    progress(doc_type, _throughput(report, started))
+            state['done'] = True
+            save_checkpoint(checkpoint_path, checkpoint)
+        _throughput(report, started)
+        report['total_migrated'] = state['migrated']
+        LOG.info('{0}: {1} document(s) migrated, {2} skipped, {3} invalid '
+                 'in {4}s'.format(doc_type, report['migrated'],
+                                  report['skipped'], report['invalid'],
+                                  report['seconds']))
+    return reports
+
+
+def _throughput(report, started):
+    seconds = max(time.monotonic() - started, 0.001)
+    report['seconds'] = round(seconds, 3)
+    report['docs_per_second'] = round(
+        (report['migrated'] + report['skipped']) / seconds, 1)
+    return report
@@ -0,0 +1,347 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Synthetic catalog for capacity testing.
+
+``generate`` writes projects of clients, jobs with their actions, sessions
+and backups straight into the SQL tables, with bulk inserts, one
+transaction per batch. The rows are those the ``add_*`` functions of the
+API would store, so the API serves them as any other.
+
+The clients are spread over the projects, the jobs over the clients and
+the backups over the jobs with weights ``1 / rank ** skew``: a skew of 0
+spreads them evenly, a skew of 1 gives the first project twice the
+clients of the second one and three times those of the third one, as the
+few large tenants of a real cloud. The same seed generates the same
+catalog.
+"""
+
+import collections
+import datetime
+import random
+import time
+import uuid
+
+from oslo_log import log
+from oslo_utils import timeutils
+
+from freezer_api.api.common import utils as json_utils
+from freezer_api.db.sqlalchemy import api
+from freezer_api.db.sqlalchemy import models
+
+LOG = log.getLogger(__name__)
+
+USERS_PER_PROJECT = 3
+
+# parents before the rows referencing them
+_TABLES = (models.Client, models.Session, models.Action,
+           models.ActionReport, models.Job, models.JobAction,
+           models.Backup)
+
+
+def spread(total, buckets, skew=0.0):
+    """Split total in buckets counts weighted by 1 / rank ** skew"""
+    if not buckets:
+        return []
+    weights = [1.0 / rank ** skew for rank in range(1, buckets + 1)]
+    shares = [total * weight / sum(weights) for weight in weights]
+    counts = [int(share) for share in shares]
+    # the largest remainders get the rest
+    by_remainder = sorted(range(buckets),
+                          key=lambda i: counts[i] - shares[i])
+    for i in by_remainder[:total - sum(counts)]:
+        counts[i] += 1
+    return counts
+
+
+class _Writer(object):
+    """Rows buffered per table and inserted batch_size at a time"""
+
+    def __init__(self, batch_size, progress=None):
+        self.batch_size = batch_size
+        self.progress = progress
+        self.started = time.monotonic()
+        self.counts = collections.Counter()
+        self._rows = collections.defaultdict(list)
+        self._buffered = 0
+
+    def add(self, model, row):
+        self._rows[model].append(row)
+        self._buffered += 1
+        if self._buffered >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self._buffered:
+            return
+        with api.session_for_write() as session:
+            for model in _TABLES:
+                if self._rows.get(model):
+                    # executemany of a statement compiled once, unlike the
+                    # multi-row VALUES compiled for each chunk
+                    session.execute(model.__table__.insert(),
+                                    models.fill_defaults(model,
+                                                         self._rows[model]))
+        for model, rows in self._rows.items():
+            self.counts[model.__tablename__] += len(rows)
+        self._rows.clear()
+        self._buffered = 0
+        if self.progress:
+            self.progress(self.report())
+
+    def report(self):
+        seconds = max(time.monotonic() - self.started, 0.001)
+        report = dict(self.counts)
+        report['seconds'] = round(seconds, 3)
+        report['rows_per_second'] = round(
+            sum(self.counts.values()) / seconds, 1)
+        return report
+
+
+class _Catalog(object):
+    """Row builders of the synthetic catalog"""
+
+    def __init__(self, seed, days, metadata_size):
+        self.random = random.Random(seed)
+        self.now = timeutils.utcnow().replace(microsecond=0)
+        self.days = days
+        self.metadata_size = metadata_size
+        self._padding = None
+
+    def uuid(self):
+        return uuid.UUID(int=self.random.getrandbits(128), version=4).hex
+
+    def created_at(self):
+        """Creation date within the last days"""
+        return self.now - datetime.timedelta(
+            seconds=self.random.randint(0, self.days * 86400))
+
+    def client(self, project_id, user_id, number):
+        client_uuid = self.uuid()
+        hostname = 'host-{0}-{1}'.format(project_id[:8], number)
+        return {
+            'id': client_uuid,
+            'uuid': client_uuid,
+            'project_id': project_id,
+            'user_id': user_id,
+            'client_id': '{0}_{1}'.format(project_id, hostname),
+            'hostname': hostname,
+            'description': 'synthetic client {0}'.format(number),
+            'supported_actions': json_utils.json_encode(
+                ['backup', 'restore', 'info', 'admin']),
+            'supported_modes': json_utils.json_encode(
+                ['fs', 'mysql', 'mongo', 'cinder', 'nova']),
+            'supported_storages': json_utils.json_encode(
+                ['swift', 'local', 's3']),
+            'supported_engines': json_utils.json_encode(
+                ['tar', 'rsync']),
+            'is_central': False,
+            'created_at': self.created_at(),
+        }
+
+    def action(self, client, number):
+        freezer_action = {
+            'action': 'backup',
+            'mode': self.random.choice(('fs', 'fs', 'fs', 'mysql')),
+            'path_to_backup': '/var/lib/data/{0}'.format(number),
+            'backup_name': '{0}-backup-{1}'.format(client['hostname'],
+                                                   number),
+            'container': 'freezer-{0}'.format(client['project_id'][:8]),
+            'storage': 'swift',
+            'engine_name': 'tar',
+            'max_level': 7,
+            'remove_older_than': 30,
+            'hostname': client['hostname'],
+        }
+        values = {
+            'id': self.uuid(),
+            'project_id': client['project_id'],
+            'user_id': client['user_id'],
+            'max_retries': 5,
+            'max_retries_interval': 6,
+            'mandatory': False,
+            'actionmode': freezer_action['mode'],
+            'backup_metadata': json_utils.json_encode(freezer_action),
+            'created_at': client['created_at'],
+        }
+        for key in models.ACTION_KEYS:
+            if key in freezer_action:
+                values[key] = freezer_action[key]
+        values['freezer_action_hash'] = api.freezer_action_hash(
+            models.Action(**values))
+        report = {'id': values['id'],
+                  'project_id': values['project_id'],
+                  'user_id': values['user_id'],
+                  'created_at': values['created_at']}
+        return values, report
+
+    def session(self, project_id, user_id):
+        return {
+            'id': self.uuid(),
+            'project_id': project_id,
+            'user_id': user_id,
+            'description': 'synthetic session',
+            'hold_off': 30,
+            'session_tag': self.random.randint(0, 100),
+            'status': 'active',
+            'time_start': -1,
+            'time_end': -1,
+            'time_started': -1,
+            'time_ended': -1,
+            'schedule': json_utils.json_encode(
+                {'status': 'scheduled', 'schedule_interval': '1 days'}),
+            'created_at': self.created_at(),
+        }
+
+    def job(self, client, session_id):
+        created_at = client['created_at']
+        return {
+            'id': self.uuid(),
+            'project_id': client['project_id'],
+            'user_id': client['user_id'],
+            'client_id': client['client_id'],
+            'session_id': session_id,
+            'session_tag': 0,
+            'description': 'synthetic job of {0}'.format(client['hostname']),
+            'schedule': json_utils.json_encode({
+                'status': self.random.choice(
+                    ('scheduled', 'scheduled', 'running', 'completed')),
+                'result': self.random.choice(('success', 'success', 'fail')),
+                'schedule_interval': self.random.choice(
+                    ('1 days', '12 hours', '7 days')),
+                'schedule_start_date': created_at.isoformat(),
+                'time_created': int(created_at.timestamp()),
+            }),
+            'created_at': created_at,
+        }
+
+    def padding(self):
+        """Excluded files making the metadata of a backup metadata_size long"""
+        if self._padding is None:
+            entry = '/var/lib/data/cache/excluded-{0:06d}.tmp'
+            count = max(0, self.metadata_size - 600) // (len(entry) + 2)
+            self._padding = [entry.format(i) for i in range(count)]
+        return self._padding
+
+    def backup(self, job, client, level, age):
+        created_at = self.now - datetime.timedelta(seconds=age)
+        time_stamp = int(created_at.timestamp())
+        metadata = {
+            'job_id': job['id'],
+            'container': 'freezer-{0}'.format(client['project_id'][:8]),
+            'hostname': client['hostname'],
+            'backup_name': '{0}-backup'.format(client['hostname']),
+            'time_stamp': time_stamp,
+            'curr_backup_level': level,
+            'backup_session': time_stamp - level * 86400,
+            'max_level': 7,
+            'mode': 'fs',
+            'fs_real_path': '/var/lib/data',
+            'vol_snap_path': '/var/lib/data',
+            'total_broken_links': 0,
+            'total_fs_files': self.random.randint(10, 1000000),
+            'total_directories': self.random.randint(1, 10000),
+            'backup_size_uncompressed': self.random.randint(2 ** 20, 2 ** 40),
+            'backup_size_compressed': self.random.randint(2 ** 19, 2 ** 39),
+            'total_backup_session_size': self.random.randint(2 ** 20,
+                                                             2 ** 40),
+            'compression_alg': 'gzip',
+            'encrypted': False,
+            'client_os': 'linux',
+            'client_version': '15.0.0',
+            'storage': 'swift',
+            'engine_name': 'tar',
+            'excluded_files': self.padding(),
+            'cli': 'freezer-agent --action backup --mode fs',
+        }
+        return {
+            'id': self.uuid(),
+            'project_id': client['project_id'],
+            'user_id': client['user_id'],
+            'job_id': job['id'],
+            'status': 'available' if self.random.random() < 0.95 else 'error',
+            'backup_metadata': json_utils.json_encode(metadata),
+            'created_at': created_at,
+        }
+
+
+def generate(projects=10, clients=1000, jobs=5000, backups=100000,
+             sessions=1000, actions_per_job=2, skew=0.0, seed=0, days=365,
+             metadata_size=2048, batch_size=1000, progress=None):
+    """Write a synthetic catalog.
+
+    :param projects: number of projects, each with a few users
+    :param clients: clients spread over the projects
+    :param jobs: jobs spread over the clients, each with actions_per_job
+                 actions of its own
+    :param backups: backups spread over the jobs, created up to days ago
+    :param sessions: sessions spread over the projects, the jobs of a
+                     project being spread over its sessions
+    :param skew: exponent of the distributions, 0 for even ones
+    :param seed: seed of the random generator
+    :param metadata_size: approximate size in bytes of the JSON metadata of
+                          each backup
+    :param batch_size: rows inserted per transaction
+    :param progress: optional callable(report) called per batch
+    :returns: the number of rows written per table, the elapsed seconds
+              and the throughput
+    """
+    if jobs and not clients:
+        raise ValueError('Jobs require at least one client')
+    if backups and not jobs:
+        raise ValueError('Backups require at least one job')
+    if clients and not projects:
+        raise ValueError('Clients require at least one project')
+    catalog = _Catalog(seed, days, metadata_size)
+    writer = _Writer(batch_size, progress=progress)
+    jobs_per_client = spread(jobs, clients, skew)
+    backups_per_job = iter(spread(backups, jobs, skew))
+    sessions_per_project = spread(sessions, projects, skew)
+    client_numbers = iter(range(clients))
+    for clients_count, sessions_count in zip(
+            spread(clients, projects, skew), sessions_per_project):
+        project_id = catalog.uuid()
+        users = [catalog.uuid() for _ in range(USERS_PER_PROJECT)]
+        session_ids = []
+        for _ in range(sessions_count):
+            session = catalog.session(project_id,
+                                      catalog.random.choice(users))
+            writer.add(models.Session, session)
+            session_ids.append(session['id'])
+        for _ in range(clients_count):
+            number = next(client_numbers)
+            client = catalog.client(project_id, catalog.random.choice(users),
+                                    number)
+            writer.add(models.Client, client)
+            for _ in range(jobs_per_client[number]):
+                job = catalog.job(client, catalog.random.choice(session_ids)
+                                  if session_ids else '')
+                writer.add(models.Job, job)
+                for position in range(actions_per_job):
+                    action, report = catalog.action(client, position)
+                    writer.add(models.Action, action)
+                    writer.add(models.ActionReport, report)
+                    writer.add(models.JobAction, {
+                        'id': catalog.uuid(), 'job_id': job['id'],
+                        'action_id': action['id'], 'position': position,
+                        'created_at': job['created_at']})
+                count = next(backups_per_job)
+                for number_in_job in range(count):
+                    # one backup a day, the oldest first
+                    age = (count - number_in_job) % max(days, 1) * 86400
+                    writer.add(models.Backup, catalog.backup(
+                        job, client, number_in_job % 7, age))
+    writer.flush()
+    report = writer.report()
+    LOG.info('Synthetic catalog of {0} row(s) written in {1}s'.format(
+        sum(writer.counts.values()), report['seconds']))
+    return report
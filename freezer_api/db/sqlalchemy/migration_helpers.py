@@ -0,0 +1,167 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Helpers for data migrations over large tables.
+
+Loading a whole table with ``fetchall()`` and writing it back row by row
+inside the migration transaction holds every row in memory and keeps one
+transaction open for the whole run. ``BatchedMigration`` instead reads the
+table in batches ordered by its primary key (keyset pagination, each batch
+starting after the last key of the previous one), lets the migration write
+each batch with ``insert_many``/``update_many`` and commits after every
+batch.
+
+The last key of each committed batch is recorded in the
+``migration_progress`` table, in the same transaction as the batch, so a
+migration interrupted half way resumes after the last batch committed when
+it is run again. The table is dropped once no migration is in progress.
+"""
+
+from alembic import op
+from oslo_log import log
+from oslo_utils import timeutils
+import sqlalchemy as sa
+
+LOG = log.getLogger(__name__)
+
+PROGRESS_TABLE = 'migration_progress'
+
+
+def commit_batch():
+    """Commit the alembic migration transaction and start a new one.
+
+    Meant as the ``commit`` of a ``BatchedMigration`` run from an alembic
+    migration script. The empty autocommit block commits the transaction
+    alembic opened and begins a new one on exit.
+    """
+    context = op.get_context()
+    if context.as_sql:
+        return
+    with context.autocommit_block():
+        pass
+
+
+def insert_many(connection, table, rows):
+    """Insert rows with a single executemany call"""
+    if rows:
+        connection.execute(table.insert(), rows)
+
+
+def update_many(connection, table, rows, key='id'):
+    """Update rows with a single executemany call.
+
+    Each row holds the value of the key column identifying it and the new
+    values of the columns to update.
+    """
+    if not rows:
+        return
+    columns = [name for name in rows[0] if name != key]
+    # bind parameters cannot be named after the columns they set
+    statement = table.update().where(
+        table.c[key] == sa.bindparam('b_' + key)).values(
+        {name: sa.bindparam('b_' + name) for name in columns})
+    connection.execute(statement, [
+        {'b_' + name: value for name, value in row.items()}
+        for row in rows])
+
+
+class BatchedMigration(object):
+    """Run a data migration over a table in keyset-ordered batches.
+
+    :param connection: connection of the migration
+    :param name: unique name of the migration, the key of its progress
+    :param table: table walked by the migration
+    :param columns: columns read, defaults to every column of the table
+    :param key: name of the unique column the batches are ordered by
+    :param batch_size: number of rows per batch
+    :param commit: callable committing the work done so far, e.g.
+                   ``commit_batch`` in an alembic migration. Without it
+                   every batch runs in the caller's transaction.
+    """
+
+    def __init__(self, connection, name, table, columns=None, key='id',
+                 batch_size=1000, commit=None):
+        self.connection = connection
+        self.name = name
+        self.table = table
+        self.key = table.c[key]
+        self.columns = columns or list(table.c)
+        self.batch_size = batch_size
+        self.commit = commit
+        self.progress = sa.Table(
+            PROGRESS_TABLE, sa.MetaData(),
+            sa.Column('name', sa.String(255), primary_key=True),
+            sa.Column('last_key', sa.String(255)),
+            sa.Column('rows', sa.Integer, default=0),
+            sa.Column('updated_at', sa.DateTime))
+
+    def _load_progress(self):
+        if not sa.inspect(self.connection).has_table(PROGRESS_TABLE):
+            self.progress.create(self.connection)
+            return None, 0
+        row = self.connection.execute(
+            sa.select(self.progress.c.last_key, self.progress.c.rows).where(
+                self.progress.c.name == self.name)).first()
+        if row is None:
+            return None, 0
+        LOG.info('Resuming data migration %s after %s (%d rows done)',
+                 self.name, row.last_key, row.rows)
+        return row.last_key, row.rows
+
+    def _save_progress(self, last_key, rows, first):
+        values = {'last_key': last_key, 'rows': rows,
+                  'updated_at': timeutils.utcnow()}
+        if first:
+            self.connection.execute(self.progress.insert().values(
+                name=self.name, **values))
+        else:
+            self.connection.execute(self.progress.update().where(
+                self.progress.c.name == self.name).values(**values))
+
+    def _finish(self):
+        self.connection.execute(self.progress.delete().where(
+            self.progress.c.name == self.name))
+        count = sa.func.count(  # pylint: disable=not-callable
+            self.progress.c.name)
+        if self.connection.execute(sa.select(count)).scalar() == 0:
+            self.progress.drop(self.connection)
+
+    def run(self, migrate_batch):
+        """Call migrate_batch with each batch of rows, oldest key first.
+
+        :param migrate_batch: callable receiving the list of rows of a
+                              batch and writing their migration
+        :returns: the number of rows migrated, including those of an
+                  interrupted run being resumed
+        """
+        last_key, done = self._load_progress()
+        first = last_key is None
+        while True:
+            query = sa.select(*self.columns).order_by(self.key).limit(
+                self.batch_size)
+            if last_key is not None:
+                query = query.where(self.key > last_key)
+            rows = self.connection.execute(query).fetchall()
+            if not rows:
+                break
+            migrate_batch(rows)
+            last_key = getattr(rows[-1], self.key.name)
+            done += len(rows)
+            self._save_progress(last_key, done, first)
+            first = False
+            if self.commit:
+                self.commit()
+            LOG.info('Data migration %s: %d rows done', self.name, done)
+        self._finish()
+        if self.commit:
+            self.commit()
+        return done
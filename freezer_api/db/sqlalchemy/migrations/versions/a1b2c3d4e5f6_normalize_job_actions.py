@@ -33,6 +33,8 @@ from oslo_log import log
 from oslo_serialization import jsonutils as json
 import sqlalchemy as sa
 
+from freezer_api.db.sqlalchemy import migration_helpers
+
 LOG = log.getLogger(__name__)
 
 # revision identifiers, used by Alembic.
@@ -53,23 +55,28 @@ def _loads(value):
 
 
 def upgrade() -> None:
-    op.create_table(
-        'job_actions',
-        sa.Column('id', sa.String(length=36), nullable=False),
-        sa.Column('job_id', sa.String(length=36), nullable=False),
-        sa.Column('action_id', sa.String(length=36), nullable=False),
-        sa.Column('position', sa.Integer(), nullable=True),
-        sa.Column('deleted_at', sa.DateTime(), nullable=True),
-        sa.Column('deleted', sa.Boolean(), nullable=True),
-        sa.Column('created_at', sa.DateTime(), nullable=True),
-        sa.Column('updated_at', sa.DateTime(), nullable=True),
-        sa.PrimaryKeyConstraint('id'),
-        sa.ForeignKeyConstraint(['job_id'], ['jobs.id']),
-        sa.ForeignKeyConstraint(['action_id'], ['actions.id']),
-        mysql_engine='InnoDB',
-    )
-    op.create_index('ix_job_actions_job_id', 'job_actions', ['job_id'])
-    op.create_index('ix_job_actions_action_id', 'job_actions', ['action_id'])
+    # the data migration commits per batch, so a failed run may leave the
+    # job_actions table behind: it is resumed rather than created again
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table('job_actions'):
+        op.create_table(
+            'job_actions',
+            sa.Column('id', sa.String(length=36), nullable=False),
+            sa.Column('job_id', sa.String(length=36), nullable=False),
+            sa.Column('action_id', sa.String(length=36), nullable=False),
+            sa.Column('position', sa.Integer(), nullable=True),
+            sa.Column('deleted_at', sa.DateTime(), nullable=True),
+            sa.Column('deleted', sa.Boolean(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+            sa.ForeignKeyConstraint(['job_id'], ['jobs.id']),
+            sa.ForeignKeyConstraint(['action_id'], ['actions.id']),
+            mysql_engine='InnoDB',
+        )
+        op.create_index('ix_job_actions_job_id', 'job_actions', ['job_id'])
+        op.create_index('ix_job_actions_action_id', 'job_actions',
+                        ['action_id'])
 
     _migrate_data_up()
 
@@ -106,9 +113,11 @@ def _action_values(action_entry, action_id, job_row):
     return values
 
 
-def _migrate_data_up() -> None:
+def _migrate_data_up(batch_size=1000,
+                     commit=migration_helpers.commit_batch) -> None:
     """
-    Migrate job actions from the old JSON blob column to the new table.
+    Migrate job actions from the old JSON blob column to the new table,
+    in batches of jobs committed one at a time.
     WARNING: If job actions are invalid, the migration is irreversible
     and the down migration will not restore invalid data.
     """
@@ -118,49 +127,67 @@ def _migrate_data_up() -> None:
     actions = sa.Table('actions', meta, autoload_with=conn)
     job_actions = sa.Table('job_actions', meta, autoload_with=conn)
 
-    known_actions = {
-        row.id for row in conn.execute(sa.select(actions.c.id)).fetchall()
-    }
-
-    job_rows = conn.execute(sa.select(jobs)).fetchall()
-
-    for job_row in job_rows:
-        job_actions_entries = _loads(job_row.job_actions) or []
-        if not isinstance(job_actions_entries, list):
-            LOG.warning('Skipping job %s: job_actions is of type %s',
-                        job_row.id, type(job_actions_entries))
-            continue
-        for position, job_action_entry in enumerate(job_actions_entries):
-            if not isinstance(job_action_entry, dict):
-                LOG.warning('Skipping job_action %s of job %s: not a '
-                            'dictionary', position, job_row.id)
+    def migrate_batch(job_rows):
+        entries_by_job = []
+        referenced = set()
+        for job_row in job_rows:
+            job_actions_entries = _loads(job_row.job_actions) or []
+            if not isinstance(job_actions_entries, list):
+                LOG.warning('Skipping job %s: job_actions is of type %s',
+                            job_row.id, type(job_actions_entries))
                 continue
-            action_id = job_action_entry.get('action_id')
-            if not action_id or action_id not in known_actions:
-                # The referenced action is missing (inline action that was
-                # never registered): create a new action row for it.
-                freezer_action = job_action_entry.get('freezer_action') or {}
-                if not freezer_action.get('action'):
-                    # actions.action is NOT NULL; without an action name we
-                    # cannot create a valid row, so skip this entry instead
-                    # of aborting the whole migration.
-                    LOG.warning('Skipping job_action %s of job %s: no action '
-                                'name to create an action from',
-                                position, job_row.id)
+            entries_by_job.append((job_row, job_actions_entries))
+            referenced.update(
+                entry.get('action_id') for entry in job_actions_entries
+                if isinstance(entry, dict) and entry.get('action_id'))
+        # only the actions referenced by this batch are looked up
+        known_actions = {row.id for row in conn.execute(
+            sa.select(actions.c.id).where(actions.c.id.in_(referenced)))}
+
+        action_rows = []
+        link_rows = []
+        for job_row, job_actions_entries in entries_by_job:
+            for position, job_action_entry in enumerate(job_actions_entries):
+                if not isinstance(job_action_entry, dict):
+                    LOG.warning('Skipping job_action %s of job %s: not a '
+                                'dictionary', position, job_row.id)
                     continue
-                action_id = action_id or uuid.uuid4().hex
-                LOG.info('Creating missing action %s referenced by job %s',
-                         action_id, job_row.id)
-                conn.execute(actions.insert().values(
-                    **_action_values(job_action_entry, action_id, job_row)))
-                known_actions.add(action_id)
-            conn.execute(job_actions.insert().values(
-                id=uuid.uuid4().hex,
-                job_id=job_row.id,
-                action_id=action_id,
-                position=position,
-                deleted=False,
-            ))
+                action_id = job_action_entry.get('action_id')
+                if not action_id or action_id not in known_actions:
+                    # The referenced action is missing (inline action that
+                    # was never registered): create a new action row for it.
+                    freezer_action = \
+                        job_action_entry.get('freezer_action') or {}
+                    if not freezer_action.get('action'):
+                        # actions.action is NOT NULL; without an action name
+                        # we cannot create a valid row, so skip this entry
+                        # instead of aborting the whole migration.
+                        LOG.warning('Skipping job_action %s of job %s: no '
+                                    'action name to create an action from',
+                                    position, job_row.id)
+                        continue
+                    action_id = action_id or uuid.uuid4().hex
+                    LOG.info('Creating missing action %s referenced by job '
+                             '%s', action_id, job_row.id)
+                    action_rows.append(
+                        _action_values(job_action_entry, action_id, job_row))
+                    known_actions.add(action_id)
+                link_rows.append({
+                    'id': uuid.uuid4().hex,
+                    'job_id': job_row.id,
+                    'action_id': action_id,
+                    'position': position,
+                    'deleted': False,
+                })
+        migration_helpers.insert_many(conn, actions, action_rows)
+        migration_helpers.insert_many(conn, job_actions, link_rows)
+
+    migration = migration_helpers.BatchedMigration(
+        conn, revision + '_job_actions', jobs,
+        columns=[jobs.c.id, jobs.c.project_id, jobs.c.user_id,
+                 jobs.c.created_at, jobs.c.updated_at, jobs.c.job_actions],
+        batch_size=batch_size, commit=commit)
+    migration.run(migrate_batch)
 
 
 def downgrade() -> None:
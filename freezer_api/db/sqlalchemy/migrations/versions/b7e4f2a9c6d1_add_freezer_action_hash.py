@@ -0,0 +1,105 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""add freezer_action_hash to actions
+
+Store a canonical hash of each action's freezer_action with an index, so
+identical inline actions sent in job documents can be found with a single
+indexed lookup and reused instead of being stored again.
+
+Revision ID: b7e4f2a9c6d1
+Revises: 7a3b9c1d2e4f
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+import hashlib
+
+from alembic import op
+from oslo_log import log
+from oslo_serialization import jsonutils as json
+import sqlalchemy as sa
+
+from freezer_api.db.sqlalchemy import migration_helpers
+
+LOG = log.getLogger(__name__)
+
+revision = 'b7e4f2a9c6d1'
+down_revision = '7a3b9c1d2e4f'
+branch_labels = None
+depends_on = None
+
+
+def _loads(value):
+    if not value:
+        return None
+    try:
+        return json.loads(value)
+    except (ValueError, TypeError):
+        LOG.warning('Failed to load JSON value: %s', value)
+        return None
+
+
+def _freezer_action_hash(action_row):
+    """
+    Hash the freezer_action rebuilt from an actions row. Mirrors
+    convert_action_to_dict and ActionDoc.freezer_action_hash.
+    """
+    freezer_action = _loads(action_row.backup_metadata) or {}
+    freezer_action['backup_name'] = action_row.backup_name
+    freezer_action['action'] = action_row.action
+    freezer_action['mode'] = action_row.actionmode
+    freezer_action['container'] = action_row.container
+    freezer_action['timeout'] = action_row.timeout
+    freezer_action['priority'] = action_row.priority
+    freezer_action['path_to_backup'] = action_row.path_to_backup
+    freezer_action['log_file'] = action_row.log_file
+    canonical = {key: value for key, value in freezer_action.items()
+                 if value is not None and key not in ('_version', 'user_id')}
+    encoded = json.dumps(canonical, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+def upgrade() -> None:
+    # the backfill commits per batch, so a failed run may leave the column
+    # behind: it is resumed rather than added again
+    columns = [column['name'] for column in
+               sa.inspect(op.get_bind()).get_columns('actions')]
+    if 'freezer_action_hash' not in columns:
+        op.add_column('actions', sa.Column('freezer_action_hash',
+                                           sa.String(64), nullable=True))
+        op.create_index('ix_actions_freezer_action_hash', 'actions',
+                        ['freezer_action_hash'])
+
+    _backfill_hashes()
+
+
+def _backfill_hashes(batch_size=1000,
+                     commit=migration_helpers.commit_batch):
+    conn = op.get_bind()
+    meta = sa.MetaData()
+    actions = sa.Table('actions', meta, autoload_with=conn)
+
+    def migrate_batch(action_rows):
+        migration_helpers.update_many(conn, actions, [
+            {'id': action_row.id,
+             'freezer_action_hash': _freezer_action_hash(action_row)}
+            for action_row in action_rows])
+
+    migration = migration_helpers.BatchedMigration(
+        conn, revision + '_hashes', actions, batch_size=batch_size,
+        commit=commit)
+    migration.run(migrate_batch)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_actions_freezer_action_hash', table_name='actions')
+    op.drop_column('actions', 'freezer_action_hash')
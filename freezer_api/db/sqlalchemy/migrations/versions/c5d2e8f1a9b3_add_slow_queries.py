@@ -0,0 +1,50 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""add slow_queries
+
+Aggregates of the statements run by the API slower than
+[database]/slow_query_threshold, reported by freezer-manage.
+
+Revision ID: c5d2e8f1a9b3
+Revises: b7e4f2a9c6d1
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'c5d2e8f1a9b3'
+down_revision = 'b7e4f2a9c6d1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'slow_queries',
+        sa.Column('created_at', sa.DateTime),
+        sa.Column('updated_at', sa.DateTime),
+        sa.Column('id', sa.String(64), primary_key=True),
+        sa.Column('caller', sa.String(255)),
+        sa.Column('fingerprint', sa.Text, nullable=False),
+        sa.Column('parameter_shapes', sa.String(255)),
+        sa.Column('count', sa.Integer, nullable=False, default=0),
+        sa.Column('total_time', sa.Float, nullable=False, default=0.0),
+        sa.Column('max_time', sa.Float, nullable=False, default=0.0),
+        sa.Column('explain', sa.Text),
+        mysql_engine='InnoDB')
+
+
+def downgrade() -> None:
+    op.drop_table('slow_queries')
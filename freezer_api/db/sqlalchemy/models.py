@@ -19,7 +19,7 @@
 from oslo_db.sqlalchemy import models
 from oslo_serialization import jsonutils as json
 from oslo_utils import timeutils
-from sqlalchemy import Column, Integer, String, Text, TIMESTAMP
+from sqlalchemy import Column, Float, Integer, String, Text, TIMESTAMP
 from sqlalchemy import BLOB
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy import ForeignKey, DateTime, Boolean
@@ -114,6 +114,14 @@ class Action(BASE, FreezerBase):
     mandatory = Column(Boolean, default=False)
     log_file = Column(String(255))
     backup_metadata = Column(Text)
+    # SHA-256 of the canonical freezer_action (see
+    # ActionDoc.freezer_action_hash), used to find identical actions.
+    freezer_action_hash = Column(String(64), index=True)
+
+
+# keys of a freezer_action also stored in columns of the actions table
+ACTION_KEYS = ('action', 'backup_name', 'container', 'path_to_backup',
+               'timeout', 'priority', 'mandatory', 'log_file')
 
 
 class Session(BASE, FreezerBase):
@@ -224,16 +232,32 @@ class Backup(BASE, FreezerBase):
     backup_metadata = Column(Text)
 
 
+class SlowQuery(BASE, models.TimestampMixin, models.ModelBase):
+    """Aggregate of the runs of a statement slower than the threshold"""
+    __tablename__ = 'slow_queries'
+    __table_args__ = {'mysql_engine': 'InnoDB'}
+
+    # sha256 of the caller and of the statement fingerprint
+    id = Column(String(64), primary_key=True)
+    caller = Column(String(255))
+    fingerprint = Column(Text, nullable=False)
+    parameter_shapes = Column(String(255))
+    count = Column(Integer, nullable=False, default=0)
+    total_time = Column(Float, nullable=False, default=0.0)
+    max_time = Column(Float, nullable=False, default=0.0)
+    explain = Column(Text)
+
+
 def register_models(engine):
     _models = (Client, Action, Job, JobAction, Session,
-               ActionReport, Backup, UserCredentials)
+               ActionReport, Backup, UserCredentials, SlowQuery)
     for _model in _models:
         _model.metadata.create_all(engine)
 
 
 def unregister_models(engine):
     _models = (Client, Action, Job, JobAction, Session,
-               ActionReport, Backup, UserCredentials)
+               ActionReport, Backup, UserCredentials, SlowQuery)
     for _model in _models:
         _model.metadata.drop_all(engine)
 
@@ -242,3 +266,20 @@ def get_tables(engine):
     _meta = MetaData()
     _meta.reflect(engine)
     return _meta.tables.keys()
+
+
+def fill_defaults(model, rows):
+    """Give every row the same keys, as a multi-row INSERT requires.
+
+    The keys missing from a row take the scalar default of their column,
+    None otherwise.
+    """
+    keys = set()
+    for row in rows:
+        keys.update(row)
+    defaults = {}
+    for key in keys:
+        default = model.__table__.columns[key].default
+        defaults[key] = default.arg if default is not None and \
+            default.is_scalar else None
+    return [dict(defaults, **row) for row in rows]
@@ -0,0 +1,266 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Monthly range partitioning of the backups table.
+
+The backups table is append-mostly and retention removes whole old time
+ranges, so on MySQL and PostgreSQL it can be partitioned by the month of
+``created_at``. Old months are then removed by dropping their partition
+instead of deleting rows one by one.
+
+Partitions are named ``backups_pYYYYMM`` and hold the rows created in that
+month. Rows falling after the last monthly partition land in a catch-all
+partition, ``backups_pmax`` on MySQL and ``backups_pdefault`` on
+PostgreSQL, so upcoming partitions should be created ahead of time, e.g.
+by running ``freezer-manage db partition-backups`` from cron. Rows already
+in the catch-all partition are moved to the partitions created for them.
+
+The queries of the API do not filter on ``created_at``, so they read every
+partition: partitioning only makes the removal of old months cheaper.
+
+Both databases require the partitioning column in every unique key, so
+the primary key of the table becomes ``(id, created_at)``.
+"""
+
+import datetime
+import re
+
+from oslo_log import log
+from oslo_utils import timeutils
+import sqlalchemy as sa
+
+
+LOG = log.getLogger(__name__)
+
+TABLE = 'backups'
+SUPPORTED_DIALECTS = ('mysql', 'postgresql')
+
+_MYSQL_MAXVALUE = TABLE + '_pmax'
+_POSTGRESQL_DEFAULT = TABLE + '_pdefault'
+_PARTITION_RE = re.compile(r'^%s_p(\d{4})(\d{2})$' % TABLE)
+
+
+def month_start(value):
+    """Return midnight of the first day of the month of ``value``."""
+    return datetime.datetime(value.year, value.month, 1)
+
+
+def add_months(month, count):
+    """Return the first day of the month ``count`` months after ``month``."""
+    index = month.year * 12 + month.month - 1 + count
+    return datetime.datetime(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return '{0}_p{1:%Y%m}'.format(TABLE, month)
+
+
+def partition_month(name):
+    """Return the month held by a partition, None for catch-all ones."""
+    match = _PARTITION_RE.match(name)
+    if not match:
+        return None
+    return datetime.datetime(int(match.group(1)), int(match.group(2)), 1)
+
+
+def _months(first, last):
+    month = month_start(first)
+    while month <= last:
+        yield month
+        month = add_months(month, 1)
+
+
+def _check_dialect(connection):
+    dialect = connection.dialect.name
+    if dialect not in SUPPORTED_DIALECTS:
+        raise ValueError('Partitioning of the {0} table is not supported '
+                         'by {1}'.format(TABLE, dialect))
+    return dialect
+
+
+def _mysql_partition(month):
+    return ("PARTITION {0} VALUES LESS THAN (TO_DAYS('{1:%Y-%m-%d}'))"
+            .format(partition_name(month), add_months(month, 1)))
+
+
+def _mysql_list(connection):
+    rows = connection.execute(sa.text(
+        'SELECT PARTITION_NAME FROM information_schema.PARTITIONS '
+        'WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table '
+        'AND PARTITION_NAME IS NOT NULL'), {'table': TABLE})
+    return [row[0] for row in rows]
+
+
+def _mysql_enable(connection, months):
+    clauses = [_mysql_partition(month) for month in months]
+    clauses.append('PARTITION {0} VALUES LESS THAN MAXVALUE'.format(
+        _MYSQL_MAXVALUE))
+    connection.execute(sa.text(
+        'ALTER TABLE {0} MODIFY created_at DATETIME NOT NULL, '
+        'DROP PRIMARY KEY, ADD PRIMARY KEY (id, created_at)'.format(TABLE)))
+    connection.execute(sa.text(
+        'ALTER TABLE {0} PARTITION BY RANGE (TO_DAYS(created_at)) '
+        '({1})'.format(TABLE, ', '.join(clauses))))
+
+
+def _mysql_add(connection, months):
+    clauses = [_mysql_partition(month) for month in months]
+    clauses.append('PARTITION {0} VALUES LESS THAN MAXVALUE'.format(
+        _MYSQL_MAXVALUE))
+    connection.execute(sa.text(
+        'ALTER TABLE {0} REORGANIZE PARTITION {1} INTO ({2})'.format(
+            TABLE, _MYSQL_MAXVALUE, ', '.join(clauses))))
+
+
+def _mysql_drop(connection, names):
+    connection.execute(sa.text('ALTER TABLE {0} DROP PARTITION {1}'.format(
+        TABLE, ', '.join(names))))
+
+
+def _postgresql_partition(month):
+    return ("CREATE TABLE {0} PARTITION OF {1} FOR VALUES "
+            "FROM ('{2:%Y-%m-%d}') TO ('{3:%Y-%m-%d}')".format(
+                partition_name(month), TABLE, month, add_months(month, 1)))
+
+
+def _postgresql_list(connection):
+    rows = connection.execute(sa.text(
+        'SELECT child.relname FROM pg_inherits '
+        'JOIN pg_class parent ON parent.oid = pg_inherits.inhparent '
+        'JOIN pg_class child ON child.oid = pg_inherits.inhrelid '
+        'WHERE parent.relname = :table'), {'table': TABLE})
+    return [row[0] for row in rows]
+
+
+def _postgresql_enable(connection, months):
+    old = TABLE + '_unpartitioned'
+    # the primary key on id alone is dropped before the table is copied
+    # with all its indexes and constraints, a unique key of a partitioned
+    # table has to include created_at
+    statements = [
+        'ALTER TABLE {0} RENAME TO {1}'.format(TABLE, old),
+        'ALTER TABLE {0} DROP CONSTRAINT {1}_pkey, '
+        'ALTER COLUMN created_at SET NOT NULL'.format(old, TABLE),
+        'CREATE TABLE {0} (LIKE {1} INCLUDING ALL) '
+        'PARTITION BY RANGE (created_at)'.format(TABLE, old),
+        'ALTER TABLE {0} ADD PRIMARY KEY (id, created_at)'.format(TABLE),
+    ]
+    statements.extend(_postgresql_partition(month) for month in months)
+    statements.extend([
+        'CREATE TABLE {0} PARTITION OF {1} DEFAULT'.format(
+            _POSTGRESQL_DEFAULT, TABLE),
+        'INSERT INTO {0} SELECT * FROM {1}'.format(TABLE, old),
+        'DROP TABLE {0}'.format(old),
+    ])
+    for statement in statements:
+        connection.execute(sa.text(statement))
+
+
+def _postgresql_add(connection, months):
+    if _POSTGRESQL_DEFAULT not in _postgresql_list(connection):
+        for month in months:
+            connection.execute(sa.text(_postgresql_partition(month)))
+        return
+    # A partition cannot be created while the default partition holds rows
+    # of its range: the default partition is detached, the rows of the new
+    # months are moved to their partitions and it is attached back.
+    params = {'start': months[0], 'end': add_months(months[-1], 1)}
+    connection.execute(sa.text('ALTER TABLE {0} DETACH PARTITION {1}'.format(
+        TABLE, _POSTGRESQL_DEFAULT)))
+    for month in months:
+        connection.execute(sa.text(_postgresql_partition(month)))
+    connection.execute(sa.text(
+        'INSERT INTO {0} SELECT * FROM {1} '
+        'WHERE created_at >= :start AND created_at < :end'.format(
+            TABLE, _POSTGRESQL_DEFAULT)), params)
+    connection.execute(sa.text(
+        'DELETE FROM {0} WHERE created_at >= :start AND created_at < :end'
+        .format(_POSTGRESQL_DEFAULT)), params)
+    connection.execute(sa.text(
+        'ALTER TABLE {0} ATTACH PARTITION {1} DEFAULT'.format(
+            TABLE, _POSTGRESQL_DEFAULT)))
+
+
+def _postgresql_drop(connection, names):
+    for name in names:
+        connection.execute(sa.text('DROP TABLE {0}'.format(name)))
+
+
+_DIALECTS = {
+    'mysql': (_mysql_list, _mysql_enable, _mysql_add, _mysql_drop),
+    'postgresql': (_postgresql_list, _postgresql_enable, _postgresql_add,
+                   _postgresql_drop),
+}
+
+
+def list_partitions(connection):
+    """Return the months of the monthly partitions, oldest first."""
+    list_, _enable, _add, _drop = _DIALECTS[_check_dialect(connection)]
+    months = [partition_month(name) for name in list_(connection)]
+    return sorted(month for month in months if month)
+
+
+def partition_backups(engine, months_ahead=3, now=None):
+    """Partition the backups table and create its upcoming partitions.
+
+    The first call converts the table, with one partition per month from
+    the oldest backup up to ``months_ahead`` months after the current one.
+    Later calls only create the partitions missing up to that month, so
+    this is safe to run periodically.
+
+    :returns: the names of the partitions created
+    """
+    current = month_start(now or timeutils.utcnow())
+    last = add_months(current, months_ahead)
+    with engine.begin() as connection:
+        list_, enable, add, _drop = _DIALECTS[_check_dialect(connection)]
+        existing = list_(connection)
+        if not existing:
+            connection.execute(sa.text(
+                'UPDATE {0} SET created_at = COALESCE(updated_at, :now) '
+                'WHERE created_at IS NULL'.format(TABLE)),
+                {'now': timeutils.utcnow()})
+            oldest = connection.execute(sa.text(
+                'SELECT MIN(created_at) FROM {0}'.format(TABLE))).scalar()
+            months = list(_months(min(oldest or current, current), last))
+            enable(connection, months)
+            LOG.info('Table {0} partitioned by month'.format(TABLE))
+        else:
+            months = [partition_month(name) for name in existing]
+            newest = max((month for month in months if month), default=None)
+            first = add_months(newest, 1) if newest else current
+            months = list(_months(first, last))
+            if months:
+                add(connection, months)
+    created = [partition_name(month) for month in months]
+    LOG.info('{0} partition(s) created in Table {1}'.format(len(created),
+                                                            TABLE))
+    return created
+
+
+def drop_partitions(engine, before):
+    """Drop the monthly partitions holding only rows created before ``before``.
+
+    :returns: the names of the partitions dropped
+    """
+    with engine.begin() as connection:
+        list_, _enable, _add, drop = _DIALECTS[_check_dialect(connection)]
+        names = []
+        for name in list_(connection):
+            month = partition_month(name)
+            if month and add_months(month, 1) <= before:
+                names.append(name)
+        if names:
+            drop(connection, sorted(names))
+    LOG.info('{0} partition(s) dropped from Table {1}'.format(len(names),
+                                                              TABLE))
+    return sorted(names)
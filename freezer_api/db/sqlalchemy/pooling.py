@@ -0,0 +1,193 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Connection pool pre-ping, warm up and statistics.
+
+Each API worker process has its own engine and pool, so the statistics
+returned by ``pool_statistics`` describe the pool of the worker serving
+the request, identified by its pid.
+"""
+
+import functools
+import os
+import threading
+import time
+
+from oslo_config import cfg
+from oslo_log import log
+import sqlalchemy as sa
+from sqlalchemy import exc as sa_exc
+
+try:
+    import uwsgi
+except ImportError:
+    uwsgi = None
+
+CONF = cfg.CONF
+LOG = log.getLogger(__name__)
+
+POOL_OPTS = [
+    cfg.BoolOpt('pool_pre_ping',
+                default=True,
+                help='Test pooled connections with a lightweight query when '
+                     'they are checked out, replacing the connections '
+                     'closed by the database server instead of failing the '
+                     'request using them.'),
+    cfg.IntOpt('pool_warm_size',
+               default=0,
+               min=0,
+               help='Number of connections each API worker opens when it '
+                    'starts, so that the first requests do not pay for '
+                    'them. Capped by max_pool_size.'),
+]
+
+
+class PoolStatistics(object):
+    """Checkout counters of the pool of this process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record(self, wait, timeout=False):
+        with self._lock:
+            self.checkouts += 1
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+            if timeout:
+                self.timeouts += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'wait_seconds_total': round(self.wait_total, 6),
+                'wait_seconds_max': round(self.wait_max, 6),
+                'wait_seconds_avg': round(
+                    self.wait_total / self.checkouts, 6)
+                if self.checkouts else 0.0,
+            }
+
+
+STATISTICS = PoolStatistics()
+
+
+def _ping(dbapi_connection, connection_record, connection_proxy):
+    """Checkout listener raising DisconnectionError on a dead connection.
+
+    The pool then discards the connection and checks out another one.
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute('SELECT 1')
+    except Exception:
+        LOG.info('Discarding a pooled connection closed by the database')
+        raise sa_exc.DisconnectionError()
+    finally:
+        try:
+            cursor.close()
+        except Exception:
+            pass
+
+
+def _time_checkouts(pool):
+    """Time every checkout of the pool, including the waits for a slot"""
+    connect = pool.connect
+
+    @functools.wraps(connect)
+    def timed_connect():
+        start = time.monotonic()
+        try:
+            connection = connect()
+        except sa_exc.TimeoutError:
+            STATISTICS.record(time.monotonic() - start, timeout=True)
+            raise
+        STATISTICS.record(time.monotonic() - start)
+        return connection
+
+    pool.connect = timed_connect
+
+
+def instrument(engine):
+    """on_engine_create hook of the enginefacade"""
+    if CONF.database.pool_pre_ping:
+        sa.event.listen(engine, 'checkout', _ping)
+    _time_checkouts(engine.pool)
+    # dispose() replaces the pool
+    sa.event.listen(engine, 'engine_disposed',
+                    lambda engine: _time_checkouts(engine.pool))
+
+
+def warm_pool(engine, size):
+    """Open up to size connections and return them to the pool"""
+    max_pool_size = CONF.database.max_pool_size
+    if max_pool_size:
+        size = min(size, max_pool_size)
+    connections = []
+    try:
+        for _ in range(size):
+            connections.append(engine.connect())
+    except Exception:
+        LOG.exception('Unable to warm the database connection pool')
+    finally:
+        for connection in connections:
+            connection.close()
+    LOG.info('{0} database connection(s) opened'.format(len(connections)))
+    return len(connections)
+
+
+def warm_pool_at_worker_start(get_engine, size):
+    """Warm the pool of each worker process.
+
+    uwsgi loads the application in its master process before forking the
+    workers, unless lazy-apps is set: the pool is then warmed after the
+    fork, as connections opened in the master cannot be used by the
+    workers. The hook is chained onto ``uwsgi.post_fork_hook``, as
+    uwsgidecorators does, so that a hook already set still runs.
+    """
+    if not size:
+        return
+    if uwsgi is not None and uwsgi.worker_id() == 0:
+        previous_hook = getattr(uwsgi, 'post_fork_hook', None)
+
+        def post_fork_hook():
+            if previous_hook is not None:
+                previous_hook()
+            warm_pool(get_engine(), size)
+
+        uwsgi.post_fork_hook = post_fork_hook
+    else:
+        warm_pool(get_engine(), size)
+
+
+def pool_statistics(engine):
+    """Occupation of the pool of this worker and its checkout counters"""
+    pool = engine.pool
+    statistics = {'pid': os.getpid(), 'pool': type(pool).__name__,
+                  'status': pool.status()}
+    for name, attribute in (('size', 'size'),
+                            ('checked_in', 'checkedin'),
+                            ('checked_out', 'checkedout'),
+                            ('overflow', 'overflow')):
+        method = getattr(pool, attribute, None)
+        if method is not None:
+            statistics[name] = method()
+    statistics['max_overflow'] = CONF.database.max_overflow
+    statistics.update(STATISTICS.snapshot())
+    return statistics
@@ -0,0 +1,84 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Count and time the SQL statements run for each API request.
+
+The statements are attributed to the request through the ``db_stats`` of
+its ``FreezerContext``, the current oslo.context of the thread serving it.
+Statements run outside of a request, or by a request without ``db_stats``,
+are not recorded. The statements are timed by ``timing``, which calls
+``on_statement``.
+"""
+
+import collections
+import re
+
+from oslo_config import cfg
+from oslo_context import context
+
+CONF = cfg.CONF
+
+QUERY_STATS_OPTS = [
+    cfg.IntOpt('request_query_warning_threshold',
+               default=50,
+               min=0,
+               help='Log a warning with the fingerprints of the SQL '
+                    'statements run for an API request when it runs more '
+                    'than this number of statements. 0 disables the '
+                    'warning.'),
+]
+
+CONF.register_opts(QUERY_STATS_OPTS, group='database')
+
+_WHITESPACE = re.compile(r'\s+')
+_IN_LIST = re.compile(r'\bIN \((?:[^()]|\([^()]*\))*\)', re.IGNORECASE)
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+
+
+def fingerprint(statement):
+    """Statement stripped of its literals and of the length of IN lists,
+    identical for every run of a query in a loop.
+    """
+    statement = _WHITESPACE.sub(' ', statement).strip()
+    statement = _STRING.sub('?', statement)
+    statement = _NUMBER.sub('?', statement)
+    return _IN_LIST.sub('IN (...)', statement)
+
+
+class QueryStats(object):
+    """Statements run for a request and the time spent running them"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = collections.Counter()
+
+    def record(self, statement, duration):
+        self.count += 1
+        self.duration += duration
+        self.fingerprints[fingerprint(statement)] += 1
+
+    def most_common(self, limit=5):
+        return self.fingerprints.most_common(limit)
+
+
+def current():
+    """QueryStats of the request served by this thread, if any"""
+    return getattr(context.get_current(), 'db_stats', None)
+
+
+def on_statement(conn, statement, parameters, executemany, duration):
+    """timing subscriber"""
+    stats = current()
+    if stats is not None:
+        stats.record(statement, duration)
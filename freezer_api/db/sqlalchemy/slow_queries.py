@@ -0,0 +1,275 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Slow query log.
+
+Statements running longer than [database]/slow_query_threshold are logged
+with their fingerprint, the shapes of their parameters, the driver
+function running them and optionally their EXPLAIN output. They are also
+aggregated per fingerprint and caller in memory, and each API worker adds
+the aggregates to the ``slow_queries`` table every
+[database]/slow_query_flush_interval seconds at most, where
+``freezer-manage db slow-queries`` reports them. The statements are timed
+by ``timing``, which calls ``on_statement``.
+"""
+
+import hashlib
+import sys
+import threading
+
+from oslo_config import cfg
+from oslo_db import exception as db_exc
+from oslo_log import log
+from oslo_utils import timeutils
+import sqlalchemy as sa
+
+from freezer_api.db.sqlalchemy import models
+from freezer_api.db.sqlalchemy import query_stats
+from freezer_api.db.sqlalchemy import timing
+
+CONF = cfg.CONF
+LOG = log.getLogger(__name__)
+
+SLOW_QUERY_OPTS = [
+    cfg.FloatOpt('slow_query_threshold',
+                 default=0.0,
+                 min=0.0,
+                 help='Duration in seconds above which the SQL statements '
+                      'are logged and aggregated in the slow query report '
+                      'of freezer-manage. 0 disables the slow query log.'),
+    cfg.BoolOpt('slow_query_explain',
+                default=False,
+                help='Log and store the EXPLAIN output of the slow SELECT '
+                     'statements. The statement is run again prefixed with '
+                     'EXPLAIN, on the same connection.'),
+    cfg.IntOpt('slow_query_flush_interval',
+               default=10,
+               min=1,
+               help='Seconds during which each API worker aggregates the '
+                    'slow queries in memory before adding them to the '
+                    'slow query report, in a single transaction.'),
+]
+
+CONF.register_opts(SLOW_QUERY_OPTS, group='database')
+
+# execution option of the statements of the slow query log itself
+_NOT_LOGGED = 'freezer_slow_query_not_logged'
+
+_EXPLAIN = {
+    'mysql': 'EXPLAIN ',
+    'postgresql': 'EXPLAIN ',
+    'sqlite': 'EXPLAIN QUERY PLAN ',
+}
+
+# modules whose functions are reported as the caller of a statement
+_CALLER_PREFIX = 'freezer_api.db.sqlalchemy.'
+_INTERNAL_MODULES = (__name__, timing.__name__)
+
+_SHAPES_LENGTH = 255
+
+
+def _caller():
+    frame = sys._getframe(1)
+    while frame is not None:
+        module = frame.f_globals.get('__name__', '')
+        if module.startswith(_CALLER_PREFIX) and \
+                module not in _INTERNAL_MODULES:
+            return frame.f_code.co_name
+        frame = frame.f_back
+    return 'unknown'
+
+
+def _type_name(value):
+    return 'NULL' if value is None else type(value).__name__
+
+
+def parameter_shapes(parameters, executemany=False):
+    """Types of the bound parameters, without their values"""
+    prefix = ''
+    if executemany:
+        prefix = '{0} x '.format(len(parameters))
+        parameters = parameters[0] if parameters else ()
+    if isinstance(parameters, dict):
+        shapes = ['{0}:{1}'.format(name, _type_name(value))
+                  for name, value in sorted(parameters.items())]
+    else:
+        shapes = [_type_name(value) for value in parameters or ()]
+    return (prefix + '(' + ', '.join(shapes) + ')')[:_SHAPES_LENGTH]
+
+
+def _explain(conn, statement, parameters):
+    prefix = _EXPLAIN.get(conn.dialect.name)
+    if prefix is None or not statement.lstrip().upper().startswith('SELECT'):
+        return None
+    # a cursor of the DBAPI connection, not to run the events again
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        cursor.execute(prefix + statement, parameters)
+        return '\n'.join(' | '.join(str(column) for column in row)
+                         for row in cursor.fetchall())
+    except Exception as e:
+        LOG.debug('Unable to explain a slow query: %s', e)
+        return None
+    finally:
+        cursor.close()
+
+
+class SlowQueryLog(object):
+    """Slow queries recorded by this process and not flushed yet.
+
+    The first slow query recorded starts a timer which flushes the
+    aggregates [database]/slow_query_flush_interval seconds later, so
+    that they are written in a single transaction, out of the requests.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._engine = None
+        self._timer = None
+
+    def record(self, engine, statement, shapes, caller, duration,
+               explain=None):
+        fingerprint = query_stats.fingerprint(statement)
+        key = hashlib.sha256(
+            '{0}\n{1}'.format(caller, fingerprint).encode('utf-8')
+        ).hexdigest()
+        with self._lock:
+            self._engine = engine
+            entry = self._pending.setdefault(key, {
+                'id': key, 'caller': caller, 'fingerprint': fingerprint,
+                'parameter_shapes': shapes, 'count': 0, 'total_time': 0.0,
+                'max_time': 0.0, 'explain': None})
+            entry['count'] += 1
+            entry['total_time'] += duration
+            entry['max_time'] = max(entry['max_time'], duration)
+            entry['explain'] = explain or entry['explain']
+            self._schedule()
+
+    def _schedule(self):
+        # the timer of the parent process is not running in a forked worker
+        if self._timer is not None and self._timer.is_alive():
+            return
+        self._timer = threading.Timer(
+            CONF.database.slow_query_flush_interval, self.flush)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _restore(self, pending):
+        """Merge back aggregates which could not be stored"""
+        for key, entry in pending.items():
+            current = self._pending.get(key)
+            if current is None:
+                self._pending[key] = entry
+                continue
+            current['count'] += entry['count']
+            current['total_time'] += entry['total_time']
+            current['max_time'] = max(current['max_time'],
+                                      entry['max_time'])
+            current['explain'] = current['explain'] or entry['explain']
+
+    def flush(self):
+        """Add the pending aggregates to the slow_queries table"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._pending:
+                return 0
+            pending, self._pending = self._pending, {}
+            engine = self._engine
+        engine = engine.execution_options(**{_NOT_LOGGED: True})
+        try:
+            try:
+                _merge_all(engine, pending)
+            except db_exc.DBDuplicateEntry:
+                # inserted by another API worker in the meantime
+                _merge_all(engine, pending)
+        except Exception:
+            LOG.exception('Unable to store %d slow queries', len(pending))
+            with self._lock:
+                self._restore(pending)
+                self._schedule()
+            return 0
+        return len(pending)
+
+
+SLOW_QUERIES = SlowQueryLog()
+
+
+def _merge_all(engine, pending):
+    with engine.begin() as connection:
+        for entry in pending.values():
+            _merge(connection, entry)
+
+
+def _merge(connection, entry):
+    table = models.SlowQuery.__table__
+    now = timeutils.utcnow()
+    update = table.update().where(table.c.id == entry['id']).values(
+        count=table.c.count + entry['count'],
+        total_time=table.c.total_time + entry['total_time'],
+        max_time=sa.case((table.c.max_time < entry['max_time'],
+                          entry['max_time']), else_=table.c.max_time),
+        parameter_shapes=entry['parameter_shapes'],
+        explain=sa.func.coalesce(entry['explain'], table.c.explain),
+        updated_at=now)
+    if not connection.execute(update).rowcount:
+        connection.execute(table.insert().values(
+            created_at=now, updated_at=now, **entry))
+
+
+def flush():
+    return SLOW_QUERIES.flush()
+
+
+def report(engine, limit=10):
+    """The slow queries which took the longest in total"""
+    table = models.SlowQuery.__table__
+    engine = engine.execution_options(**{_NOT_LOGGED: True})
+    with engine.connect() as connection:
+        rows = connection.execute(
+            sa.select(table).order_by(table.c.total_time.desc()).limit(
+                limit)).fetchall()
+    return [{'caller': row.caller,
+             'fingerprint': row.fingerprint,
+             'parameter_shapes': row.parameter_shapes,
+             'count': row.count,
+             'total_seconds': round(row.total_time, 6),
+             'max_seconds': round(row.max_time, 6),
+             'avg_seconds': round(row.total_time / row.count, 6)
+             if row.count else 0.0,
+             'explain': row.explain,
+             'last_seen': row.updated_at.isoformat()
+             if row.updated_at else None}
+            for row in rows]
+
+
+def on_statement(conn, statement, parameters, executemany, duration):
+    """timing subscriber"""
+    threshold = CONF.database.slow_query_threshold
+    if not threshold or duration < threshold or \
+            conn.get_execution_options().get(_NOT_LOGGED):
+        return
+    caller = _caller()
+    shapes = parameter_shapes(parameters, executemany)
+    explain = None
+    if CONF.database.slow_query_explain and not executemany:
+        explain = _explain(conn, statement, parameters)
+    LOG.warning('Slow query in %(caller)s: %(duration).3fs %(statement)s '
+                'parameters: %(shapes)s%(explain)s',
+                {'caller': caller, 'duration': duration,
+                 'statement': query_stats.fingerprint(statement),
+                 'shapes': shapes,
+                 'explain': '\n' + explain if explain else ''})
+    SLOW_QUERIES.record(conn.engine, statement, shapes, caller, duration,
+                        explain)
@@ -0,0 +1,65 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Time the SQL statements run by the engine.
+
+A single set of cursor event listeners measures each statement and
+passes its duration to the functions registered with ``subscribe``, such
+as the per-request statistics and the slow query log.
+"""
+
+import time
+
+import sqlalchemy as sa
+
+_START_TIMES_KEY = 'freezer_query_start_times'
+
+_SUBSCRIBERS = []
+
+
+def subscribe(callback):
+    """Call ``callback(conn, statement, parameters, executemany, duration)``
+    once each statement has run.
+    """
+    if callback not in _SUBSCRIBERS:
+        _SUBSCRIBERS.append(callback)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters,
+                           execution_context, executemany):
+    conn.info.setdefault(_START_TIMES_KEY, []).append(time.monotonic())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters,
+                          execution_context, executemany):
+    start_times = conn.info.get(_START_TIMES_KEY)
+    if not start_times:
+        return
+    duration = time.monotonic() - start_times.pop()
+    for callback in _SUBSCRIBERS:
+        callback(conn, statement, parameters, executemany, duration)
+
+
+def _handle_error(exception_context):
+    # a failed statement never reaches after_cursor_execute
+    connection = exception_context.connection
+    if connection is not None:
+        start_times = connection.info.get(_START_TIMES_KEY)
+        if start_times:
+            start_times.pop()
+
+
+def instrument(engine):
+    """on_engine_create hook of the enginefacade"""
+    sa.event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    sa.event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+    sa.event.listen(engine, 'handle_error', _handle_error)
@@ -20,6 +20,7 @@ from oslo_log import log
 
 from freezer_api.common import config as common_config
 from freezer_api.common.exceptions import MissingCredentialError
+from freezer_api.common import profiler
 
 CONF = cfg.CONF
 LOG = log.getLogger(__name__)
@@ -64,6 +65,7 @@ class KeystoneClient:
         )
         return conn
 
+    @profiler.trace('keystone')
     def create_trust(self, trustor_user_id, trustor_project_id):
         try:
             roles = []
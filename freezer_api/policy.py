@@ -20,6 +20,7 @@ from oslo_policy import policy
 
 from freezer_api.common import exceptions
 from freezer_api.common import policies
+from freezer_api.common import profiler
 
 
 ENFORCER = None
@@ -35,9 +36,10 @@ def setup_policy(conf):
 
 
 def can(rule, ctx, target=None, do_raise=True):
-    return ENFORCER.enforce(rule, target or {}, ctx.to_dict(),
-                            do_raise=do_raise,
-                            exc=exceptions.AccessForbidden)
+    with profiler.trace_block('policy', info={'rule': rule}):
+        return ENFORCER.enforce(rule, target or {}, ctx.to_dict(),
+                                do_raise=do_raise,
+                                exc=exceptions.AccessForbidden)
 
 
 def enforce(rule):
@@ -15,25 +15,115 @@ limitations under the License.
 
 """
 
+import datetime
 import elasticsearch
+from elasticsearch import helpers
+import itertools
 import logging
 import os
 
 from freezer_api.common.check import check_client_capabilities
+from freezer_api.common import db_mappings
 from freezer_api.common import elasticv2_utils as utils
 from freezer_api.common import exceptions as freezer_api_exc
+from freezer_api.common import profiler
+from freezer_api.db.elasticsearch import es_manager
 
 from oslo_config import cfg
 from oslo_log import log
+from oslo_utils import timeutils
 
 CONF = cfg.CONF
 LOG = log.getLogger(__name__)
 
+# Painless scripts applying a patch to a document on the shard holding it.
+# They leave documents of another project untouched (noop).
+PROJECT_CHECK_SCRIPT = """
+if (ctx._source.project_id != params.project_id) {
+  ctx.op = 'noop';
+  return;
+}
+"""
+
+MERGE_PATCH_SCRIPT = """
+void merge(Map target, Map patch) {
+  for (def entry : patch.entrySet()) {
+    def current = target.get(entry.getKey());
+    if (current instanceof Map && entry.getValue() instanceof Map) {
+      merge(current, entry.getValue());
+    } else {
+      target.put(entry.getKey(), entry.getValue());
+    }
+  }
+}
+""" + PROJECT_CHECK_SCRIPT + """
+merge(ctx._source, params.patch);
+"""
+
+BACKUP_PATCH_SCRIPT = PROJECT_CHECK_SCRIPT + """
+if (ctx._source.backup_metadata == null) {
+  ctx._source.backup_metadata = new HashMap();
+}
+ctx._source.backup_metadata.putAll(params.backup_metadata);
+if (params.status != null) {
+  ctx._source.status = params.status;
+} else if (ctx._source.status == null) {
+  ctx._source.status = 'available';
+}
+if (ctx._source.backup_metadata.containsKey('job_id')) {
+  ctx._source.job_id = ctx._source.backup_metadata.job_id;
+}
+"""
 
+# above this number of monthly indices, searches read the whole alias
+MAX_SEARCH_INDICES = 24
+
+BULK_CHUNK_SIZE = 500
+BULK_MAX_CHUNK_BYTES = 10 * 1024 * 1024
+
+
+def _bulk_error(failures):
+    """
+    Maps the items rejected by a _bulk request to a freezer exception:
+    StorageEngineError when any of them failed server side or could not be
+    sent, else BadDataFormat when any document was malformed, else
+    DocumentExists for version conflicts.
+    """
+    items = [next(iter(failure.values())) for failure in failures]
+    statuses = set(item.get('status') for item in items)
+    message = 'Bulk operation failed for {0} document(s) ({1}): {2}'.format(
+        len(items), ', '.join(str(item.get('_id')) for item in items),
+        items[0].get('error', items[0].get('exception')))
+    if not all(isinstance(status, int) and 400 <= status < 500
+               for status in statuses):
+        return freezer_api_exc.StorageEngineError(message=message)
+    if statuses - {409}:
+        return freezer_api_exc.BadDataFormat(message=message)
+    return freezer_api_exc.DocumentExists(message=message)
+
+
+@profiler.trace_cls('elasticsearch', hide_args=True)
 class TypeManagerV2(object):
-    def __init__(self, es, index):
+    # whether documents are indexed under their own id, so that they can be
+    # read and deleted directly instead of being searched for
+    indexed_by_id = True
+    # field holding the freezer id of a document, used to break ties in the
+    # sort of search_after pagination
+    id_field = '_id'
+    # type of the documents, whose es_manager.TYPE_QUERIES query tells them
+    # apart from the other types when they share an index
+    doc_type = None
+
+    def __init__(self, es, index, refresh='wait_for', write_index=None):
         self.es = es
         self.index = index
+        # with time-based indices, index is the read alias spanning all of
+        # them and write_index the alias of the one receiving new documents
+        self.write_index = write_index
+        # refresh policy sent with every write: 'true' makes the change
+        # searchable at once, 'wait_for' waits for the next periodic
+        # refresh and 'false' returns without waiting for it
+        self.refresh = refresh
 
     @staticmethod
     def get_base_search_filter(project_id, user_id=None, all_projects=False,
@@ -70,9 +160,44 @@ class TypeManagerV2(object):
             raise freezer_api_exc.StorageEngineError(
                 message='search operation failed: query not valid')
 
+    def locate(self, doc_id):
+        """
+        Returns the index holding doc_id. A read alias spanning several
+        time-based indices cannot be used to get or update a document by
+        id, so the document is looked up with an ids query first.
+        """
+        return self.locate_many([doc_id])[doc_id]
+
+    def locate_many(self, doc_ids):
+        """
+        Returns {doc_id: index} for each of doc_ids, with a single ids
+        query when they can be in several time-based indices.
+        """
+        if not self.write_index:
+            return dict.fromkeys(doc_ids, self.index)
+        body = {'query': {'ids': {'values': list(doc_ids)}},
+                '_source': False, 'size': len(doc_ids)}
+        try:
+            res = self.es.search(index=self.index, body=body)
+        except Exception as e:
+            raise freezer_api_exc.StorageEngineError(
+                message='Get operation failed: {}'.format(e))
+        indices = {hit['_id']: hit['_index'] for hit in res['hits']['hits']}
+        missing = [doc_id for doc_id in doc_ids if doc_id not in indices]
+        if missing:
+            raise freezer_api_exc.DocumentNotFound(
+                message='No document found with ID {0}'.format(
+                    ', '.join(missing)))
+        return indices
+
+    def get_search_index(self, search):
+        """Index, alias or list of indices a search has to read"""
+        return self.index
+
     def get(self, project_id, doc_id, user_id=None, all_projects=False):
+        index = self.locate(doc_id)
         try:
-            res = self.es.get(index=self.index,
+            res = self.es.get(index=index,
                               id=doc_id)
             doc = res['_source']
         except elasticsearch.NotFoundError:
@@ -103,9 +228,15 @@ class TypeManagerV2(object):
             all_projects=all_projects,
             search=search
         )
+        index = self.get_search_index(search)
+        kwargs = {}
+        if index != self.index:
+            # time-based indices not created yet are skipped
+            kwargs['ignore_unavailable'] = True
         try:
-            res = self.es.search(index=self.index,
-                                 size=limit, from_=offset, body=query_dsl)
+            res = self.es.search(index=index,
+                                 size=limit, from_=offset, body=query_dsl,
+                                 **kwargs)
         except elasticsearch.ConnectionError:
             raise freezer_api_exc.StorageEngineError(
                 message='unable to connect to db server')
@@ -115,15 +246,102 @@ class TypeManagerV2(object):
         hit_list = res['hits']['hits']
         return [x['_source'] for x in hit_list]
 
+    def get_sort(self):
+        """
+        Stable sort used by search_after pagination: documents are walked
+        by timestamp, then by their freezer id, which is unique.
+        """
+        return [{'timestamp': {'order': 'asc', 'unmapped_type': 'long'}},
+                {self.id_field: {'order': 'asc'}}]
+
+    def scan(self, project_id, user_id=None, all_projects=False, search=None,
+             page_size=1000, point_in_time=False, keep_alive='1m'):
+        """
+        Yields every document matching the search, reading page_size
+        documents per request with search_after cursors, so that each page
+        costs the same whatever its position. With point_in_time the walk
+        reads a point-in-time snapshot of the index, unaffected by
+        concurrent writes.
+        """
+        for docs, cursor in self.scan_pages(project_id=project_id,
+                                            user_id=user_id,
+                                            all_projects=all_projects,
+                                            search=search,
+                                            page_size=page_size,
+                                            point_in_time=point_in_time,
+                                            keep_alive=keep_alive):
+            for doc in docs:
+                yield doc
+
+    def scan_pages(self, project_id, user_id=None, all_projects=False,
+                   search=None, page_size=1000, point_in_time=False,
+                   keep_alive='1m', search_after=None):
+        """
+        Same walk as scan, yielding (documents, cursor) for each page. The
+        cursor of a page can be passed back as search_after to resume the
+        walk after it.
+        """
+        query_dsl = self.get_search_query(
+            project_id=project_id,
+            user_id=user_id,
+            doc_id=None,
+            all_projects=all_projects,
+            search=search or {}
+        )
+        type_query = es_manager.TYPE_QUERIES.get(self.doc_type)
+        if type_query:
+            # only the documents of this type, the index can be shared
+            query_dsl = {'query': {'bool': {'must': [query_dsl['query']],
+                                            'filter': [type_query]}}}
+        pit = None
+        if point_in_time:
+            try:
+                pit = self.es.open_point_in_time(
+                    index=self.index, keep_alive=keep_alive)['id']
+            except Exception as e:
+                raise freezer_api_exc.StorageEngineError(
+                    message='Unable to open point in time: {0}'.format(e))
+        try:
+            while True:
+                body = dict(query_dsl, size=page_size, sort=self.get_sort())
+                if search_after is not None:
+                    body['search_after'] = search_after
+                if pit:
+                    body['pit'] = {'id': pit, 'keep_alive': keep_alive}
+                    kwargs = {'body': body}
+                else:
+                    kwargs = {'index': self.index, 'body': body}
+                try:
+                    res = self.es.search(**kwargs)
+                except elasticsearch.ConnectionError:
+                    raise freezer_api_exc.StorageEngineError(
+                        message='unable to connect to db server')
+                except Exception as e:
+                    raise freezer_api_exc.StorageEngineError(
+                        message='search operation failed: {0}'.format(e))
+                pit = res.get('pit_id', pit)
+                hits = res['hits']['hits']
+                if hits:
+                    search_after = hits[-1]['sort']
+                    yield [hit['_source'] for hit in hits], search_after
+                if len(hits) < page_size:
+                    return
+        finally:
+            if pit:
+                try:
+                    self.es.close_point_in_time(id=pit)
+                except Exception as e:
+                    LOG.warning('Unable to close point in time: '
+                                '{0}'.format(e))
+
     def insert(self, doc, doc_id=None):
         try:
             # remove _version from the document
             doc.pop('_version', None)
-            res = self.es.index(index=self.index,
-                                body=doc, id=doc_id)
+            res = self.es.index(index=self.write_index or self.index,
+                                body=doc, id=doc_id, refresh=self.refresh)
             created = res['created']
             version = res['_version']
-            self.es.indices.refresh(index=self.index)
         except elasticsearch.ConflictError as e:
             raise freezer_api_exc.DocumentExists(message=str(e))
         except elasticsearch.TransportError as e:
@@ -138,11 +356,12 @@ class TypeManagerV2(object):
         # remove _version from the document
         update_doc.pop('_version', 0)
         body = {"doc": update_doc}
+        index = self.locate(doc_id)
         try:
-            res = self.es.update(index=self.index,
-                                 id=doc_id, body=body)
+            res = self.es.update(index=index,
+                                 id=doc_id, body=body,
+                                 refresh=self.refresh)
             version = res['_version']
-            self.es.indices.refresh(index=self.index)
         except elasticsearch.ConflictError as e:
             raise freezer_api_exc.DocumentExists(message=str(e))
         except elasticsearch.NotFoundError:
@@ -155,34 +374,196 @@ class TypeManagerV2(object):
                         ' {0}: {1}'.format(doc_id, e))
         return version
 
+    def bulk(self, actions, chunk_size=BULK_CHUNK_SIZE,
+             max_chunk_bytes=BULK_MAX_CHUNK_BYTES, parallel=False,
+             thread_count=4):
+        """
+        Sends actions (elasticsearch.helpers action dicts) with the _bulk
+        API, in chunks of at most chunk_size actions and max_chunk_bytes
+        bytes. With parallel, chunks are submitted by thread_count threads.
+        Every chunk is sent even when some items are rejected, the
+        rejections are then raised as a single exception (see _bulk_error).
+        Returns the number of documents written.
+        """
+        options = {'chunk_size': chunk_size,
+                   'max_chunk_bytes': max_chunk_bytes,
+                   'raise_on_error': False,
+                   'raise_on_exception': False,
+                   'refresh': self.refresh}
+        written = 0
+        failures = []
+        try:
+            if parallel:
+                results = helpers.parallel_bulk(
+                    self.es, actions, thread_count=thread_count, **options)
+            else:
+                results = helpers.streaming_bulk(self.es, actions, **options)
+            for ok, item in results:
+                if ok:
+                    written += 1
+                else:
+                    failures.append(item)
+        except freezer_api_exc.FreezerAPIException:
+            # raised while building the actions, by locate_many
+            raise
+        except Exception as e:
+            raise freezer_api_exc.StorageEngineError(
+                message='Bulk operation failed: {0}'.format(e))
+        if failures:
+            raise _bulk_error(failures)
+        return written
+
+    def bulk_insert(self, docs, op_type='index', **kwargs):
+        """
+        Indexes docs, an iterable of (doc_id, doc), with bulk. op_type
+        'create' rejects documents whose id already exists.
+        """
+        def actions():
+            for doc_id, doc in docs:
+                # remove _version from the document
+                doc.pop('_version', None)
+                yield {'_op_type': op_type,
+                       '_index': self.write_index or self.index,
+                       '_id': doc_id, '_source': doc}
+        return self.bulk(actions(), **kwargs)
+
+    def bulk_update(self, update_docs, **kwargs):
+        """
+        Applies partial updates, an iterable of (doc_id, update_doc), with
+        bulk. As with update, the documents are updated in the index
+        holding them, located BULK_CHUNK_SIZE documents at a time.
+        """
+        def actions():
+            update_docs_iter = iter(update_docs)
+            while True:
+                chunk = list(itertools.islice(update_docs_iter,
+                                              BULK_CHUNK_SIZE))
+                if not chunk:
+                    return
+                indices = self.locate_many(
+                    [doc_id for doc_id, _update_doc in chunk])
+                for doc_id, update_doc in chunk:
+                    # remove _version from the document
+                    update_doc.pop('_version', None)
+                    yield {'_op_type': 'update', '_index': indices[doc_id],
+                           '_id': doc_id, 'doc': update_doc}
+        return self.bulk(actions(), **kwargs)
+
+    def script_update(self, doc_id, source, params, if_seq_no=None,
+                      if_primary_term=None):
+        """
+        Updates a document with a painless script, in a single request.
+        The script runs on the shard holding the document, so concurrent
+        patches are applied one after the other instead of overwriting
+        each other. When if_seq_no and if_primary_term are given, the
+        update is rejected with DocumentExists if the document changed
+        since it was read; otherwise version conflicts are retried.
+        Raises AccessForbidden when the script left the document untouched
+        (noop), as the scripts do for documents of another project.
+        """
+        kwargs = {}
+        if if_seq_no is not None:
+            kwargs['if_seq_no'] = if_seq_no
+            kwargs['if_primary_term'] = if_primary_term
+        else:
+            kwargs['retry_on_conflict'] = 3
+        body = {'script': {'source': source, 'lang': 'painless',
+                           'params': params}}
+        index = self.locate(doc_id)
+        try:
+            res = self.es.update(index=index, id=doc_id, body=body,
+                                 refresh=self.refresh, **kwargs)
+        except elasticsearch.ConflictError as e:
+            raise freezer_api_exc.DocumentExists(message=str(e))
+        except elasticsearch.NotFoundError:
+            raise freezer_api_exc.DocumentNotFound(
+                message='Unable to find document to update with id'
+                        ' {0}'.format(doc_id))
+        except Exception as e:
+            raise freezer_api_exc.StorageEngineError(
+                message='Unable to update document with id'
+                        ' {0}: {1}'.format(doc_id, e))
+        if res.get('result') == 'noop':
+            raise freezer_api_exc.AccessForbidden(
+                "You are not allowed to access")
+        return res['_version']
+
     def delete(self, project_id, doc_id, user_id=None):
+        """
+        Deletes the document doc_id of the project (and of the user, when
+        given). Documents stored under their own id are checked with a get
+        and removed with a direct delete, the others with a delete_by_query
+        scoped like a search, as are documents in time-based indices.
+        Returns doc_id, or None when nothing was
+        deleted.
+        """
+        if not self.indexed_by_id or self.write_index:
+            return self._delete_by_query(project_id, doc_id, user_id)
+        try:
+            self.get(project_id=project_id, doc_id=doc_id, user_id=user_id)
+        except (freezer_api_exc.DocumentNotFound,
+                freezer_api_exc.AccessForbidden):
+            return None
+        try:
+            self.es.delete(index=self.index, id=doc_id,
+                           refresh=self.refresh)
+        except elasticsearch.NotFoundError:
+            return None
+        except Exception as e:
+            raise freezer_api_exc.StorageEngineError(
+                message='Delete operation failed: {0}'.format(e))
+        return doc_id
+
+    def _delete_by_query(self, project_id, doc_id, user_id=None):
         query_dsl = self.get_search_query(
             project_id=project_id,
             user_id=user_id,
             doc_id=doc_id
         )
         try:
-            results = self.es.search(index=self.index,
-                                     body=query_dsl)
-            results = results['hits']['hits']
+            # delete_by_query only takes a boolean refresh, wait_for is
+            # honoured by refreshing the affected shards
+            res = self.es.delete_by_query(index=self.index,
+                                          body=query_dsl,
+                                          conflicts='proceed',
+                                          refresh=self.refresh != 'false')
         except Exception as e:
             raise freezer_api_exc.StorageEngineError(
-                message='Scan operation failed: {0}'.format(e))
-        id = None
-        for res in results:
-            id = res.get('_id')
-            try:
-                self.es.delete(index=self.index, id=id)
-                self.es.indices.refresh(index=self.index)
-            except Exception as e:
-                raise freezer_api_exc.StorageEngineError(
-                    message='Delete operation failed: {0}'.format(e))
-        return id
+                message='Delete operation failed: {0}'.format(e))
+        return doc_id if res.get('deleted') else None
 
 
 class BackupTypeManagerV2(TypeManagerV2):
-    def __init__(self, es, index='freezer'):
-        TypeManagerV2.__init__(self, es, index=index)
+    id_field = 'backup_id'
+    doc_type = 'backups'
+
+    def __init__(self, es, index='freezer', refresh='wait_for',
+                 write_index=None):
+        TypeManagerV2.__init__(self, es, index=index, refresh=refresh,
+                               write_index=write_index)
+
+    def get_search_index(self, search):
+        """
+        With monthly indices, a search bounded by time_after only reads
+        the indices of the months since then: backups are registered
+        after they are taken, so none of them can be in an older index.
+        The month before is read too, as the write alias is only moved
+        when the indices are rotated. Indices created by a reindex
+        (<index>-backups-NNNNNN) are always read.
+        """
+        if not self.write_index or 'time_after' not in search:
+            return self.index
+        first = datetime.datetime.fromtimestamp(
+            int(search['time_after']), datetime.timezone.utc).replace(
+            day=1, tzinfo=None)
+        first -= datetime.timedelta(days=1)
+        months = db_mappings.get_months(first, timeutils.utcnow())
+        if len(months) > MAX_SEARCH_INDICES:
+            return self.index
+        indices = [db_mappings.get_monthly_index(self.index, month)
+                   for month in months]
+        indices.append('{0}-0*'.format(self.index))
+        return ','.join(indices)
 
     @staticmethod
     def get_search_query(project_id, doc_id, user_id=None, all_projects=False,
@@ -211,8 +592,12 @@ class BackupTypeManagerV2(TypeManagerV2):
 
 
 class ClientTypeManagerV2(TypeManagerV2):
-    def __init__(self, es, index='freezer'):
-        TypeManagerV2.__init__(self, es, index=index)
+    indexed_by_id = False
+    id_field = 'client.client_id'
+    doc_type = 'clients'
+
+    def __init__(self, es, index='freezer', refresh='wait_for'):
+        TypeManagerV2.__init__(self, es, index=index, refresh=refresh)
 
     @staticmethod
     def get_search_query(project_id, doc_id, user_id=None, all_projects=False,
@@ -231,8 +616,11 @@ class ClientTypeManagerV2(TypeManagerV2):
 
 
 class JobTypeManagerV2(TypeManagerV2):
-    def __init__(self, es, index='freezer'):
-        TypeManagerV2.__init__(self, es, index=index)
+    id_field = 'job_id'
+    doc_type = 'jobs'
+
+    def __init__(self, es, index='freezer', refresh='wait_for'):
+        TypeManagerV2.__init__(self, es, index=index, refresh=refresh)
 
     @staticmethod
     def get_search_query(project_id, doc_id, user_id=None, all_projects=False,
@@ -255,9 +643,9 @@ class JobTypeManagerV2(TypeManagerV2):
         update_doc = {"doc": job_update_doc}
         try:
             res = self.es.update(index=self.index,
-                                 id=job_id, body=update_doc)
+                                 id=job_id, body=update_doc,
+                                 refresh=self.refresh)
             version = res['_version']
-            self.es.indices.refresh(index=self.index)
         except elasticsearch.ConflictError as e:
             raise freezer_api_exc.DocumentExists(message=str(e))
         except elasticsearch.NotFoundError:
@@ -271,8 +659,11 @@ class JobTypeManagerV2(TypeManagerV2):
 
 
 class ActionTypeManagerV2(TypeManagerV2):
-    def __init__(self, es, index='freezer'):
-        TypeManagerV2.__init__(self, es, index=index)
+    id_field = 'action_id'
+    doc_type = 'actions'
+
+    def __init__(self, es, index='freezer', refresh='wait_for'):
+        TypeManagerV2.__init__(self, es, index=index, refresh=refresh)
 
     @staticmethod
     def get_search_query(project_id, doc_id, user_id=None, all_projects=False,
@@ -295,9 +686,9 @@ class ActionTypeManagerV2(TypeManagerV2):
         update_doc = {"doc": action_update_doc}
         try:
             res = self.es.update(index=self.index,
-                                 id=action_id, body=update_doc)
+                                 id=action_id, body=update_doc,
+                                 refresh=self.refresh)
             version = res['_version']
-            self.es.indices.refresh(index=self.index)
         except elasticsearch.ConflictError as e:
             raise freezer_api_exc.DocumentExists(message=str(e))
         except elasticsearch.NotFoundError:
@@ -312,8 +703,11 @@ class ActionTypeManagerV2(TypeManagerV2):
 
 
 class SessionTypeManagerV2(TypeManagerV2):
-    def __init__(self, es, index='freezer'):
-        TypeManagerV2.__init__(self, es, index=index)
+    id_field = 'session_id'
+    doc_type = 'sessions'
+
+    def __init__(self, es, index='freezer', refresh='wait_for'):
+        TypeManagerV2.__init__(self, es, index=index, refresh=refresh)
 
     @staticmethod
     def get_search_query(project_id, doc_id, user_id=None, all_projects=False,
@@ -336,9 +730,9 @@ class SessionTypeManagerV2(TypeManagerV2):
         update_doc = {"doc": session_update_doc}
         try:
             res = self.es.update(index=self.index,
-                                 id=session_id, body=update_doc)
+                                 id=session_id, body=update_doc,
+                                 refresh=self.refresh)
             version = res['_version']
-            self.es.indices.refresh(index=self.index)
         except elasticsearch.ConflictError as e:
             raise freezer_api_exc.DocumentExists(message=str(e))
         except elasticsearch.NotFoundError:
@@ -375,16 +769,83 @@ class ElasticSearchEngineV2(object):
                 raise Exception("File not found: ca_certs file ({0}) not "
                                 "found".format(self.conf.get('ca_certs')))
 
-    def init(self, index='freezer', **kwargs):
+    def init(self, index='freezer', refresh='wait_for', index_per_type=False,
+             monthly_backup_indices=False, **kwargs):
         self.index = index
+        self.refresh = refresh
         self.es = elasticsearch.Elasticsearch(**kwargs)
         logging.info('Storage backend: Elasticsearch at'
                      ' {0}'.format(kwargs['hosts']))
-        self.backup_manager = BackupTypeManagerV2(self.es, self.index)
-        self.client_manager = ClientTypeManagerV2(self.es, self.index)
-        self.job_manager = JobTypeManagerV2(self.es, self.index)
-        self.action_manager = ActionTypeManagerV2(self.es, self.index)
-        self.session_manager = SessionTypeManagerV2(self.es, self.index)
+
+        def type_index(doc_type):
+            if index_per_type:
+                return db_mappings.get_type_index(index, doc_type)
+            return index
+
+        if monthly_backup_indices:
+            backups_alias = db_mappings.get_type_index(index, 'backups')
+            self.backup_manager = BackupTypeManagerV2(
+                self.es, backups_alias, refresh,
+                write_index=db_mappings.get_write_alias(backups_alias))
+        else:
+            self.backup_manager = BackupTypeManagerV2(
+                self.es, type_index('backups'), refresh)
+        self.client_manager = ClientTypeManagerV2(
+            self.es, type_index('clients'), refresh)
+        self.job_manager = JobTypeManagerV2(
+            self.es, type_index('jobs'), refresh)
+        self.action_manager = ActionTypeManagerV2(
+            self.es, type_index('actions'), refresh)
+        self.session_manager = SessionTypeManagerV2(
+            self.es, type_index('sessions'), refresh)
+
+    def _indices(self):
+        """Indices (or aliases) holding the documents, without duplicates"""
+        indices = []
+        for manager in (self.backup_manager, self.client_manager,
+                        self.job_manager, self.action_manager,
+                        self.session_manager):
+            if manager.index not in indices:
+                indices.append(manager.index)
+        return indices
+
+    def _manager(self, doc_type):
+        managers = {'backups': self.backup_manager,
+                    'clients': self.client_manager,
+                    'jobs': self.job_manager,
+                    'actions': self.action_manager,
+                    'sessions': self.session_manager}
+        if doc_type not in managers:
+            raise freezer_api_exc.BadDataFormat(
+                message='Unknown document type {0}'.format(doc_type))
+        return managers[doc_type]
+
+    def scan(self, doc_type, project_id=None, all_projects=False,
+             search=None, page_size=1000, point_in_time=False):
+        """
+        Yields every document of doc_type ('backups', 'clients', 'jobs',
+        'actions' or 'sessions') of the project, or of all projects, with
+        search_after pagination. Meant for exports and other large walks
+        that from/size pagination cannot reach.
+        """
+        return self._manager(doc_type).scan(project_id=project_id,
+                                            all_projects=all_projects,
+                                            search=search,
+                                            page_size=page_size,
+                                            point_in_time=point_in_time)
+
+    def scan_pages(self, doc_type, project_id=None, all_projects=False,
+                   search=None, page_size=1000, search_after=None):
+        """
+        Yields (documents, cursor) for each page of the documents of
+        doc_type. Passing the last cursor back as search_after resumes an
+        interrupted walk.
+        """
+        return self._manager(doc_type).scan_pages(project_id=project_id,
+                                                  all_projects=all_projects,
+                                                  search=search,
+                                                  page_size=page_size,
+                                                  search_after=search_after)
 
     def get_backup(self, backup_id, project_id=None):
         return self.backup_manager.get(
@@ -400,6 +861,10 @@ class ElasticSearchEngineV2(object):
                                           offset=offset,
                                           limit=limit)
 
+    def iter_backup(self, offset=0, limit=10, search=None, project_id=None):
+        return iter(self.search_backup(offset=offset, limit=limit,
+                                       search=search, project_id=project_id))
+
     def add_backup(self, project_id, user_id, doc):
         # raises if data is malformed (HTTP_400) or already present (HTTP_409)
         backup_metadata_doc = utils.BackupMetadataDoc(
@@ -420,25 +885,20 @@ class ElasticSearchEngineV2(object):
                                           user_id=user_id)
 
     def update_backup(self, user_id, backup_id, patch_doc, project_id=None):
-        backup = self.get_backup(project_id, backup_id)
-        if not backup:
-            raise freezer_api_exc.DocumentNotFound(
-                message=f'Backup not registered with ID {backup_id}')
         valid_patch = utils.BackupMetadataDoc.create_patch(patch_doc)
-        existing_metadata = backup.get('backup_metadata', {})
         patch_metadata = valid_patch.get('backup_metadata', {})
-        if isinstance(patch_metadata, dict):
-            existing_metadata.update(patch_metadata)
-
-        status = valid_patch.get('status', backup.get('status', 'available'))
-        doc_body = {
-            'status': status,
-            'backup_metadata': existing_metadata
-        }
-        if 'job_id' in existing_metadata:
-            doc_body['job_id'] = existing_metadata['job_id']
-
-        self.backup_manager.update(backup_id, doc_body)
+        if not isinstance(patch_metadata, dict):
+            patch_metadata = {}
+        params = {'project_id': project_id,
+                  'status': valid_patch.get('status'),
+                  'backup_metadata': patch_metadata}
+        # backup_metadata is merged server side, in one request
+        try:
+            self.backup_manager.script_update(backup_id, BACKUP_PATCH_SCRIPT,
+                                              params)
+        except freezer_api_exc.DocumentNotFound:
+            raise freezer_api_exc.DocumentNotFound(
+                message=f'Backup not registered with ID {backup_id}')
         LOG.info('Backup updated, backup_id: {0}'.format(backup_id))
         return backup_id
 
@@ -451,6 +911,10 @@ class ElasticSearchEngineV2(object):
                                           offset=offset,
                                           limit=limit)
 
+    def iter_client(self, project_id, offset=0, limit=10, search=None):
+        return iter(self.get_client(project_id, offset=offset, limit=limit,
+                                    search=search))
+
     def add_client(self, project_id, user_id, doc):
         client_doc = utils.ClientDoc.create(doc, project_id, user_id)
         client_id = client_doc['client']['client_id']
@@ -464,7 +928,7 @@ class ElasticSearchEngineV2(object):
             all_projects=is_central  # Consistency with SQLAlchemy
         )
         try:
-            res = self.es.search(index=self.index,
+            res = self.es.search(index=self.client_manager.index,
                                  body=query_dsl)
             hits = res['hits']['hits']
         except Exception as e:
@@ -542,6 +1006,12 @@ class ElasticSearchEngineV2(object):
                                        offset=offset,
                                        limit=limit)
 
+    def iter_job(self, project_id, all_projects=False,
+                 offset=0, limit=10, search=None):
+        return iter(self.search_job(project_id, all_projects=all_projects,
+                                    offset=offset, limit=limit,
+                                    search=search))
+
     def add_job(self, user_id, doc, project_id):
         jobdoc = utils.JobDoc.create(doc, project_id, user_id)
         job_id = jobdoc['job_id']
@@ -623,6 +1093,10 @@ class ElasticSearchEngineV2(object):
                                           offset=offset,
                                           limit=limit)
 
+    def iter_action(self, offset=0, limit=10, search=None, project_id=None):
+        return iter(self.search_action(offset=offset, limit=limit,
+                                       search=search, project_id=project_id))
+
     def add_action(self, user_id, doc, project_id):
         actiondoc = utils.ActionDoc.create(doc, user_id, project_id)
         action_id = actiondoc['action_id']
@@ -630,6 +1104,29 @@ class ElasticSearchEngineV2(object):
         logging.info('Action registered, action id: {0}'.format(action_id))
         return action_id
 
+    def add_actions(self, user_id, docs, project_id):
+        """
+        Registers several actions, such as the inline actions of a job,
+        with bulk requests. Every document is validated before anything is
+        sent.
+        Returns the list of the action ids.
+        """
+        actions = []
+        for doc in docs:
+            actiondoc = utils.ActionDoc.create(doc, user_id, project_id)
+            actions.append((actiondoc['action_id'], actiondoc))
+        self.action_manager.bulk_insert(actions)
+        logging.info('{0} action(s) registered'.format(len(actions)))
+        return [action_id for action_id, _doc in actions]
+
+    def find_identical_action(self, doc, project_id):
+        """
+        Actions stored in elasticsearch carry no freezer_action hash, so
+        identical actions are not looked up and inline actions are always
+        stored as new documents.
+        """
+        return None
+
     def delete_action(self, user_id, action_id, project_id):
         return self.action_manager.delete(user_id=user_id,
                                           doc_id=action_id,
@@ -680,6 +1177,10 @@ class ElasticSearchEngineV2(object):
                                            offset=offset,
                                            limit=limit)
 
+    def iter_session(self, offset=0, limit=10, search=None, project_id=None):
+        return iter(self.search_session(offset=offset, limit=limit,
+                                        search=search, project_id=project_id))
+
     def add_session(self, user_id, doc, project_id):
         session_doc = utils.SessionDoc.create(doc=doc,
                                               user_id=user_id,
@@ -696,12 +1197,13 @@ class ElasticSearchEngineV2(object):
 
     def update_session(self, user_id, session_id, patch_doc, project_id):
         valid_patch = utils.SessionDoc.create_patch(patch_doc)
+        valid_patch.pop('_version', None)
+        valid_patch.pop('project_id', None)
 
-        # check that document exists
-        assert (self.session_manager.get(doc_id=session_id,
-                                         project_id=project_id))
-
-        version = self.session_manager.update(session_id, valid_patch)
+        # the patch is merged server side, in one request
+        version = self.session_manager.script_update(
+            session_id, MERGE_PATCH_SCRIPT,
+            {'project_id': project_id, 'patch': valid_patch})
         logging.info('Session {0} updated to version'
                      ' {1}'.format(session_id, version))
         return version
@@ -725,3 +1227,43 @@ class ElasticSearchEngineV2(object):
             logging.info('Session {0} replaced with version'
                          ' {1}'.format(session_id, version))
         return version
+
+    def purge_project(self, project_id, hard_delete=False, batch_size=1000,
+                      progress=None):
+        """
+        Deletes every document of a project with a single delete_by_query
+        call, processed server side in scroll batches of batch_size.
+        Elasticsearch documents are never soft-deleted, so hard_delete
+        makes no difference. Version conflicts are skipped, running the
+        purge again resumes it.
+        """
+        try:
+            # delete_by_query only takes a boolean refresh, wait_for is
+            # honoured by refreshing the affected shards
+            result = self.es.delete_by_query(
+                index=','.join(self._indices()),
+                query={'term': {'project_id': project_id}},
+                conflicts='proceed',
+                scroll_size=batch_size,
+                refresh=self.refresh != 'false')
+        except Exception as e:
+            raise freezer_api_exc.StorageEngineError(
+                message='Purge operation failed: {0}'.format(e))
+        deleted = result.get('deleted', 0)
+        if progress:
+            progress(self.index, deleted)
+        logging.info('Project {0} purged, {1} document(s) deleted'.format(
+            project_id, deleted))
+        return {self.index: deleted}
+
+    def archive_deleted(self, before, batch_size=1000, progress=None):
+        """
+        Documents stored in elasticsearch are deleted right away, never
+        soft-deleted, so there is nothing to archive.
+        """
+        return {}
+
+    def pool_statistics(self):
+        raise freezer_api_exc.MethodNotImplemented(
+            message='Connection pool statistics are only available with '
+                    'the sqlalchemy driver')
@@ -0,0 +1,84 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""Fixtures of the API benchmarks.
+
+The benchmarks build the real application with ``build_app_v2`` and serve
+it in process with the falcon test client, against a SQLite database file
+of a temporary directory or the database of ``--db-url``, seeded with
+``--seed-jobs`` jobs per project before the first benchmark runs. They
+require pytest-benchmark and only run with ``--benchmark-only``, e.g.::
+
+    tox -e benchmark
+    tox -e benchmark -- --db-url mysql+pymysql://freezer:pw@localhost/bench
+    tox -e benchmark -- --benchmark-compare --benchmark-compare-fail=mean:10%
+
+The results of each run are saved as JSON under ``.benchmarks``.
+"""
+
+import os
+
+from oslo_config import cfg
+from oslo_db import options as db_options
+import pytest
+
+from freezer_api.cmd import api
+from freezer_api.common import config
+from freezer_api.db.sqlalchemy import api as sqla_api
+from freezer_api.db.sqlalchemy import models
+from freezer_api import policy
+from freezer_api.tests.benchmarks import data
+
+CONF = cfg.CONF
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('freezer-api benchmarks')
+    group.addoption('--db-url',
+                    default=os.environ.get('FREEZER_API_BENCHMARK_DB_URL'),
+                    help='SQLAlchemy URL of an empty database to benchmark '
+                         'against instead of a temporary SQLite file. Its '
+                         'tables are dropped at the end of the run.')
+    group.addoption('--seed-jobs', type=int, default=1000,
+                    help='Number of jobs of each project seeded before the '
+                         'benchmarks run, with as many sessions and ten '
+                         'times as many backups.')
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption('benchmark_only', default=False):
+        return
+    skip = pytest.mark.skip(reason='benchmarks only run with --benchmark-only')
+    for item in items:
+        if 'benchmarks' in item.nodeid:
+            item.add_marker(skip)
+
+
+@pytest.fixture(scope='session')
+def seeded(request, tmp_path_factory):
+    """Project seeded for the benchmarks, served by the real application"""
+    db_url = request.config.getoption('db_url') or 'sqlite:///{0}'.format(
+        tmp_path_factory.mktemp('db') / 'freezer.db')
+    config.parse_args(args=[])
+    db_options.set_defaults(CONF, connection=db_url)
+    # no keystone to create trusts for the jobs
+    CONF.set_override('enabled', False, group='centralized_scheduler')
+    engine = sqla_api.get_engine()
+    models.register_models(engine)
+    policy.ENFORCER = None
+    app = api.build_app_v2()
+    volumes = data.seed(sqla_api, request.config.getoption('seed_jobs'))
+    yield data.Benchmarked(app, engine.dialect.name,
+                           volumes)
+    models.unregister_models(engine)
+    engine.dispose()
+    CONF.reset()
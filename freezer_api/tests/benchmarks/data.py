@@ -0,0 +1,188 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""Documents of the benchmarks and seeding of their database."""
+
+import itertools
+import json
+
+from falcon import testing
+
+PROJECT_ID = 'benchmark-project'
+# seeded as well, to be filtered out by every query
+OTHER_PROJECT_ID = 'benchmark-other-project'
+USER_ID = 'benchmark-user'
+
+CLIENTS_PER_PROJECT = 50
+BACKUPS_PER_JOB = 10
+
+HEADERS = {
+    'X-User-Id': USER_ID,
+    'X-Tenant-Id': PROJECT_ID,
+    'X-Roles': 'member,reader',
+    'Content-Type': 'application/json',
+}
+
+_counter = itertools.count()
+
+
+def unique(prefix):
+    return '{0}-{1}'.format(prefix, next(_counter))
+
+
+def client_doc(client_id):
+    return {
+        'client_id': client_id,
+        'hostname': client_id,
+        'description': 'benchmark client',
+        'supported_actions': ['backup', 'restore'],
+        'supported_modes': ['fs', 'mysql'],
+        'supported_storages': ['swift', 'local'],
+        'supported_engines': ['tar'],
+    }
+
+
+def action_doc(number):
+    return {
+        'freezer_action': {
+            'action': 'backup',
+            'mode': 'fs',
+            'path_to_backup': '/var/lib/data/{0}'.format(number),
+            'backup_name': 'backup-{0}'.format(number),
+            'container': 'benchmark-container',
+            'storage': 'swift',
+            'max_level': 7,
+        },
+        'max_retries': 3,
+        'max_retries_interval': 60,
+        'mandatory': number == 0,
+    }
+
+
+def job_doc(client_id, actions=2):
+    return {
+        'client_id': client_id,
+        'description': 'benchmark job',
+        'job_actions': [action_doc(number) for number in range(actions)],
+        'job_schedule': {
+            'status': 'scheduled',
+            'schedule_interval': '1 days',
+            'schedule_start_date': '2026-01-01T00:00:00',
+        },
+    }
+
+
+def backup_doc(client_id, number):
+    return {
+        'container': 'benchmark-container',
+        'hostname': client_id,
+        'backup_name': 'backup-{0}'.format(number % 10),
+        'time_stamp': 1700000000 + number,
+        'curr_backup_level': number % 7,
+        'backup_session': 1700000000 + number - number % 7,
+        'max_level': 7,
+        'mode': 'fs',
+        'fs_real_path': '/var/lib/data',
+        'total_fs_files': 1000 + number,
+        'total_directories': 50,
+        'backup_size_uncompressed': 2 ** 30,
+        'backup_size_compressed': 2 ** 29,
+        'compression_alg': 'gzip',
+        'encrypted': False,
+        'client_os': 'linux',
+        'status': 'available' if number % 5 else 'error',
+        'cli': '',
+    }
+
+
+def session_doc():
+    return {
+        'description': 'benchmark session',
+        'hold_off': 0,
+        'schedule': {
+            'status': 'scheduled',
+            'schedule_interval': '1 days',
+        },
+    }
+
+
+class Response(object):
+    def __init__(self, status, body):
+        self.status_code = int(status.split(' ', 1)[0])
+        self.text = body.decode('utf-8')
+
+    @property
+    def json(self):
+        return json.loads(self.text)
+
+
+class Benchmarked(object):
+    """Application under benchmark and the seeded volumes.
+
+    The application is called as a WSGI server would, without the
+    validation of the falcon test client.
+    """
+
+    def __init__(self, app, dialect, volumes):
+        self.app = app
+        self.dialect = dialect
+        self.volumes = volumes
+
+    def request(self, method, path, body=None, expected=200):
+        path, _, query_string = path.partition('?')
+        environ = testing.create_environ(
+            path='/{0}{1}'.format(PROJECT_ID, path),
+            query_string=query_string, method=method, headers=HEADERS,
+            body=json.dumps(body) if body is not None else '')
+        statuses = []
+
+        def start_response(status, headers, exc_info=None):
+            statuses.append(status)
+
+        chunks = self.app(environ, start_response)
+        try:
+            response = Response(statuses[0], b''.join(chunks))
+        finally:
+            if hasattr(chunks, 'close'):
+                chunks.close()
+        assert response.status_code == expected, response.text
+        return response
+
+
+def seed(db, jobs):
+    """Add jobs, their clients, backups and sessions to two projects"""
+    volumes = {}
+    for project_id in (PROJECT_ID, OTHER_PROJECT_ID):
+        client_ids = []
+        for number in range(CLIENTS_PER_PROJECT):
+            client_ids.append(db.add_client(
+                user_id=USER_ID, project_id=project_id,
+                doc=client_doc('{0}-host-{1}'.format(project_id, number))))
+        job_ids = []
+        for number in range(jobs):
+            client_id = client_ids[number % len(client_ids)]
+            job_ids.append(db.add_job(user_id=USER_ID, project_id=project_id,
+                                      doc=job_doc(client_id)))
+            for backup in range(BACKUPS_PER_JOB):
+                backup_number = number * BACKUPS_PER_JOB + backup
+                db.add_backup(user_id=USER_ID, project_id=project_id,
+                              doc=backup_doc(client_id, backup_number))
+            db.add_session(user_id=USER_ID, project_id=project_id,
+                           doc=session_doc())
+        volumes[project_id] = {'clients': client_ids, 'jobs': job_ids}
+    return {
+        'clients': volumes[PROJECT_ID]['clients'],
+        'jobs': volumes[PROJECT_ID]['jobs'],
+        'jobs_per_project': jobs,
+        'backups_per_project': jobs * BACKUPS_PER_JOB,
+        'sessions_per_project': jobs,
+    }
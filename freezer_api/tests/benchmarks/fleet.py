@@ -0,0 +1,334 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""Fleet of simulated freezer-scheduler agents.
+
+Each agent registers its client, creates its jobs and a session holding
+them, then loops as a scheduler does: it polls its jobs, and for each of
+them sends the start event, starts it in the session, posts the backup it
+made, ends it in the session and sends the stop event. The agents wait a
+poll interval between their loops and a job time while a job runs, both
+with a random jitter of 50%.
+
+The fleet runs against a freezer-api served by ``freezer-api`` or uwsgi,
+on the SQLite or MySQL database of its configuration. Without keystone,
+the ``/`` of the ``main`` composite of the paste configuration is the
+``unauthenticated_api`` pipeline and the agents send the identity headers
+keystonemiddleware would set::
+
+    freezer-manage db sync
+    freezer-api &
+    python -m freezer_api.tests.benchmarks.fleet --agents 100 --duration 300
+
+Behind keystone, the agents send the token of ``--token`` instead, for the
+project of ``--project-id``. The fleet reports the throughput, the latency
+percentiles and the error rate of each operation, and exits with 1 when a
+request failed.
+"""
+
+import argparse
+import http.client
+import json
+import math
+import os
+import random
+import sys
+import threading
+import time
+from urllib import parse
+import uuid
+
+from freezer_api.tests.benchmarks import data
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+def percentile(ordered, percent):
+    """Nearest-rank percentile of a sorted list"""
+    if not ordered:
+        return 0.0
+    rank = math.ceil(percent / 100.0 * len(ordered))
+    return ordered[min(max(rank, 1), len(ordered)) - 1]
+
+
+class Stats(object):
+    """Latencies and errors of the requests of every agent"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latencies = {}
+        self._errors = {}
+
+    def record(self, operation, seconds, ok):
+        with self._lock:
+            self._latencies.setdefault(operation, []).append(seconds)
+            if not ok:
+                self._errors[operation] = self._errors.get(operation, 0) + 1
+
+    def report(self, seconds):
+        """Throughput, latency percentiles in ms and error rates"""
+        seconds = max(seconds, 0.001)
+        with self._lock:
+            latencies = {operation: sorted(values)
+                         for operation, values in self._latencies.items()}
+            errors = dict(self._errors)
+        operations = {}
+        for operation, ordered in sorted(latencies.items()):
+            count = len(ordered)
+            failed = errors.get(operation, 0)
+            summary = {
+                'requests': count,
+                'errors': failed,
+                'error_rate': round(failed / count, 4),
+                'throughput': round(count / seconds, 2),
+                'max_ms': round(ordered[-1] * 1000, 2),
+            }
+            for percent in PERCENTILES:
+                summary['p{0}_ms'.format(percent)] = round(
+                    percentile(ordered, percent) * 1000, 2)
+            operations[operation] = summary
+        requests = sum(len(values) for values in latencies.values())
+        failed = sum(errors.values())
+        return {
+            'seconds': round(seconds, 3),
+            'requests': requests,
+            'errors': failed,
+            'error_rate': round(failed / requests, 4) if requests else 0.0,
+            'throughput': round(requests / seconds, 2),
+            'operations': operations,
+        }
+
+
+def format_report(report):
+    columns = ['requests', 'errors', 'throughput'] + [
+        'p{0}_ms'.format(percent) for percent in PERCENTILES] + ['max_ms']
+    lines = ['{0:<16}'.format('operation') + ''.join(
+        '{0:>12}'.format(column) for column in columns)]
+    for operation, summary in report['operations'].items():
+        lines.append('{0:<16}'.format(operation) + ''.join(
+            '{0:>12}'.format(summary[column]) for column in columns))
+    lines.append('{0} request(s) in {1}s: {2} req/s, {3} error(s), '
+                 'error rate {4:.2%}'.format(
+                     report['requests'], report['seconds'],
+                     report['throughput'], report['errors'],
+                     report['error_rate']))
+    return '\n'.join(lines)
+
+
+class Agent(threading.Thread):
+    """Simulated freezer-scheduler, with a connection of its own"""
+
+    def __init__(self, number, options, stats, stopping):
+        super(Agent, self).__init__(name='agent-{0}'.format(number),
+                                    daemon=True)
+        self.options = options
+        self.stats = stats
+        self.stopping = stopping
+        self.random = random.Random('{0}-{1}'.format(options.seed, number))
+        self.project_id = options.project_id or '{0}-project-{1}'.format(
+            options.prefix, number % options.projects)
+        self.client_id = '{0}-agent-{1}'.format(options.prefix, number)
+        self.job_ids = []
+        self.session_id = None
+        self.session_tag = 0
+        self.backups = 0
+        url = parse.urlsplit(options.url)
+        self._connection_class = (http.client.HTTPSConnection
+                                  if url.scheme == 'https'
+                                  else http.client.HTTPConnection)
+        self._netloc = url.netloc
+        self._root = '{0}/v2/{1}'.format(url.path.rstrip('/'),
+                                         self.project_id)
+        self._connection = None
+        self.headers = {'Content-Type': 'application/json',
+                        'Accept': 'application/json'}
+        if options.token:
+            self.headers['X-Auth-Token'] = options.token
+        else:
+            # what keystonemiddleware would have set
+            self.headers.update({'X-Identity-Status': 'Confirmed',
+                                 'X-User-Id': options.user_id,
+                                 'X-Tenant-Id': self.project_id,
+                                 'X-Roles': options.roles})
+
+    def request(self, operation, method, path, body=None, expected=200):
+        """Timed request, the decoded response or None on errors"""
+        if self._connection is None:
+            self._connection = self._connection_class(
+                self._netloc, timeout=self.options.timeout)
+        payload = json.dumps(body) if body is not None else None
+        started = time.monotonic()
+        try:
+            self._connection.request(method, self._root + path,
+                                     body=payload, headers=self.headers)
+            response = self._connection.getresponse()
+            content = response.read()
+        except (OSError, http.client.HTTPException):
+            self.stats.record(operation, time.monotonic() - started, False)
+            self._connection.close()
+            self._connection = None
+            return None
+        ok = response.status == expected
+        self.stats.record(operation, time.monotonic() - started, ok)
+        if not ok:
+            return None
+        return json.loads(content) if content else {}
+
+    def think(self, seconds):
+        """Wait seconds with a jitter, False when the fleet stops"""
+        return not self.stopping.wait(
+            seconds * self.random.uniform(0.5, 1.5))
+
+    def setup(self):
+        client = data.client_doc(self.client_id)
+        if self.request('register_client', 'POST', '/clients', client,
+                        expected=201) is None:
+            return False
+        for _ in range(self.options.jobs_per_agent):
+            job = self.request('create_job', 'POST', '/jobs',
+                               data.job_doc(self.client_id), expected=201)
+            if job is None:
+                return False
+            self.job_ids.append(job['job_id'])
+        session = self.request('create_session', 'POST', '/sessions',
+                               data.session_doc(), expected=201)
+        if session is None:
+            return False
+        self.session_id = session['session_id']
+        for job_id in self.job_ids:
+            self.request('add_session_job', 'PUT', '/sessions/{0}/jobs/{1}'
+                         .format(self.session_id, job_id), expected=204)
+        return True
+
+    def run_job(self, job_id):
+        action = '/sessions/{0}/action'.format(self.session_id)
+        event = '/jobs/{0}/event'.format(job_id)
+        self.request('job_event', 'POST', event, {'start': None},
+                     expected=202)
+        started = self.request('session_start', 'POST', action, {
+            'start': {'job_id': job_id, 'current_tag': self.session_tag}},
+            expected=202)
+        if started is not None:
+            self.session_tag = started['session_tag']
+        finished = self.think(self.options.job_time)
+        backup = data.backup_doc(self.client_id, self.backups)
+        backup['backup_name'] = job_id
+        self.backups += 1
+        self.request('post_backup', 'POST', '/backups', backup, expected=201)
+        self.request('session_end', 'POST', action, {
+            'end': {'job_id': job_id, 'result': 'success'}}, expected=202)
+        self.request('job_event', 'POST', event, {'stop': None},
+                     expected=202)
+        return finished
+
+    def cycle(self):
+        """One loop of the scheduler, False when the fleet stops"""
+        search = {'match': [{'client_id': self.client_id}]}
+        polled = self.request('poll_jobs', 'GET', '/jobs?limit=100', search)
+        for job in (polled or {}).get('jobs', []):
+            if not self.run_job(job['job_id']):
+                return False
+        return self.think(self.options.poll_interval)
+
+    def run(self):
+        try:
+            if not self.setup():
+                return
+            while self.cycle():
+                pass
+        finally:
+            if self._connection is not None:
+                self._connection.close()
+
+
+def run_fleet(options, stats=None):
+    """Run the agents for options.duration seconds, their report"""
+    stats = stats or Stats()
+    stopping = threading.Event()
+    agents = [Agent(number, options, stats, stopping)
+              for number in range(options.agents)]
+    started = time.monotonic()
+    for agent in agents:
+        agent.start()
+        if stopping.wait(options.ramp_up / max(len(agents), 1)):
+            break
+    stopping.wait(max(options.duration - (time.monotonic() - started), 0))
+    stopping.set()
+    for agent in agents:
+        agent.join(options.timeout + options.job_time * 1.5)
+    report = stats.report(time.monotonic() - started)
+    report['agents'] = options.agents
+    return report
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Simulate freezer-scheduler agents against a '
+                    'running freezer-api')
+    parser.add_argument('--url', default='http://127.0.0.1:9090',
+                        help='Endpoint of the API, without the version')
+    parser.add_argument('--agents', type=int, default=10,
+                        help='Number of simulated agents')
+    parser.add_argument('--duration', type=float, default=60,
+                        help='Seconds the agents run for')
+    parser.add_argument('--ramp-up', type=float, default=0,
+                        help='Seconds over which the agents are started')
+    parser.add_argument('--poll-interval', type=float, default=5,
+                        help='Seconds an agent waits between two polls of '
+                             'its jobs')
+    parser.add_argument('--job-time', type=float, default=1,
+                        help='Seconds a job runs between its start and end')
+    parser.add_argument('--jobs-per-agent', type=int, default=2,
+                        help='Jobs created for each agent')
+    parser.add_argument('--projects', type=int, default=1,
+                        help='Projects the agents are spread over, without '
+                             'keystone')
+    parser.add_argument('--project-id',
+                        help='Project of every agent, that of the token with '
+                             'keystone')
+    parser.add_argument('--user-id', default=data.USER_ID,
+                        help='User of the requests, without keystone')
+    parser.add_argument('--roles', default='member,reader',
+                        help='Roles of the requests, without keystone')
+    parser.add_argument('--token', default=os.environ.get('OS_AUTH_TOKEN'),
+                        help='Keystone token of the requests, defaults to '
+                             'env[OS_AUTH_TOKEN]')
+    parser.add_argument('--prefix', default='fleet-{0}'.format(
+                        uuid.uuid4().hex[:8]),
+                        help='Prefix of the client and project ids, unique '
+                             'per run by default')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Seed of the random think times')
+    parser.add_argument('--timeout', type=float, default=30,
+                        help='Seconds before a request times out')
+    parser.add_argument('--json', dest='json_file',
+                        help='File the JSON report is written to')
+    options = parser.parse_args(argv)
+    if options.token and not options.project_id:
+        parser.error('--project-id is required with a token')
+    if options.agents < 1 or options.projects < 1:
+        parser.error('--agents and --projects must be positive')
+    return options
+
+
+def main(argv=None):
+    options = parse_args(argv)
+    report = run_fleet(options)
+    print(format_report(report))
+    if options.json_file:
+        with open(options.json_file, 'w') as json_file:
+            json.dump(report, json_file, indent=4, sort_keys=True)
+    return 1 if report['errors'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,95 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""Latency and throughput of the hot API paths.
+
+pytest-benchmark reports the latency statistics of each path and its
+throughput as operations per second.
+"""
+
+import pytest
+
+from freezer_api.tests.benchmarks import data
+
+
+@pytest.fixture
+def api(seeded, benchmark):
+    benchmark.extra_info['dialect'] = seeded.dialect
+    benchmark.extra_info['jobs_per_project'] = \
+        seeded.volumes['jobs_per_project']
+    return seeded
+
+
+@pytest.mark.parametrize('limit', [10, 100])
+def test_list_jobs(benchmark, api, limit):
+    result = benchmark(api.request, 'GET', '/jobs?limit={0}'.format(limit))
+    assert len(result.json['jobs']) == min(
+        limit, api.volumes['jobs_per_project'])
+
+
+def test_search_jobs(benchmark, api):
+    client_id = api.volumes['clients'][0]
+    search = {'match': [{'client_id': client_id}]}
+    result = benchmark(api.request, 'GET', '/jobs?limit=100', body=search)
+    assert result.json['jobs']
+    assert all(job['client_id'] == client_id for job in result.json['jobs'])
+
+
+@pytest.mark.parametrize('actions', [1, 10])
+def test_create_job(benchmark, api, actions):
+    doc = data.job_doc(api.volumes['clients'][0], actions=actions)
+    benchmark(api.request, 'POST', '/jobs', body=doc, expected=201)
+
+
+def test_register_backup(benchmark, api):
+    client_id = api.volumes['clients'][0]
+
+    def register():
+        doc = data.backup_doc(client_id, 0)
+        doc['backup_name'] = data.unique('backup')
+        return api.request('POST', '/backups', body=doc, expected=201)
+
+    benchmark(register)
+
+
+def test_search_backups(benchmark, api):
+    search = {'match': [{'hostname': api.volumes['clients'][1]},
+                        {'status': 'available'}]}
+    result = benchmark(api.request, 'GET', '/backups?limit=100', body=search)
+    assert result.json['backups']
+
+
+def test_session_start_end(benchmark, api):
+    session_id = api.request('POST', '/sessions', body=data.session_doc(),
+                             expected=201).json['session_id']
+    job_id = api.volumes['jobs'][0]
+    api.request('PUT', '/sessions/{0}/jobs/{1}'.format(session_id, job_id),
+                expected=204)
+    path = '/sessions/{0}/action'.format(session_id)
+
+    def start_end():
+        tag = api.request('GET', '/sessions/{0}'.format(
+            session_id)).json['session_tag']
+        api.request('POST', path, body={
+            'start': {'job_id': job_id, 'current_tag': tag}}, expected=202)
+        api.request('POST', path, body={
+            'end': {'job_id': job_id, 'result': 'success'}}, expected=202)
+
+    benchmark(start_end)
+
+
+def test_register_client(benchmark, api):
+    def register():
+        doc = data.client_doc(data.unique('host'))
+        return api.request('POST', '/clients', body=doc, expected=201)
+
+    benchmark(register)
@@ -10,6 +10,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import datetime
 import sys
 from unittest import mock
 
@@ -71,3 +72,99 @@ class TestFreezerApiCmd(common.FreezerBaseTestCase):
         sys.argv = ["freezer-manage", "db", "show"]
         freezer_manage.main()
         self.assertTrue(db_driver.db_show.called)
+
+    @mock.patch("freezer_api.db.manager.get_db_driver")
+    def test_db_purge_project(self, mock_get_db_driver):
+        db_driver = mock_get_db_driver("sqlalchemy", backend="")
+        db_api = db_driver.get_api.return_value
+        db_api.purge_project.return_value = {'jobs': 2}
+        sys.argv = ["freezer-manage", "db", "purge-project",
+                    "--project-id", "tecs", "--hard-delete",
+                    "--batch-size", "50"]
+        freezer_manage.main()
+        db_api.purge_project.assert_called_once_with(
+            project_id='tecs', hard_delete=True, batch_size=50,
+            progress=mock.ANY)
+
+    @mock.patch("freezer_api.db.manager.get_db_driver")
+    def test_db_purge_project_requires_project_id(self, mock_get_db_driver):
+        db_driver = mock_get_db_driver("sqlalchemy", backend="")
+        sys.argv = ["freezer-manage", "db", "purge-project"]
+        freezer_manage.main()
+        self.assertFalse(db_driver.get_api.return_value.purge_project.called)
+
+    @mock.patch("freezer_api.db.manager.get_db_driver")
+    def test_db_archive_deleted(self, mock_get_db_driver):
+        db_driver = mock_get_db_driver("sqlalchemy", backend="")
+        db_api = db_driver.get_api.return_value
+        db_api.archive_deleted.return_value = {'jobs': 2}
+        sys.argv = ["freezer-manage", "db", "archive-deleted",
+                    "--before", "2024-01-31T12:00:00Z",
+                    "--batch-size", "50"]
+        freezer_manage.main()
+        db_api.archive_deleted.assert_called_once_with(
+            before=datetime.datetime(2024, 1, 31, 12, 0), batch_size=50,
+            progress=mock.ANY)
+
+    @mock.patch("freezer_api.db.manager.get_db_driver")
+    def test_db_partition_backups(self, mock_get_db_driver):
+        db_driver = mock_get_db_driver("sqlalchemy", backend="")
+        db_driver.partition_backups.return_value = ['backups_p202501']
+        sys.argv = ["freezer-manage", "db", "partition-backups",
+                    "--months-ahead", "6"]
+        freezer_manage.main()
+        db_driver.partition_backups.assert_called_once_with(months_ahead=6)
+
+    @mock.patch("freezer_api.db.manager.get_db_driver")
+    def test_db_drop_backup_partitions(self, mock_get_db_driver):
+        db_driver = mock_get_db_driver("sqlalchemy", backend="")
+        db_driver.drop_backup_partitions.return_value = []
+        sys.argv = ["freezer-manage", "db", "drop-backup-partitions",
+                    "--before", "2024-01-01"]
+        freezer_manage.main()
+        db_driver.drop_backup_partitions.assert_called_once_with(
+            before=datetime.datetime(2024, 1, 1))
+
+    @mock.patch("freezer_api.db.manager.get_db_driver")
+    def test_db_migrate_from_elasticsearch(self, mock_get_db_driver):
+        db_driver = mock_get_db_driver.return_value
+        db_driver.migrate_from_elasticsearch.return_value = {
+            'jobs': {'migrated': 2}}
+        sys.argv = ["freezer-manage", "db", "migrate-from-elasticsearch",
+                    "--source-backend", "old_es", "--batch-size", "200",
+                    "--checkpoint-file", "/tmp/freezer-migration.json"]
+        freezer_manage.main()
+        mock_get_db_driver.assert_any_call('elasticsearch', backend='old_es')
+        db_driver.migrate_from_elasticsearch.assert_called_once_with(
+            db_driver.get_api.return_value, batch_size=200,
+            checkpoint_path='/tmp/freezer-migration.json',
+            progress=mock.ANY)
+
+    @mock.patch("freezer_api.db.manager.get_db_driver")
+    def test_db_slow_queries(self, mock_get_db_driver):
+        db_driver = mock_get_db_driver("sqlalchemy", backend="")
+        db_driver.slow_query_report.return_value = []
+        sys.argv = ["freezer-manage", "db", "slow-queries", "--limit", "5"]
+        freezer_manage.main()
+        db_driver.slow_query_report.assert_called_once_with(limit=5)
+
+    @mock.patch("freezer_api.db.manager.get_db_driver")
+    def test_db_generate_fixture(self, mock_get_db_driver):
+        db_driver = mock_get_db_driver("sqlalchemy", backend="")
+        db_driver.generate_fixture.return_value = {'backups': 2000000}
+        sys.argv = ["freezer-manage", "db", "generate-fixture",
+                    "--projects", "50", "--backups", "2000000",
+                    "--skew", "1.2", "--seed", "7"]
+        freezer_manage.main()
+        db_driver.generate_fixture.assert_called_once_with(
+            projects=50, clients=1000, jobs=5000, backups=2000000,
+            sessions=1000, actions_per_job=2, skew=1.2, seed=7, days=365,
+            metadata_size=2048, batch_size=1000, progress=mock.ANY)
+
+    @mock.patch("freezer_api.db.manager.get_db_driver")
+    def test_db_reindex(self, mock_get_db_driver):
+        db_driver = mock_get_db_driver("elasticsearch", backend="")
+        db_driver.db_reindex.return_value = {'backups': 3}
+        sys.argv = ["freezer-manage", "db", "reindex"]
+        freezer_manage.main()
+        self.assertTrue(db_driver.db_reindex.called)
@@ -13,6 +13,8 @@
 import warnings
 
 import fixtures
+from osprofiler import notifier
+from osprofiler import profiler
 from sqlalchemy import exc as sqla_exc
 
 
@@ -54,3 +56,23 @@ class WarningsFixture(fixtures.Fixture):
 
     def _reset_warning_filters(self):
         warnings.filters[:] = self._original_warning_filters
+
+
+class ProfilerFixture(fixtures.Fixture):
+    """Profiles the test, collecting the trace points in memory.
+
+    Each trace point start and stop is appended to ``notifications``.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.notifications = []
+        original_notifier = notifier.get()
+        notifier.set(self.notifications.append)
+        self.addCleanup(notifier.set, original_notifier)
+        profiler.init('secret')
+        self.addCleanup(profiler.clean)
+
+    @property
+    def names(self):
+        return [notification['name'] for notification in self.notifications]
@@ -0,0 +1,194 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Tests for the migration of an Elasticsearch catalog to SQL"""
+
+import copy
+import os
+from unittest import mock
+
+import fixtures
+from oslo_config import cfg
+
+from freezer_api.common import elasticv2_utils as utilsv2
+from freezer_api.db.elasticsearch.driver import ElasticSearchDB
+from freezer_api.db.sqlalchemy import es_migration
+from freezer_api.storage import elasticv2
+from freezer_api.tests.unit import common
+from freezer_api.tests.unit.sqlalchemy import base
+
+CONF = cfg.CONF
+
+
+class FakeElasticsearch(object):
+    """Stand-in for the Elasticsearch engine, paging over lists of docs"""
+
+    def __init__(self, docs, fail_after=None):
+        self.docs = docs
+        self.fail_after = fail_after
+        self.pages = 0
+
+    def scan_pages(self, doc_type, all_projects=False, page_size=1000,
+                   search_after=None):
+        start = search_after[0] if search_after else 0
+        docs = self.docs.get(doc_type, [])
+        while start < len(docs):
+            if self.fail_after is not None and \
+                    self.pages >= self.fail_after:
+                raise Exception('connection lost')
+            self.pages += 1
+            page = docs[start:start + page_size]
+            start += len(page)
+            yield copy.deepcopy(page), [start]
+
+
+class FakeSharedIndex(object):
+    """Stand-in for an Elasticsearch client, every type in one index.
+
+    Searches only evaluate the exists filters telling the types apart.
+    """
+
+    def __init__(self, docs):
+        self.docs = docs
+
+    @staticmethod
+    def _exists(doc, field):
+        for key in field.split('.'):
+            if not isinstance(doc, dict) or key not in doc:
+                return False
+            doc = doc[key]
+        return True
+
+    def _matches(self, doc, query):
+        return all(self._exists(doc, clause['exists']['field'])
+                   for clause in query.get('filter', [])) and \
+            not any(self._exists(doc, clause['exists']['field'])
+                    for clause in query.get('must_not', []))
+
+    def search(self, index, body):
+        type_query, = body['query']['bool']['filter']
+        return {'hits': {'hits': [
+            {'_source': copy.deepcopy(doc), 'sort': [position]}
+            for position, doc in enumerate(self.docs)
+            if self._matches(doc, type_query['bool'])]}}
+
+
+def _backup_doc(backup_name):
+    data = common.get_fake_backup_metadata()
+    data['backup_name'] = backup_name
+    return utilsv2.BackupMetadataDoc('tecs', 'my_user', data).serialize()
+
+
+class EsMigrationTestCase(base.DbTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.checkpoint = os.path.join(
+            self.useFixture(fixtures.TempDir()).path, 'checkpoint.json')
+        client = utilsv2.ClientDoc.create(
+            copy.deepcopy(common.fake_client_info_0), 'tecs', 'my_user')
+        session = common.get_fake_session_0()
+        action = common.get_fake_action_0()
+        self.job = common.get_fake_job_0()
+        self.docs = {
+            'clients': [client],
+            'sessions': [session],
+            'actions': [action],
+            'jobs': [self.job],
+            'backups': [_backup_doc('first'), _backup_doc('second')],
+        }
+
+    def test_migrate_copies_every_type(self):
+        progress = []
+        reports = es_migration.migrate(
+            FakeElasticsearch(self.docs), batch_size=10,
+            progress=lambda doc_type, report: progress.append(doc_type))
+        for doc_type in es_migration.DOC_TYPES:
+            self.assertEqual(len(self.docs[doc_type]),
+                             reports[doc_type]['migrated'])
+            self.assertIn('docs_per_second', reports[doc_type])
+        self.assertEqual(list(es_migration.DOC_TYPES), progress)
+
+        job = self.dbapi.get_job(job_id=self.job['job_id'],
+                                 project_id='tecs')
+        self.assertEqual(['backup', 'restore'],
+                         [job_action['freezer_action']['action']
+                          for job_action in job['job_actions']])
+        self.assertEqual('some text here', self.dbapi.get_session(
+            session_id='turistidellademocrazia',
+            project_id='tecs')['description'])
+        self.assertEqual(2, len(self.dbapi.search_backup(
+            project_id='tecs', limit=10)))
+        action = self.dbapi.get_action(action_id='qwerqwerqwerrewq',
+                                       project_id='project_id-is-tecs')
+        self.assertEqual('backup', action['freezer_action']['action'])
+
+    @mock.patch('freezer_api.storage.elasticv2.elasticsearch')
+    def test_migrate_from_a_shared_index(self, mock_elasticsearch):
+        CONF.register_opts(ElasticSearchDB._ES_OPTS, group='elasticsearch')
+        shared = [doc for doc_type in es_migration.DOC_TYPES
+                  for doc in self.docs[doc_type]]
+        mock_elasticsearch.Elasticsearch.return_value = FakeSharedIndex(
+            shared)
+        es_api = elasticv2.ElasticSearchEngineV2('elasticsearch')
+
+        reports = es_migration.migrate(es_api, batch_size=10)
+        for doc_type in es_migration.DOC_TYPES:
+            self.assertEqual(len(self.docs[doc_type]),
+                             reports[doc_type]['migrated'])
+            self.assertEqual(0, reports[doc_type]['skipped'])
+            self.assertEqual(0, reports[doc_type]['invalid'])
+
+    def test_migrate_resumes_from_checkpoint(self):
+        docs = {'backups': self.docs['backups']}
+        es = FakeElasticsearch(docs, fail_after=1)
+        self.assertRaises(Exception, es_migration.migrate, es,
+                          doc_types=('backups',), batch_size=1,
+                          checkpoint_path=self.checkpoint)
+        self.assertEqual(1, len(self.dbapi.search_backup(project_id='tecs',
+                                                         limit=10)))
+
+        reports = es_migration.migrate(
+            FakeElasticsearch(docs), doc_types=('backups',), batch_size=1,
+            checkpoint_path=self.checkpoint)
+        self.assertEqual(1, reports['backups']['migrated'])
+        self.assertEqual(0, reports['backups']['skipped'])
+        self.assertEqual(2, reports['backups']['total_migrated'])
+        self.assertEqual(2, len(self.dbapi.search_backup(project_id='tecs',
+                                                         limit=10)))
+
+        # a finished migration reads nothing
+        es = FakeElasticsearch(docs)
+        es_migration.migrate(es, doc_types=('backups',),
+                             checkpoint_path=self.checkpoint)
+        self.assertEqual(0, es.pages)
+
+    def test_migrate_page_skips_existing_and_invalid_docs(self):
+        backups = self.docs['backups']
+        es_migration.migrate_page('backups', backups[:1])
+        invalid = _backup_doc('invalid')
+        invalid['backup_metadata'] = {'container': 12}
+        self.assertEqual((1, 1, 1), es_migration.migrate_page(
+            'backups', backups + [invalid]))
+
+    def test_migrate_page_reuses_stored_job_actions(self):
+        action = common.get_fake_action_0()
+        action['project_id'] = 'tecs'
+        es_migration.migrate_page('actions', [action])
+        self.job['job_actions'] = [action]
+        self.assertEqual((1, 0, 0),
+                         es_migration.migrate_page('jobs', [self.job]))
+        job = self.dbapi.get_job(job_id=self.job['job_id'],
+                                 project_id='tecs')
+        self.assertEqual(['qwerqwerqwerrewq'],
+                         [job_action['action_id']
+                          for job_action in job['job_actions']])
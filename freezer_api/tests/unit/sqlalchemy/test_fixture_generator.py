@@ -0,0 +1,106 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Tests for the synthetic catalog generator"""
+
+from oslo_serialization import jsonutils as json
+
+from freezer_api.db.sqlalchemy import api as sqla_api
+from freezer_api.db.sqlalchemy import fixture_generator
+from freezer_api.db.sqlalchemy import models
+from freezer_api.tests.unit import common
+from freezer_api.tests.unit.sqlalchemy import base
+
+
+class SpreadTestCase(common.FreezerBaseTestCase):
+
+    def test_even(self):
+        self.assertEqual([4, 3, 3], fixture_generator.spread(10, 3))
+
+    def test_skewed(self):
+        counts = fixture_generator.spread(110, 3, skew=1.0)
+        self.assertEqual(110, sum(counts))
+        self.assertEqual([60, 30, 20], counts)
+
+    def test_no_bucket(self):
+        self.assertEqual([], fixture_generator.spread(10, 0))
+
+
+class FixtureGeneratorTestCase(base.DbTestCase):
+
+    def _generate(self, **sizes):
+        params = dict(projects=2, clients=6, jobs=12, backups=48,
+                      sessions=4, actions_per_job=2, batch_size=25)
+        params.update(sizes)
+        return fixture_generator.generate(**params)
+
+    @staticmethod
+    def _rows(model):
+        with sqla_api.session_for_read() as session:
+            return sqla_api.model_query(session, model).all()
+
+    def test_row_counts(self):
+        reports = []
+        report = self._generate(progress=reports.append)
+        self.assertEqual(6, report['clients'])
+        self.assertEqual(12, report['jobs'])
+        self.assertEqual(24, report['actions'])
+        self.assertEqual(24, report['job_actions'])
+        self.assertEqual(48, report['backups'])
+        self.assertEqual(4, report['sessions'])
+        self.assertEqual(48, len(self._rows(models.Backup)))
+        self.assertGreater(len(reports), 1)
+
+    def test_catalog_is_served_by_the_api(self):
+        self._generate()
+        client = self._rows(models.Client)[0]
+        jobs = sqla_api.search_job(project_id=client.project_id,
+                                   search={'match': [
+                                       {'client_id': client.client_id}]})
+        self.assertEqual(2, len(jobs))
+        self.assertEqual(2, len(jobs[0]['job_actions']))
+        self.assertEqual(client.hostname, jobs[0]['job_actions'][0][
+            'freezer_action']['hostname'])
+        backups = sqla_api.search_backup(project_id=client.project_id,
+                                         limit=1000)
+        self.assertIn(jobs[0]['job_id'], {
+            backup['backup_metadata']['job_id'] for backup in backups})
+
+    def test_metadata_size(self):
+        self._generate(metadata_size=4096)
+        size = len(self._rows(models.Backup)[0].backup_metadata)
+        self.assertGreater(size, 3500)
+        self.assertLess(size, 4700)
+
+    def test_skewed_clients(self):
+        self._generate(projects=3, clients=11, skew=1.0)
+        per_project = {}
+        for client in self._rows(models.Client):
+            per_project[client.project_id] = \
+                per_project.get(client.project_id, 0) + 1
+        self.assertEqual([2, 3, 6], sorted(per_project.values()))
+
+    def test_same_seed_same_catalog(self):
+        self._generate(projects=1, clients=1, jobs=1, backups=1, sessions=0)
+        first = self._rows(models.Backup)[0]
+        with sqla_api.session_for_write() as session:
+            for model in reversed(fixture_generator._TABLES):
+                session.query(model).delete()
+        self._generate(projects=1, clients=1, jobs=1, backups=1, sessions=0)
+        second = self._rows(models.Backup)[0]
+        self.assertEqual(first.id, second.id)
+        self.assertEqual(
+            json.loads(first.backup_metadata)['total_fs_files'],
+            json.loads(second.backup_metadata)['total_fs_files'])
+
+    def test_jobs_require_clients(self):
+        self.assertRaises(ValueError, self._generate, clients=0)
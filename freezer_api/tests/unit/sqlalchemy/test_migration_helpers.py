@@ -0,0 +1,142 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Tests for the batched data migration helpers"""
+
+import os
+
+from alembic import command as alembic_api
+import fixtures
+from oslo_serialization import jsonutils as json
+from oslotest import base as test_base
+import sqlalchemy as sa
+
+from freezer_api.db import manager
+from freezer_api.db.sqlalchemy import migration_helpers
+
+
+class BatchedMigrationTestCase(test_base.BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.engine = sa.create_engine('sqlite://')
+        self.table = sa.Table(
+            'items', sa.MetaData(),
+            sa.Column('id', sa.String(36), primary_key=True),
+            sa.Column('value', sa.Integer))
+        self.connection = self.engine.connect()
+        self.addCleanup(self.connection.close)
+        self.table.create(self.connection)
+        migration_helpers.insert_many(
+            self.connection, self.table,
+            [{'id': 'id-{0}'.format(i), 'value': i} for i in range(5)])
+        self.connection.commit()
+
+    def _migration(self):
+        return migration_helpers.BatchedMigration(
+            self.connection, 'double', self.table, batch_size=2,
+            commit=self.connection.commit)
+
+    def _double(self, rows):
+        migration_helpers.update_many(self.connection, self.table, [
+            {'id': row.id, 'value': row.value * 2} for row in rows])
+
+    def _values(self):
+        return [row.value for row in self.connection.execute(
+            sa.select(self.table.c.value).order_by(self.table.c.id))]
+
+    def test_run_walks_the_table_in_batches(self):
+        batches = []
+
+        def migrate_batch(rows):
+            batches.append([row.id for row in rows])
+            self._double(rows)
+
+        self.assertEqual(5, self._migration().run(migrate_batch))
+        self.assertEqual([['id-0', 'id-1'], ['id-2', 'id-3'], ['id-4']],
+                         batches)
+        self.assertEqual([0, 2, 4, 6, 8], self._values())
+        self.assertFalse(sa.inspect(self.connection).has_table(
+            migration_helpers.PROGRESS_TABLE))
+
+    def test_run_resumes_after_the_last_committed_batch(self):
+        def fail_on_second_batch(rows):
+            if rows[0].id == 'id-2':
+                self._double(rows)
+                raise Exception('interrupted')
+            self._double(rows)
+
+        self.assertRaises(Exception, self._migration().run,
+                          fail_on_second_batch)
+        self.connection.rollback()
+        self.assertEqual([0, 2, 2, 3, 4], self._values())
+
+        batches = []
+
+        def migrate_batch(rows):
+            batches.append([row.id for row in rows])
+            self._double(rows)
+
+        self.assertEqual(5, self._migration().run(migrate_batch))
+        self.assertEqual([['id-2', 'id-3'], ['id-4']], batches)
+        self.assertEqual([0, 2, 4, 6, 8], self._values())
+
+
+class NormalizeJobActionsTestCase(test_base.BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        path = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                            'freezer.db')
+        self.url = 'sqlite:///' + path
+        db_driver = manager.get_db_driver('sqlalchemy', backend='sqlalchemy')
+        self.config = db_driver._find_alembic_conf()
+        self.config.set_main_option('sqlalchemy.url', self.url)
+        self.engine = sa.create_engine(self.url)
+        self.addCleanup(self.engine.dispose)
+
+    def test_job_actions_are_migrated(self):
+        alembic_api.upgrade(self.config, '4f8c679a1d3b')
+        job_actions = [
+            {'action_id': 'stored',
+             'freezer_action': {'action': 'backup'}},
+            {'freezer_action': {'action': 'restore', 'mode': 'fs'}},
+            {'freezer_action': {}},
+        ]
+        with self.engine.begin() as connection:
+            connection.execute(sa.text(
+                "INSERT INTO actions (id, action, user_id) "
+                "VALUES ('stored', 'backup', 'user')"))
+            for job_id in ('job-1', 'job-2'):
+                connection.execute(sa.text(
+                    "INSERT INTO jobs (id, user_id, client_id, session_id, "
+                    "job_actions) VALUES (:id, 'user', 'client', '', "
+                    ":job_actions)"),
+                    {'id': job_id, 'job_actions': json.dumps(job_actions)})
+
+        alembic_api.upgrade(self.config, 'a1b2c3d4e5f6')
+
+        with self.engine.connect() as connection:
+            rows = connection.execute(sa.text(
+                'SELECT job_id, action_id, position FROM job_actions '
+                'ORDER BY job_id, position')).fetchall()
+            actions = connection.execute(sa.text(
+                "SELECT action FROM actions ORDER BY action")).fetchall()
+            inspector = sa.inspect(connection)
+            self.assertFalse(inspector.has_table(
+                migration_helpers.PROGRESS_TABLE))
+        self.assertEqual(4, len(rows))
+        self.assertEqual([('job-1', 'stored', 0)], rows[:1])
+        self.assertEqual([0, 1, 0, 1], [row.position for row in rows])
+        # one restore action created per job, the invalid entry skipped
+        self.assertEqual(['backup', 'restore', 'restore'],
+                         [row.action for row in actions])
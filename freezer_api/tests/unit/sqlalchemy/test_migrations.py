@@ -163,6 +163,20 @@ class MigrationsWalk(
         self.assertGreaterEqual(
             sessions_columns['user_id']['type'].length, 64)
 
+    def _check_b7e4f2a9c6d1(self, connection):
+        inspector = sqlalchemy.inspect(connection)
+        columns = [x['name'] for x in inspector.get_columns('actions')]
+        self.assertIn('freezer_action_hash', columns)
+        indexes = [x['name'] for x in inspector.get_indexes('actions')]
+        self.assertIn('ix_actions_freezer_action_hash', indexes)
+
+    def _check_c5d2e8f1a9b3(self, connection):
+        inspector = sqlalchemy.inspect(connection)
+        self.assertTrue(inspector.has_table('slow_queries'))
+        columns = [x['name'] for x in inspector.get_columns('slow_queries')]
+        self.assertIn('fingerprint', columns)
+        self.assertIn('total_time', columns)
+
     def test_walk_versions(self):
         with self.engine.begin() as connection:
             self.config.attributes['connection'] = connection
@@ -0,0 +1,154 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Tests for the monthly partitioning of the backups table"""
+
+import datetime
+from unittest import mock
+
+from freezer_api.db.sqlalchemy import partitioning
+from freezer_api.tests.unit.sqlalchemy import base
+
+
+def _mock_engine(dialect, partitions, oldest=None):
+    connection = mock.MagicMock()
+    connection.dialect.name = dialect
+    statements = []
+
+    def execute(statement, params=None):
+        sql = str(statement)
+        statements.append(sql)
+        result = mock.MagicMock()
+        if 'PARTITION_NAME' in sql or 'pg_inherits' in sql:
+            result.__iter__.return_value = [(name,) for name in partitions]
+        result.scalar.return_value = oldest
+        return result
+
+    connection.execute.side_effect = execute
+    engine = mock.MagicMock()
+    engine.begin.return_value.__enter__.return_value = connection
+    return engine, statements
+
+
+class PartitioningTestCase(base.DbTestCase):
+
+    now = datetime.datetime(2024, 11, 17, 10, 30)
+
+    def test_month_helpers(self):
+        month = partitioning.month_start(self.now)
+        self.assertEqual(datetime.datetime(2024, 11, 1), month)
+        self.assertEqual(datetime.datetime(2025, 2, 1),
+                         partitioning.add_months(month, 3))
+        self.assertEqual(datetime.datetime(2023, 12, 1),
+                         partitioning.add_months(month, -11))
+        self.assertEqual('backups_p202411',
+                         partitioning.partition_name(month))
+        self.assertEqual(month, partitioning.partition_month(
+            'backups_p202411'))
+        self.assertIsNone(partitioning.partition_month('backups_pmax'))
+
+    def test_sqlite_is_not_supported(self):
+        engine = self.dbapi.get_engine()
+        self.assertRaises(ValueError, partitioning.partition_backups, engine)
+        self.assertRaises(ValueError, partitioning.drop_partitions, engine,
+                          self.now)
+
+    def test_mysql_partition_backups_converts_table(self):
+        engine, statements = _mock_engine(
+            'mysql', [], oldest=datetime.datetime(2024, 9, 3))
+        created = partitioning.partition_backups(engine, months_ahead=2,
+                                                 now=self.now)
+        self.assertEqual(['backups_p202409', 'backups_p202410',
+                          'backups_p202411', 'backups_p202412',
+                          'backups_p202501'], created)
+        self.assertIn('ADD PRIMARY KEY (id, created_at)', statements[-2])
+        self.assertIn('PARTITION BY RANGE (TO_DAYS(created_at))',
+                      statements[-1])
+        self.assertIn("PARTITION backups_p202501 VALUES LESS THAN "
+                      "(TO_DAYS('2025-02-01'))", statements[-1])
+        self.assertIn('PARTITION backups_pmax VALUES LESS THAN MAXVALUE',
+                      statements[-1])
+
+    def test_mysql_partition_backups_adds_upcoming_partitions(self):
+        engine, statements = _mock_engine(
+            'mysql', ['backups_p202411', 'backups_p202412', 'backups_pmax'])
+        created = partitioning.partition_backups(engine, months_ahead=2,
+                                                 now=self.now)
+        self.assertEqual(['backups_p202501'], created)
+        self.assertIn('REORGANIZE PARTITION backups_pmax INTO',
+                      statements[-1])
+
+    def test_partition_backups_is_idempotent(self):
+        engine, statements = _mock_engine(
+            'postgresql', ['backups_p202411', 'backups_p202412',
+                           'backups_pdefault'])
+        created = partitioning.partition_backups(engine, months_ahead=1,
+                                                 now=self.now)
+        self.assertEqual([], created)
+        self.assertEqual(1, len(statements))
+
+    def test_postgresql_partition_backups_converts_table(self):
+        engine, statements = _mock_engine('postgresql', [], oldest=None)
+        created = partitioning.partition_backups(engine, months_ahead=1,
+                                                 now=self.now)
+        self.assertEqual(['backups_p202411', 'backups_p202412'], created)
+        self.assertIn(
+            "CREATE TABLE backups_p202412 PARTITION OF backups FOR VALUES "
+            "FROM ('2024-12-01') TO ('2025-01-01')", statements)
+        self.assertIn('CREATE TABLE backups_pdefault PARTITION OF backups '
+                      'DEFAULT', statements)
+        self.assertIn('INSERT INTO backups SELECT * FROM '
+                      'backups_unpartitioned', statements)
+        self.assertIn('CREATE TABLE backups (LIKE backups_unpartitioned '
+                      'INCLUDING ALL) PARTITION BY RANGE (created_at)',
+                      statements)
+        self.assertLess(
+            statements.index('ALTER TABLE backups_unpartitioned DROP '
+                             'CONSTRAINT backups_pkey, ALTER COLUMN '
+                             'created_at SET NOT NULL'),
+            statements.index('CREATE TABLE backups (LIKE '
+                             'backups_unpartitioned INCLUDING ALL) '
+                             'PARTITION BY RANGE (created_at)'))
+
+    def test_postgresql_partition_backups_moves_default_rows(self):
+        engine, statements = _mock_engine(
+            'postgresql', ['backups_p202411', 'backups_pdefault'])
+        created = partitioning.partition_backups(engine, months_ahead=2,
+                                                 now=self.now)
+        self.assertEqual(['backups_p202412', 'backups_p202501'], created)
+        self.assertEqual([
+            'ALTER TABLE backups DETACH PARTITION backups_pdefault',
+            "CREATE TABLE backups_p202412 PARTITION OF backups FOR VALUES "
+            "FROM ('2024-12-01') TO ('2025-01-01')",
+            "CREATE TABLE backups_p202501 PARTITION OF backups FOR VALUES "
+            "FROM ('2025-01-01') TO ('2025-02-01')",
+            'INSERT INTO backups SELECT * FROM backups_pdefault '
+            'WHERE created_at >= :start AND created_at < :end',
+            'DELETE FROM backups_pdefault '
+            'WHERE created_at >= :start AND created_at < :end',
+            'ALTER TABLE backups ATTACH PARTITION backups_pdefault DEFAULT',
+        ], statements[2:])
+        connection = engine.begin.return_value.__enter__.return_value
+        self.assertEqual(
+            {'start': datetime.datetime(2024, 12, 1),
+             'end': datetime.datetime(2025, 2, 1)},
+            connection.execute.call_args_list[-3][0][1])
+
+    def test_drop_partitions(self):
+        engine, statements = _mock_engine(
+            'postgresql', ['backups_p202409', 'backups_p202410',
+                           'backups_p202411', 'backups_pdefault'])
+        dropped = partitioning.drop_partitions(
+            engine, datetime.datetime(2024, 11, 15))
+        self.assertEqual(['backups_p202409', 'backups_p202410'], dropped)
+        self.assertEqual(['DROP TABLE backups_p202409',
+                          'DROP TABLE backups_p202410'], statements[1:])
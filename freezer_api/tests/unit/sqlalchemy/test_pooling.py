@@ -0,0 +1,94 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Tests for the connection pool pre-ping, warm up and statistics"""
+
+import os
+import types
+from unittest import mock
+
+from oslo_config import cfg
+import sqlalchemy as sa
+from sqlalchemy import exc as sa_exc
+from sqlalchemy import pool as sa_pool
+
+from freezer_api.db.sqlalchemy import api as sqla_api
+from freezer_api.db.sqlalchemy import pooling
+from freezer_api.tests.unit.sqlalchemy import base
+
+CONF = cfg.CONF
+
+
+class PoolingTestCase(base.DbTestCase):
+
+    def setUp(self):
+        super().setUp()
+        pooling.STATISTICS.reset()
+        self.engine = sa.create_engine('sqlite://',
+                                       poolclass=sa_pool.QueuePool,
+                                       pool_size=3, max_overflow=1)
+        self.addCleanup(self.engine.dispose)
+        pooling.instrument(self.engine)
+
+    def test_pool_statistics(self):
+        with self.engine.connect():
+            statistics = pooling.pool_statistics(self.engine)
+        self.assertEqual(os.getpid(), statistics['pid'])
+        self.assertEqual('QueuePool', statistics['pool'])
+        self.assertEqual(1, statistics['checked_out'])
+        self.assertEqual(1, statistics['checkouts'])
+        self.assertEqual(0, statistics['timeouts'])
+        self.assertGreaterEqual(statistics['wait_seconds_max'], 0.0)
+
+    def test_checkouts_are_counted_after_dispose(self):
+        self.engine.dispose()
+        with self.engine.connect():
+            pass
+        self.assertEqual(1, pooling.STATISTICS.snapshot()['checkouts'])
+
+    def test_ping_discards_dead_connections(self):
+        connection = mock.Mock()
+        connection.cursor.return_value.execute.side_effect = Exception()
+        self.assertRaises(sa_exc.DisconnectionError, pooling._ping,
+                          connection, None, None)
+
+    def test_warm_pool_is_capped_by_max_pool_size(self):
+        CONF.set_override('max_pool_size', 2, group='database')
+        self.assertEqual(2, pooling.warm_pool(self.engine, 5))
+        self.assertEqual(2, self.engine.pool.checkedin())
+        self.assertEqual(0, self.engine.pool.checkedout())
+
+    def test_warm_pool_at_worker_start_waits_for_the_fork(self):
+        previous_hook = mock.Mock()
+        uwsgi = types.SimpleNamespace(worker_id=lambda: 0,
+                                      post_fork_hook=previous_hook)
+        with mock.patch.object(pooling, 'uwsgi', uwsgi):
+            pooling.warm_pool_at_worker_start(lambda: self.engine, 2)
+        self.assertEqual(0, self.engine.pool.checkedin())
+        self.assertIsNot(previous_hook, uwsgi.post_fork_hook)
+        uwsgi.post_fork_hook()
+        previous_hook.assert_called_once_with()
+        self.assertEqual(2, self.engine.pool.checkedin())
+
+    def test_warm_pool_at_worker_start_without_a_previous_hook(self):
+        uwsgi = types.SimpleNamespace(worker_id=lambda: 0)
+        with mock.patch.object(pooling, 'uwsgi', uwsgi):
+            pooling.warm_pool_at_worker_start(lambda: self.engine, 2)
+        uwsgi.post_fork_hook()
+        self.assertEqual(2, self.engine.pool.checkedin())
+
+    def test_api_pool_statistics(self):
+        sqla_api.get_client(project_id='tecs')
+        statistics = sqla_api.pool_statistics()
+        self.assertGreaterEqual(statistics['checkouts'], 1)
+        self.assertEqual(CONF.database.max_overflow,
+                         statistics['max_overflow'])
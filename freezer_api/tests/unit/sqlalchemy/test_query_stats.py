@@ -0,0 +1,43 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Tests for the per-request SQL statement statistics"""
+
+from freezer_api import context
+from freezer_api.db.sqlalchemy import query_stats
+from freezer_api.tests.unit.sqlalchemy import base
+
+
+class QueryStatsTestCase(base.DbTestCase):
+
+    def test_fingerprint_strips_literals_and_in_lists(self):
+        self.assertEqual(
+            "SELECT * FROM jobs WHERE id IN (...) AND name = ? LIMIT ?",
+            query_stats.fingerprint(
+                "SELECT *\n  FROM jobs WHERE id IN (?, ?, ?) "
+                "AND name = 'it''s' LIMIT 10"))
+
+    def test_statements_are_recorded_on_the_request_context(self):
+        ctx = context.FreezerContext(user='user', tenant='tecs')
+        ctx.db_stats = query_stats.QueryStats()
+        self.dbapi.get_client(project_id='tecs')
+        self.dbapi.get_client(project_id='tecs')
+        self.assertGreaterEqual(ctx.db_stats.count, 2)
+        self.assertGreater(ctx.db_stats.duration, 0)
+        selects = [count for statement, count in ctx.db_stats.most_common()
+                   if statement.startswith('SELECT clients.id')]
+        self.assertEqual([2], selects)
+
+    def test_statements_outside_of_a_request_are_ignored(self):
+        context.FreezerContext(user='user', tenant='tecs')
+        self.dbapi.get_client(project_id='tecs')
+        self.assertIsNone(query_stats.current())
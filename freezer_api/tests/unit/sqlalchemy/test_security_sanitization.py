@@ -65,7 +65,7 @@ class TestDBSecuritySanitization(base.DbTestCase):
         patch_path = 'freezer_api.db.sqlalchemy.api.model_query'
         with mock.patch(patch_path) as mock_query:
             mock_res = mock_query.return_value.filter_by.return_value
-            mock_res.first.side_effect = \
+            mock_res.update.side_effect = \
                 db_exc.DBError("Secret internal structure")
 
             ex = self.assertRaises(freezer_api_exc.StorageEngineError,
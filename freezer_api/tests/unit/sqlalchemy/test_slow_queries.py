@@ -0,0 +1,102 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Tests for the slow query log"""
+
+from unittest import mock
+
+from freezer_api.db.sqlalchemy import api as sqla_api
+from freezer_api.db.sqlalchemy import slow_queries
+from freezer_api.tests.unit.sqlalchemy import base
+
+
+class SlowQueriesTestCase(base.DbTestCase):
+
+    def setUp(self):
+        super().setUp()
+        # every statement is slow
+        self._config_fixture.config(slow_query_threshold=0.000001,
+                                    group='database')
+        self.addCleanup(slow_queries.SLOW_QUERIES.flush)
+
+    def _client_report(self):
+        return [query for query in slow_queries.report(sqla_api.get_engine())
+                if 'FROM clients' in query['fingerprint']]
+
+    def test_parameter_shapes(self):
+        self.assertEqual('(str, int, NULL)', slow_queries.parameter_shapes(
+            ('tecs', 10, None)))
+        self.assertEqual('2 x (id:str, n:int)', slow_queries.parameter_shapes(
+            [{'id': 'a', 'n': 1}, {'id': 'b', 'n': 2}], executemany=True))
+
+    @mock.patch.object(slow_queries, 'LOG')
+    def test_slow_queries_are_logged_and_reported(self, mock_log):
+        sqla_api.get_client(project_id='tecs')
+        sqla_api.get_client(project_id='tecs')
+        logged = [call[0][1] for call in mock_log.warning.call_args_list
+                  if 'FROM clients' in call[0][1]['statement']]
+        self.assertEqual(2, len(logged))
+        self.assertEqual('', logged[0]['explain'])
+
+        slow_queries.flush()
+        sqla_api.get_client(project_id='tecs')
+        slow_queries.flush()
+
+        query, = self._client_report()
+        self.assertEqual('search_tuple', query['caller'])
+        self.assertEqual(3, query['count'])
+        self.assertTrue(query['parameter_shapes'].startswith('(str'))
+        self.assertGreaterEqual(query['total_seconds'],
+                                query['max_seconds'])
+        self.assertIsNone(query['explain'])
+
+    def test_explain_output_is_stored(self):
+        self._config_fixture.config(slow_query_explain=True,
+                                    group='database')
+        sqla_api.get_client(project_id='tecs')
+        slow_queries.flush()
+        query, = self._client_report()
+        self.assertIn('clients', query['explain'])
+
+    def test_nothing_recorded_below_the_threshold(self):
+        self._config_fixture.config(slow_query_threshold=0,
+                                    group='database')
+        sqla_api.get_client(project_id='tecs')
+        self.assertEqual(0, slow_queries.flush())
+
+    @mock.patch.object(slow_queries.threading, 'Timer')
+    def test_a_single_flush_is_scheduled(self, mock_timer):
+        self._config_fixture.config(slow_query_flush_interval=30,
+                                    group='database')
+        slow_queries.flush()
+        sqla_api.get_client(project_id='tecs')
+        sqla_api.get_client(project_id='tecs')
+        mock_timer.assert_called_once_with(30, slow_queries.SLOW_QUERIES.flush)
+        mock_timer.return_value.start.assert_called_once_with()
+
+        flush = mock_timer.call_args[0][1]
+        self.assertGreaterEqual(flush(), 1)
+        mock_timer.return_value.cancel.assert_called_once_with()
+        query, = self._client_report()
+        self.assertEqual(2, query['count'])
+
+    @mock.patch.object(slow_queries, 'LOG')
+    def test_aggregates_are_kept_when_they_cannot_be_stored(self, mock_log):
+        sqla_api.get_client(project_id='tecs')
+        with mock.patch.object(slow_queries, '_merge_all',
+                               side_effect=Exception('gone')):
+            self.assertEqual(0, slow_queries.flush())
+        mock_log.exception.assert_called_once()
+        sqla_api.get_client(project_id='tecs')
+        slow_queries.flush()
+        query, = self._client_report()
+        self.assertEqual(2, query['count'])
@@ -0,0 +1,61 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Tests for the timing of the SQL statements"""
+
+from unittest import mock
+
+import sqlalchemy as sa
+
+from freezer_api.db.sqlalchemy import query_stats
+from freezer_api.db.sqlalchemy import slow_queries
+from freezer_api.db.sqlalchemy import timing
+from freezer_api.tests.unit.sqlalchemy import base
+
+
+class TimingTestCase(base.DbTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.engine = sa.create_engine('sqlite://')
+        self.addCleanup(self.engine.dispose)
+        timing.instrument(self.engine)
+        self.driver_subscribers = list(timing._SUBSCRIBERS)
+        self.subscriber = mock.Mock()
+        subscribers = mock.patch.object(timing, '_SUBSCRIBERS',
+                                        [self.subscriber])
+        subscribers.start()
+        self.addCleanup(subscribers.stop)
+
+    def test_subscribers_receive_the_duration(self):
+        with self.engine.connect() as connection:
+            connection.execute(sa.text('SELECT 1'))
+        (conn, statement, parameters, executemany,
+         duration), _ = self.subscriber.call_args
+        self.assertEqual('SELECT 1', statement)
+        self.assertFalse(executemany)
+        self.assertGreaterEqual(duration, 0.0)
+
+    def test_failed_statements_are_not_measured(self):
+        with self.engine.connect() as connection:
+            self.assertRaises(sa.exc.OperationalError, connection.execute,
+                              sa.text('SELECT * FROM missing'))
+            self.assertEqual([], connection.info[timing._START_TIMES_KEY])
+        self.subscriber.assert_not_called()
+
+    def test_subscribe_once(self):
+        timing.subscribe(self.subscriber)
+        self.assertEqual([self.subscriber], timing._SUBSCRIBERS)
+
+    def test_the_driver_subscribes_the_statistics_and_slow_query_log(self):
+        self.assertEqual([query_stats.on_statement, slow_queries.on_statement],
+                         self.driver_subscribers)
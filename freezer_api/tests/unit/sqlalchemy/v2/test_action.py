@@ -199,6 +199,22 @@ class DbActionTestCase(base.DbTestCase):
             actionmap = result[index]
             self.assertEqual(actionids[index], actionmap['action_id'])
 
+    def test_iter_action(self):
+        for count in range(10):
+            doc = copy.deepcopy(self.fake_action_3)
+            doc['action_id'] = common.get_fake_action_id()
+            self.dbapi.add_action(user_id=self.fake_action_3.get('user_id'),
+                                  doc=doc, project_id=self.fake_project_id)
+        actions = self.dbapi.iter_action(project_id=self.fake_project_id,
+                                         offset=3, limit=5)
+        self.assertNotIsInstance(actions, list)
+        result = list(actions)
+        self.assertEqual(5, len(result))
+        self.assertEqual(
+            self.dbapi.search_action(project_id=self.fake_project_id,
+                                     offset=3, limit=5),
+            result)
+
     def test_action_list_with_search_match_and_match_not(self):
         count = 0
         actionids = []
@@ -420,3 +436,89 @@ class DbActionTestCase(base.DbTestCase):
                           self.dbapi.add_action, self.fake_user_id,
                           self.fake_action_0,
                           project_id=self.fake_project_id)
+
+    def test_find_identical_action(self):
+        action_doc = copy.deepcopy(self.fake_action_0)
+        action_id = self.dbapi.add_action(user_id=self.fake_user_id,
+                                          doc=action_doc,
+                                          project_id=self.fake_project_id)
+
+        identical_doc = copy.deepcopy(self.fake_action_0)
+        identical_doc.pop('action_id', None)
+        result = self.dbapi.find_identical_action(
+            doc=identical_doc, project_id=self.fake_project_id)
+        self.assertEqual(action_id, result)
+
+        result = self.dbapi.find_identical_action(
+            doc=identical_doc, project_id='another-project')
+        self.assertIsNone(result)
+
+        identical_doc['freezer_action']['container'] = 'another_container'
+        result = self.dbapi.find_identical_action(
+            doc=identical_doc, project_id=self.fake_project_id)
+        self.assertIsNone(result)
+
+    def test_add_actions_reuses_identical_actions_of_the_batch(self):
+        docs = [copy.deepcopy(self.fake_action_0) for _ in range(3)]
+        for doc in docs:
+            doc.pop('action_id', None)
+        docs[2]['freezer_action']['container'] = 'another_container'
+        action_ids = self.dbapi.add_actions(user_id=self.fake_user_id,
+                                            docs=docs,
+                                            project_id=self.fake_project_id)
+        self.assertEqual(3, len(action_ids))
+        self.assertEqual(action_ids[0], action_ids[1])
+        self.assertNotEqual(action_ids[0], action_ids[2])
+        self.assertEqual(action_ids, [doc['action_id'] for doc in docs])
+        for action_id in action_ids:
+            self.assertIsNotNone(self.dbapi.get_action(
+                project_id=self.fake_project_id, action_id=action_id))
+
+    def test_update_action_refreshes_freezer_action_hash(self):
+        action_doc = copy.deepcopy(self.fake_action_0)
+        action_id = self.dbapi.add_action(user_id=self.fake_user_id,
+                                          doc=action_doc,
+                                          project_id=self.fake_project_id)
+
+        patch_doc = copy.deepcopy(self.fake_action_2)
+        self.dbapi.update_action(user_id=self.fake_user_id,
+                                 project_id=self.fake_project_id,
+                                 patch_doc=patch_doc,
+                                 action_id=action_id)
+
+        action = self.dbapi.get_action(project_id=self.fake_project_id,
+                                       action_id=action_id)
+        result = self.dbapi.find_identical_action(
+            doc=action, project_id=self.fake_project_id)
+        self.assertEqual(action_id, result)
+
+    def test_partial_update_hashes_the_merged_action(self):
+        action_id = self.dbapi.add_action(
+            user_id=self.fake_user_id, doc=copy.deepcopy(self.fake_action_0),
+            project_id=self.fake_project_id)
+
+        self.dbapi.update_action(
+            user_id=self.fake_user_id, project_id=self.fake_project_id,
+            patch_doc={'freezer_action': {'container': 'other_container'}},
+            action_id=action_id)
+
+        action = self.dbapi.get_action(project_id=self.fake_project_id,
+                                       action_id=action_id)
+        self.assertEqual('other_container',
+                         action['freezer_action']['container'])
+        self.assertEqual(action_id, self.dbapi.find_identical_action(
+            doc=action, project_id=self.fake_project_id))
+
+    def test_replace_action_refreshes_freezer_action_hash(self):
+        action_id = self.dbapi.add_action(
+            user_id=self.fake_user_id, doc=copy.deepcopy(self.fake_action_0),
+            project_id=self.fake_project_id)
+
+        self.dbapi.replace_action(
+            user_id=self.fake_user_id, project_id=self.fake_project_id,
+            doc=copy.deepcopy(self.fake_action_2), action_id=action_id)
+
+        action = self.dbapi.get_action(project_id=self.fake_project_id,
+                                       action_id=action_id)
+        self.assertEqual(action_id, self.dbapi.find_identical_action(
+            doc=action, project_id=self.fake_project_id))
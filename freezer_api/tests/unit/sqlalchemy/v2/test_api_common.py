@@ -18,9 +18,12 @@
 """Tests for manipulating job via the DB API"""
 
 import copy
+import datetime
 from unittest import mock
 from unittest.mock import patch
 
+from oslo_utils import timeutils
+
 from freezer_api.common import exceptions as freezer_api_exc
 from freezer_api.db.sqlalchemy import api
 from freezer_api.db.sqlalchemy import models
@@ -97,6 +100,28 @@ class ApiTestCase(base.DbTestCase):
                           api.delete_tuple, models.Job, self.fake_user_id,
                           self.fake_job_id, project_id=self.fake_project_id)
 
+    def test_delete_tuples(self):
+        job_ids = []
+        for _ in range(3):
+            job_doc = copy.deepcopy(self.fake_job_0)
+            job_doc.pop('job_id', None)
+            job_ids.append(self.dbapi.add_job(
+                user_id=self.fake_user_id, doc=job_doc,
+                project_id=self.fake_project_id))
+
+        result = self.dbapi.delete_tuples(
+            models.Job, self.fake_user_id, job_ids[:2] + ['missing'],
+            project_id=self.fake_project_id)
+        self.assertEqual(2, result)
+        # already deleted tuples are not counted again
+        result = self.dbapi.delete_tuples(
+            models.Job, self.fake_user_id, job_ids,
+            project_id=self.fake_project_id)
+        self.assertEqual(1, result)
+        self.assertEqual(0, self.dbapi.delete_tuples(
+            models.Job, self.fake_user_id, [],
+            project_id=self.fake_project_id))
+
     def test_delete_tuple(self):
         job_doc1 = copy.deepcopy(self.fake_job_0)
         job_doc2 = copy.deepcopy(self.fake_job_0)
@@ -201,3 +226,102 @@ class ApiTestCase(base.DbTestCase):
                       'key2': 2}
         search_keys_found = api.get_recursively(dict1, search_key)
         self.assertEqual(search_key, search_keys_found)
+
+    def _populate_project(self, project_id):
+        job_doc = copy.deepcopy(self.fake_job_0)
+        job_doc.pop('job_id', None)
+        job_doc['user_credentials'] = {
+            'trust_id': 'fake_trust_id',
+            'trustor_user_id': self.fake_user_id
+        }
+        self.dbapi.add_job(user_id=self.fake_user_id, doc=job_doc,
+                           project_id=project_id)
+        action_doc = copy.deepcopy(self.fake_action_0)
+        action_doc.pop('action_id', None)
+        self.dbapi.add_action(user_id=self.fake_user_id, doc=action_doc,
+                              project_id=project_id)
+        self.dbapi.add_backup(user_id=self.fake_user_id,
+                              doc=copy.deepcopy(self.fake_backup_0),
+                              project_id=project_id)
+
+    def _count_rows(self, project_id, deleted=None):
+        counts = {}
+        with api.session_for_read() as session:
+            for model, criterion in api._project_purge_plan(project_id):
+                query = session.query(model).filter(criterion)
+                if deleted is not None:
+                    query = query.filter(model.deleted == deleted)
+                counts[model.__tablename__] = query.count()
+        return counts
+
+    def test_purge_project_soft_deletes_in_batches(self):
+        self._populate_project(self.fake_project_id)
+        self.setup_fake_clients('another-project')
+        self._populate_project('another-project')
+        before = self._count_rows(self.fake_project_id)
+        other_before = self._count_rows('another-project', deleted=False)
+        progress = mock.Mock()
+
+        purged = self.dbapi.purge_project(self.fake_project_id,
+                                          batch_size=1, progress=progress)
+
+        self.assertEqual(before, purged)
+        self.assertEqual(sum(purged.values()), progress.call_count)
+        self.assertFalse(any(
+            self._count_rows(self.fake_project_id, deleted=False).values()))
+        self.assertEqual(before, self._count_rows(self.fake_project_id))
+        self.assertEqual(other_before,
+                         self._count_rows('another-project', deleted=False))
+        # purging again resumes where the previous run stopped
+        self.assertFalse(any(
+            self.dbapi.purge_project(self.fake_project_id).values()))
+
+    def test_purge_project_hard_delete(self):
+        self._populate_project(self.fake_project_id)
+        self.dbapi.purge_project(self.fake_project_id)
+
+        purged = self.dbapi.purge_project(self.fake_project_id,
+                                          hard_delete=True)
+
+        self.assertTrue(purged['jobs'])
+        self.assertFalse(any(self._count_rows(self.fake_project_id).values()))
+
+    def test_purge_project_requires_project_id(self):
+        self.assertRaises(freezer_api_exc.BadDataFormat,
+                          self.dbapi.purge_project, None)
+        self.assertRaises(freezer_api_exc.BadDataFormat,
+                          self.dbapi.purge_project, self.fake_project_id,
+                          batch_size=0)
+
+    def test_archive_deleted_removes_old_soft_deleted_rows(self):
+        self._populate_project(self.fake_project_id)
+        self.dbapi.purge_project(self.fake_project_id)
+        deleted = self._count_rows(self.fake_project_id, deleted=True)
+        progress = mock.Mock()
+
+        archived = self.dbapi.archive_deleted(
+            before=datetime.datetime(2000, 1, 1))
+        self.assertFalse(any(archived.values()))
+
+        archived = self.dbapi.archive_deleted(
+            before=timeutils.utcnow() + datetime.timedelta(minutes=1),
+            batch_size=1, progress=progress)
+        self.assertEqual(deleted, archived)
+        self.assertEqual(sum(archived.values()), progress.call_count)
+        self.assertFalse(any(self._count_rows(self.fake_project_id).values()))
+
+    def test_archive_deleted_keeps_referenced_rows(self):
+        job_doc = copy.deepcopy(self.fake_job_0)
+        job_id = self.dbapi.add_job(user_id=self.fake_user_id, doc=job_doc,
+                                    project_id=self.fake_project_id)
+        with api.session_for_write() as session:
+            session.query(models.Job).filter_by(id=job_id).update(
+                models.FreezerBase.delete_values())
+
+        archived = self.dbapi.archive_deleted(
+            before=timeutils.utcnow() + datetime.timedelta(minutes=1))
+
+        self.assertEqual(0, archived['jobs'])
+        with api.session_for_read() as session:
+            self.assertEqual(
+                1, session.query(models.Job).filter_by(id=job_id).count())
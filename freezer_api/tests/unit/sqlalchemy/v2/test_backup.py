@@ -22,6 +22,7 @@ from unittest.mock import patch
 from unittest import mock
 
 from freezer_api.common import exceptions as freezer_api_exc
+from freezer_api.db.sqlalchemy import models
 from freezer_api.tests.unit import common
 from freezer_api.tests.unit.sqlalchemy import base
 
@@ -188,3 +189,41 @@ class DbBackupTestCase(base.DbTestCase):
                           self.fake_user_id, backup_id,
                           {'status': 'completed'},
                           project_id=self.fake_project_id)
+
+    @patch('freezer_api.db.sqlalchemy.api.STREAM_BATCH_SIZE', 3)
+    def test_iter_backup(self):
+        for status in ['available', 'error'] * 5:
+            doc = copy.deepcopy(self.fake_backup_metadata)
+            doc['status'] = status
+            self.dbapi.add_backup(user_id=self.fake_user_id, doc=doc,
+                                  project_id=self.fake_project_id)
+        backups = self.dbapi.iter_backup(project_id=self.fake_project_id,
+                                         offset=2, limit=7)
+        self.assertNotIsInstance(backups, list)
+        result = list(backups)
+        self.assertEqual(7, len(result))
+        self.assertEqual(
+            [b['backup_id'] for b in self.dbapi.search_backup(
+                project_id=self.fake_project_id, offset=2, limit=7)],
+            [b['backup_id'] for b in result])
+
+        search = {'match': [{'status': 'error'}]}
+        result = list(self.dbapi.iter_backup(
+            project_id=self.fake_project_id, offset=1, limit=3,
+            search=search))
+        self.assertEqual(3, len(result))
+        self.assertEqual({'error'}, {b['status'] for b in result})
+        self.assertEqual(
+            [b['backup_id'] for b in self.dbapi.search_backup(
+                project_id=self.fake_project_id, search=search,
+                limit=100)][1:4],
+            [b['backup_id'] for b in result])
+
+        result = list(self.dbapi.iter_tuple(
+            models.Backup, lambda row: row.id,
+            project_id=self.fake_project_id, offset=1, limit=8,
+            batch_size=3))
+        self.assertEqual(
+            [b['backup_id'] for b in self.dbapi.search_backup(
+                project_id=self.fake_project_id, offset=1, limit=8)],
+            result)
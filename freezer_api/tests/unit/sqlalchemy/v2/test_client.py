@@ -121,6 +121,22 @@ class DbClientTestCase(base.DbTestCase):
             clientid = clientmap['client'].get('client_id')
             self.assertEqual(clientids[index], clientid)
 
+    def test_iter_client(self):
+        for count in range(10):
+            client_doc = copy.deepcopy(self.fake_client_doc)
+            client_doc['client_id'] = common.get_fake_client_id()
+            self.dbapi.add_client(user_id=self.fake_user_id, doc=client_doc,
+                                  project_id=self.fake_project_id)
+        clients = self.dbapi.iter_client(project_id=self.fake_project_id,
+                                         offset=2, limit=5)
+        self.assertNotIsInstance(clients, list)
+        result = list(clients)
+        self.assertEqual(5, len(result))
+        self.assertEqual(
+            self.dbapi.get_client(project_id=self.fake_project_id,
+                                  offset=2, limit=5),
+            result)
+
     def test_add_and_search_client_with_search_match_and_match_not(self):
         count = 0
         clientids = []
@@ -101,6 +101,50 @@ class DbJobTestCase(base.DbTestCase):
                                     job_id=job_id)
         self.assertEqual(len(result), 0)
 
+    def test_delete_job_soft_deletes_job_actions_and_credentials(self):
+        job_doc = copy.deepcopy(self.fake_job_0)
+        job_doc['user_credentials'] = {
+            'trust_id': 'fake_trust_id',
+            'trustor_user_id': self.fake_user_id
+        }
+        job_id = self.dbapi.add_job(user_id=self.fake_user_id,
+                                    doc=job_doc,
+                                    project_id=self.fake_project_id)
+
+        result, trust_id = self.dbapi.delete_job(
+            user_id=self.fake_user_id,
+            job_id=job_id,
+            project_id=self.fake_project_id)
+
+        self.assertEqual(job_id, result)
+        self.assertEqual('fake_trust_id', trust_id)
+        with sqla_api.session_for_read() as session:
+            for model in (models.JobAction, models.UserCredentials):
+                live = session.query(model).filter_by(
+                    job_id=job_id, deleted=False).count()
+                total = session.query(model).filter_by(
+                    job_id=job_id).count()
+                self.assertEqual(0, live)
+                self.assertGreater(total, 0)
+
+    def test_delete_job_of_another_project_is_a_noop(self):
+        job_doc = copy.deepcopy(self.fake_job_0)
+        job_id = self.dbapi.add_job(user_id=self.fake_user_id,
+                                    doc=job_doc,
+                                    project_id=self.fake_project_id)
+
+        result, trust_id = self.dbapi.delete_job(
+            user_id=self.fake_user_id,
+            job_id=job_id,
+            project_id='another-project')
+
+        self.assertEqual(job_id, result)
+        self.assertIsNone(trust_id)
+        result = self.dbapi.get_job(project_id=self.fake_project_id,
+                                    job_id=job_id)
+        self.assertEqual(len(self.fake_job_0['job_actions']),
+                         len(result['job_actions']))
+
     def test_trust_rotation_with_multiple_jobs(self):
         trust_id = 'fake_trust_id'
         job_doc_0 = copy.deepcopy(self.fake_job_0)
@@ -293,6 +337,30 @@ class DbJobTestCase(base.DbTestCase):
             self.assertEqual('14 days',
                              jobmap['job_schedule']['schedule_interval'])
 
+    @patch('freezer_api.db.sqlalchemy.api.STREAM_BATCH_SIZE', 4)
+    def test_iter_job(self):
+        for count in range(10):
+            doc = copy.deepcopy(self.fake_job_3)
+            if count % 2:
+                doc['client_id'] = 'node1'
+            self.dbapi.add_job(user_id=self.fake_job_3.get('user_id'),
+                               doc=doc, project_id=self.fake_project_id)
+        search_opt = {'match': [{'client_id': 'node1'}]}
+        expected = self.dbapi.search_job(project_id=self.fake_project_id,
+                                         offset=0, limit=20,
+                                         search=search_opt)
+        result = list(self.dbapi.iter_job(project_id=self.fake_project_id,
+                                          offset=0, limit=20,
+                                          search=search_opt))
+        self.assertEqual(5, len(result))
+        self.assertEqual(expected, result)
+        self.assertEqual(len(result[0]['job_actions']),
+                         len(self.fake_job_3['job_actions']))
+
+        result = list(self.dbapi.iter_job(project_id=self.fake_project_id,
+                                          offset=3, limit=5))
+        self.assertEqual(5, len(result))
+
     def test_job_list_with_search_match_list(self):
         count = 0
         jobids = []
@@ -571,6 +639,27 @@ class DbJobTestCase(base.DbTestCase):
                                            offset=0, limit=100)
         self.assertEqual(0, len(actions))
 
+    def test_add_job_reuses_identical_inline_action(self):
+        action_doc = copy.deepcopy(self.fake_job_0['job_actions'][0])
+        action_id = self.dbapi.add_action(user_id=self.fake_user_id,
+                                          doc=action_doc,
+                                          project_id=self.fake_project_id)
+
+        job_doc = copy.deepcopy(self.fake_job_0)
+        job_doc['job_actions'] = [
+            copy.deepcopy(self.fake_job_0['job_actions'][0])]
+        job_doc['job_actions'][0].pop('action_id', None)
+        job_id = self.dbapi.add_job(user_id=self.fake_user_id,
+                                    doc=job_doc,
+                                    project_id=self.fake_project_id)
+
+        result = self.dbapi.get_job(project_id=self.fake_project_id,
+                                    job_id=job_id)
+        self.assertEqual(action_id, result['job_actions'][0]['action_id'])
+        actions = self.dbapi.search_action(project_id=self.fake_project_id,
+                                           offset=0, limit=100)
+        self.assertEqual(1, len(actions))
+
     def test_delete_action_soft_deletes_referencing_job_actions(self):
         # Deleting an action also soft-deletes the JobAction rows that
         # reference it, so jobs stop listing the deleted action (no dangling
@@ -600,3 +689,21 @@ class DbJobTestCase(base.DbTestCase):
                 job_id=job_id).count()
         self.assertEqual(0, live)
         self.assertEqual(1, total)
+
+    def test_delete_action_of_another_project_keeps_job_actions(self):
+        action_doc = copy.deepcopy(self.fake_job_0['job_actions'][0])
+        action_id = self.dbapi.add_action(user_id=self.fake_user_id,
+                                          doc=action_doc,
+                                          project_id=self.fake_project_id)
+        job_doc = copy.deepcopy(self.fake_job_0)
+        job_doc['job_actions'] = [{'action_id': action_id}]
+        job_id = self.dbapi.add_job(user_id=self.fake_user_id, doc=job_doc,
+                                    project_id=self.fake_project_id)
+
+        self.dbapi.delete_action(user_id=self.fake_user_id,
+                                 action_id=action_id,
+                                 project_id='another-project')
+
+        result = self.dbapi.get_job(project_id=self.fake_project_id,
+                                    job_id=job_id)
+        self.assertEqual(action_id, result['job_actions'][0]['action_id'])
@@ -415,6 +415,26 @@ class DbSessionTestCase(base.DbTestCase):
             sessionmap = result[index]
             self.assertEqual(100, sessionmap['hold_off'])
 
+    def test_iter_session(self):
+        project_id = self.fake_session_3.get('project_id')
+        for count in range(10):
+            doc = copy.deepcopy(self.fake_session_3)
+            if count % 2:
+                doc['hold_off'] = 100
+            self.dbapi.add_session(project_id=project_id,
+                                   user_id=self.fake_session_3.get('user_id'),
+                                   doc=doc)
+        search_opt = {'match': [{'hold_off': 100}]}
+        sessions = self.dbapi.iter_session(project_id=project_id, offset=1,
+                                           limit=3, search=search_opt)
+        self.assertNotIsInstance(sessions, list)
+        result = list(sessions)
+        self.assertEqual(3, len(result))
+        self.assertEqual(
+            self.dbapi.search_session(project_id=project_id, offset=1,
+                                      limit=3, search=search_opt),
+            result)
+
     @patch('freezer_api.db.sqlalchemy.api.get_session')
     def test_raise_add_session_exist(self, mock_get_session):
         mock_get_session.return_value = mock.MagicMock()
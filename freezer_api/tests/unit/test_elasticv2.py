@@ -13,6 +13,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import datetime
 import elasticsearch
 from unittest import mock
 from unittest.mock import patch
@@ -21,6 +22,7 @@ from oslo_config import cfg
 
 from freezer_api.common import exceptions
 from freezer_api.db.elasticsearch.driver import ElasticSearchDB
+from freezer_api.db.elasticsearch import es_manager
 from freezer_api.storage import elasticv2 as elastic
 from freezer_api.tests.unit import common
 
@@ -187,7 +189,18 @@ class TypeManagerV2(common.FreezerBaseTestCase):
         res = self.type_manager.insert(doc=test_doc)
         self.assertEqual((True, 15), res)
         self.mock_es.index.assert_called_with(index='freezer',
-                                              body=test_doc, id=None)
+                                              body=test_doc, id=None,
+                                              refresh='wait_for')
+        self.assertFalse(self.mock_es.indices.refresh.called)
+
+    def test_insert_uses_refresh_policy(self):
+        type_manager = elastic.TypeManagerV2(self.mock_es, 'freezer',
+                                             refresh='false')
+        self.mock_es.index.return_value = {'created': True, '_version': 1}
+        type_manager.insert(doc={'test_key_412': 'test_value_412'})
+        self.mock_es.index.assert_called_with(
+            index='freezer', body={'test_key_412': 'test_value_412'},
+            id=None, refresh='false')
 
     def test_insert_raise_StorageEngineError_on_ES_Exception(self):
         self.mock_es.index.side_effect = Exception('regular test failure')
@@ -195,7 +208,8 @@ class TypeManagerV2(common.FreezerBaseTestCase):
         self.assertRaises(exceptions.StorageEngineError,
                           self.type_manager.insert, doc=test_doc)
         self.mock_es.index.assert_called_with(index='freezer',
-                                              body=test_doc, id=None)
+                                              body=test_doc, id=None,
+                                              refresh='wait_for')
 
     def test_insert_raise_StorageEngineError_on_ES_TransportError_exception(
             self):
@@ -206,7 +220,8 @@ class TypeManagerV2(common.FreezerBaseTestCase):
         self.assertRaises(exceptions.StorageEngineError,
                           self.type_manager.insert, doc=test_doc)
         self.mock_es.index.assert_called_with(index='freezer',
-                                              body=test_doc, id=None)
+                                              body=test_doc, id=None,
+                                              refresh='wait_for')
 
     def test_insert_raise_DocumentExists_on_ES_TransportError409_exception(
             self):
@@ -218,59 +233,233 @@ class TypeManagerV2(common.FreezerBaseTestCase):
         self.assertRaises(exceptions.DocumentExists, self.type_manager.insert,
                           doc=test_doc)
         self.mock_es.index.assert_called_with(index='freezer',
-                                              body=test_doc, id=None)
+                                              body=test_doc, id=None,
+                                              refresh='wait_for')
 
-    @patch('freezer_api.storage.elasticv2.elasticsearch.Elasticsearch')
-    def test_delete_raises_StorageEngineError_on_scan_exception(
-            self, mock_elasticsearch):
-        doc_id = 'mydocid345'
-        mock_elasticsearch.search.side_effect = Exception(
-            'regular test failure')
-        self.assertRaises(exceptions.StorageEngineError,
-                          self.type_manager.delete, project_id='tecs',
-                          user_id='my_user_id', doc_id=doc_id)
-
-    @patch('freezer_api.storage.elasticv2.elasticsearch.Elasticsearch')
-    def test_delete_raises_StorageEngineError_on_delete_exception(
-            self, mock_elasticsearch):
-        doc_id = 'mydocid345'
-        mock_elasticsearch.search.return_value = [
-            {'_id': 'cicciopassamilolio'}]
-        self.mock_es.delete.side_effect = Exception('regular test failure')
+    def test_delete_raises_StorageEngineError_on_get_exception(self):
+        self.mock_es.get.side_effect = Exception('regular test failure')
         self.assertRaises(exceptions.StorageEngineError,
                           self.type_manager.delete, project_id='tecs',
-                          user_id='my_user_id', doc_id=doc_id)
+                          user_id='my_user_id', doc_id='mydocid345')
+        self.assertFalse(self.mock_es.delete.called)
 
-    def test_delete_raises_StorageEngineError_on_es_delete(
-            self):
-        results = {'hits': {'hits': [{'_id': mock.Mock}]}}
-        self.mock_es.search.return_value = results
-        doc_id = 'mydocid345'
+    def test_delete_raises_StorageEngineError_on_es_delete(self):
+        self.mock_es.get.return_value = {
+            '_source': {'project_id': 'tecs', 'user_id': 'my_user_id'}}
         self.mock_es.delete.side_effect = Exception(
             'regular test failure')
         self.assertRaises(exceptions.StorageEngineError,
                           self.type_manager.delete, project_id='tecs',
-                          user_id='my_user_id', doc_id=doc_id)
+                          user_id='my_user_id', doc_id='mydocid345')
 
     def test_delete_return_none_when_nothing_is_deleted(self):
-        doc_id = 'mydocid345'
-        ret_data = {"hits": {"hits": []}}
-        self.mock_es.search.return_value = ret_data
+        self.mock_es.get.side_effect = elasticsearch.NotFoundError(
+            'not found', meta=mock.Mock(status=404), body={})
         res = self.type_manager.delete(project_id='tecs',
-                                       user_id='my_user_id', doc_id=doc_id)
+                                       user_id='my_user_id',
+                                       doc_id='mydocid345')
         self.assertIsNone(res, 'invalid res {0}'.format(res))
+        self.assertFalse(self.mock_es.delete.called)
+
+    def test_delete_return_none_for_document_of_another_project(self):
+        self.mock_es.get.return_value = {
+            '_source': {'project_id': 'other', 'user_id': 'my_user_id'}}
+        res = self.type_manager.delete(project_id='tecs',
+                                       user_id='my_user_id',
+                                       doc_id='mydocid345')
+        self.assertIsNone(res)
+        self.assertFalse(self.mock_es.delete.called)
 
     def test_delete_return_correct_id_on_success(self):
-        doc_id = 'mydocid345'
-        ret_data = {"hits": {"hits": [{
-            "_id": "cicciopassamilolio"
-        }]}}
-        self.mock_es.search.return_value = ret_data
+        self.mock_es.get.return_value = {
+            '_source': {'project_id': 'tecs', 'user_id': 'my_user_id'}}
         res = self.type_manager.delete(project_id='tecs',
-                                       user_id='my_user_id', doc_id=doc_id)
+                                       user_id='my_user_id',
+                                       doc_id='mydocid345')
+        self.assertEqual('mydocid345', res, 'invalid res {0}'.format(res))
+        self.mock_es.delete.assert_called_once_with(
+            index='freezer', id='mydocid345', refresh='wait_for')
+        self.assertFalse(self.mock_es.search.called)
+        self.assertFalse(self.mock_es.indices.refresh.called)
+
+
+class TestScriptUpdateV2(common.FreezerBaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.mock_es = mock.Mock()
+        self.type_manager = elastic.TypeManagerV2(self.mock_es, 'freezer')
+
+    def test_script_update_returns_version(self):
+        self.mock_es.update.return_value = {'result': 'updated',
+                                            '_version': 4}
+        res = self.type_manager.script_update('doc1', 'script', {'a': 1})
+        self.assertEqual(4, res)
+        self.mock_es.update.assert_called_once_with(
+            index='freezer', id='doc1',
+            body={'script': {'source': 'script', 'lang': 'painless',
+                             'params': {'a': 1}}},
+            refresh='wait_for', retry_on_conflict=3)
+        self.assertFalse(self.mock_es.get.called)
+
+    def test_script_update_with_sequence_number_guard(self):
+        self.mock_es.update.return_value = {'result': 'updated',
+                                            '_version': 4}
+        self.type_manager.script_update('doc1', 'script', {},
+                                        if_seq_no=7, if_primary_term=1)
+        kwargs = self.mock_es.update.call_args[1]
+        self.assertEqual(7, kwargs['if_seq_no'])
+        self.assertEqual(1, kwargs['if_primary_term'])
+        self.assertNotIn('retry_on_conflict', kwargs)
+
+    def test_script_update_raises_AccessForbidden_on_noop(self):
+        self.mock_es.update.return_value = {'result': 'noop',
+                                            '_version': 4}
+        self.assertRaises(exceptions.AccessForbidden,
+                          self.type_manager.script_update, 'doc1', 's', {})
+
+    def test_script_update_maps_errors(self):
+        meta = mock.Mock(status=409)
+        self.mock_es.update.side_effect = elasticsearch.ConflictError(
+            'conflict', meta=meta, body={})
+        self.assertRaises(exceptions.DocumentExists,
+                          self.type_manager.script_update, 'doc1', 's', {})
+        meta = mock.Mock(status=404)
+        self.mock_es.update.side_effect = elasticsearch.NotFoundError(
+            'not found', meta=meta, body={})
+        self.assertRaises(exceptions.DocumentNotFound,
+                          self.type_manager.script_update, 'doc1', 's', {})
+        self.mock_es.update.side_effect = Exception('regular test failure')
+        self.assertRaises(exceptions.StorageEngineError,
+                          self.type_manager.script_update, 'doc1', 's', {})
+
+
+class TestScanV2(common.FreezerBaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.mock_es = mock.Mock()
+        self.backup_manager = elastic.BackupTypeManagerV2(self.mock_es)
+
+    @staticmethod
+    def _page(*ids):
+        return {'hits': {'hits': [
+            {'_source': {'backup_id': i}, 'sort': [0, i]} for i in ids]}}
+
+    def test_scan_walks_pages_with_search_after(self):
+        self.mock_es.search.side_effect = [self._page('a', 'b'),
+                                           self._page('c')]
+        res = list(self.backup_manager.scan(project_id='tecs',
+                                            page_size=2))
+        self.assertEqual(['a', 'b', 'c'], [d['backup_id'] for d in res])
+        first, second = [c[1]['body']
+                         for c in self.mock_es.search.call_args_list]
+        self.assertNotIn('search_after', first)
+        self.assertEqual([es_manager.TYPE_QUERIES['backups']],
+                         first['query']['bool']['filter'])
+        self.assertEqual([0, 'b'], second['search_after'])
+        self.assertEqual(2, second['size'])
+        self.assertNotIn('from', second)
+        self.assertEqual(self.backup_manager.get_sort(), second['sort'])
+        self.assertEqual({'backup_id': {'order': 'asc'}},
+                         second['sort'][-1])
+        self.assertFalse(self.mock_es.open_point_in_time.called)
+
+    def test_scan_pages_resumes_after_cursor(self):
+        self.mock_es.search.side_effect = [self._page('c')]
+        pages = list(self.backup_manager.scan_pages(
+            project_id='tecs', page_size=2, search_after=[0, 'b']))
+        self.assertEqual([([{'backup_id': 'c'}], [0, 'c'])], pages)
+        body = self.mock_es.search.call_args[1]['body']
+        self.assertEqual([0, 'b'], body['search_after'])
+
+    def test_scan_with_point_in_time(self):
+        self.mock_es.open_point_in_time.return_value = {'id': 'pit1'}
+        page = self._page('a', 'b')
+        page['pit_id'] = 'pit2'
+        self.mock_es.search.side_effect = [page, self._page()]
+        res = list(self.backup_manager.scan(project_id='tecs',
+                                            page_size=2,
+                                            point_in_time=True))
+        self.assertEqual(2, len(res))
+        first, second = self.mock_es.search.call_args_list
+        self.assertNotIn('index', first[1])
+        self.assertEqual('pit1', first[1]['body']['pit']['id'])
+        self.assertEqual('pit2', second[1]['body']['pit']['id'])
+        self.mock_es.close_point_in_time.assert_called_once_with(id='pit2')
+
+    def test_scan_closes_point_in_time_on_error(self):
+        self.mock_es.open_point_in_time.return_value = {'id': 'pit1'}
+        self.mock_es.search.side_effect = Exception('regular test failure')
+        self.assertRaises(exceptions.StorageEngineError, list,
+                          self.backup_manager.scan(project_id='tecs',
+                                                   point_in_time=True))
+        self.mock_es.close_point_in_time.assert_called_once_with(id='pit1')
+
+
+class TestBulkV2(common.FreezerBaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.mock_es = mock.Mock()
+        self.type_manager = elastic.TypeManagerV2(self.mock_es, 'freezer')
+
+    @patch('freezer_api.storage.elasticv2.helpers')
+    def test_bulk_insert_sends_chunked_actions(self, mock_helpers):
+        mock_helpers.streaming_bulk.side_effect = (
+            lambda es, actions, **kwargs: [(True, a) for a in actions])
+        docs = [('id{0}'.format(i), {'n': i, '_version': 3})
+                for i in range(3)]
+        res = self.type_manager.bulk_insert(docs, op_type='create',
+                                            chunk_size=2)
+        self.assertEqual(3, res)
+        args, kwargs = mock_helpers.streaming_bulk.call_args
+        self.assertEqual(2, kwargs['chunk_size'])
+        self.assertEqual('wait_for', kwargs['refresh'])
+        self.assertFalse(kwargs['raise_on_error'])
+        self.assertFalse(mock_helpers.parallel_bulk.called)
+
+    @patch('freezer_api.storage.elasticv2.helpers')
+    def test_bulk_insert_builds_actions(self, mock_helpers):
+        sent = []
+        mock_helpers.streaming_bulk.side_effect = (
+            lambda es, actions, **kwargs: [(True, sent.append(a) or a)
+                                           for a in actions])
+        self.type_manager.bulk_insert([('id0', {'n': 0, '_version': 3})])
+        self.type_manager.bulk_update([('id0', {'n': 1})])
+        self.assertEqual([{'_op_type': 'index', '_index': 'freezer',
+                           '_id': 'id0', '_source': {'n': 0}},
+                          {'_op_type': 'update', '_index': 'freezer',
+                           '_id': 'id0', 'doc': {'n': 1}}], sent)
+
+    @patch('freezer_api.storage.elasticv2.helpers')
+    def test_bulk_parallel(self, mock_helpers):
+        mock_helpers.parallel_bulk.return_value = [(True, {})] * 4
+        res = self.type_manager.bulk([{}] * 4, parallel=True,
+                                     thread_count=2)
+        self.assertEqual(4, res)
         self.assertEqual(
-            'cicciopassamilolio', res, 'invalid res {0}'.format(res)
-        )
+            2, mock_helpers.parallel_bulk.call_args[1]['thread_count'])
+
+    @patch('freezer_api.storage.elasticv2.helpers')
+    def test_bulk_maps_item_errors(self, mock_helpers):
+        conflict = (False, {'create': {'_id': 'a', 'status': 409,
+                                       'error': 'conflict'}})
+        malformed = (False, {'index': {'_id': 'b', 'status': 400,
+                                       'error': 'mapper_parsing'}})
+        unavailable = (False, {'index': {'_id': 'c', 'status': 'N/A',
+                                         'exception': 'timeout'}})
+        for results, exc in (
+                ([(True, {}), conflict], exceptions.DocumentExists),
+                ([conflict, malformed], exceptions.BadDataFormat),
+                ([malformed, unavailable], exceptions.StorageEngineError)):
+            mock_helpers.streaming_bulk.return_value = results
+            self.assertRaises(exc, self.type_manager.bulk, [{}])
+
+    @patch('freezer_api.storage.elasticv2.helpers')
+    def test_bulk_raises_StorageEngineError_on_exception(self,
+                                                         mock_helpers):
+        mock_helpers.streaming_bulk.side_effect = Exception(
+            'regular test failure')
+        self.assertRaises(exceptions.StorageEngineError,
+                          self.type_manager.bulk, [{}])
 
 
 class TestBackupManagerV2(common.FreezerBaseTestCase):
@@ -352,12 +541,129 @@ class TestBackupManagerV2(common.FreezerBaseTestCase):
         self.assertEqual(expected_q, q)
 
 
+class TestMonthlyBackupManagerV2(common.FreezerBaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.mock_es = mock.Mock()
+        self.backup_manager = elastic.BackupTypeManagerV2(
+            self.mock_es, 'freezer-backups',
+            write_index='freezer-backups-write')
+
+    def test_insert_uses_the_write_alias(self):
+        self.mock_es.index.return_value = {'created': True, '_version': 1}
+        self.backup_manager.insert({'backup_id': 'bk'}, doc_id='bk')
+        self.assertEqual('freezer-backups-write',
+                         self.mock_es.index.call_args[1]['index'])
+
+    def test_get_locates_the_monthly_index(self):
+        self.mock_es.search.return_value = {'hits': {'hits': [
+            {'_index': 'freezer-backups-2024.10', '_id': 'bk'}]}}
+        self.mock_es.get.return_value = {
+            '_source': {'project_id': 'tecs', 'user_id': 'my_user_id'}}
+        self.backup_manager.get(project_id='tecs', doc_id='bk')
+        self.assertEqual({'query': {'ids': {'values': ['bk']}},
+                          '_source': False, 'size': 1},
+                         self.mock_es.search.call_args[1]['body'])
+        self.mock_es.get.assert_called_once_with(
+            index='freezer-backups-2024.10', id='bk')
+
+    @patch('freezer_api.storage.elasticv2.helpers')
+    def test_bulk_update_locates_the_monthly_indices(self, mock_helpers):
+        sent = []
+        mock_helpers.streaming_bulk.side_effect = (
+            lambda es, actions, **kwargs: [(True, sent.append(a) or a)
+                                           for a in actions])
+        self.mock_es.search.return_value = {'hits': {'hits': [
+            {'_index': 'freezer-backups-2024.11', '_id': 'bk2'},
+            {'_index': 'freezer-backups-2024.10', '_id': 'bk1'}]}}
+        self.backup_manager.bulk_update([('bk1', {'status': 'ok'}),
+                                         ('bk2', {'status': 'ok'})])
+        self.mock_es.search.assert_called_once_with(
+            index='freezer-backups',
+            body={'query': {'ids': {'values': ['bk1', 'bk2']}},
+                  '_source': False, 'size': 2})
+        self.assertEqual(['freezer-backups-2024.10',
+                          'freezer-backups-2024.11'],
+                         [action['_index'] for action in sent])
+
+    @patch('freezer_api.storage.elasticv2.helpers')
+    def test_bulk_update_raises_DocumentNotFound_when_not_located(
+            self, mock_helpers):
+        mock_helpers.streaming_bulk.side_effect = (
+            lambda es, actions, **kwargs: [(True, a) for a in actions])
+        self.mock_es.search.return_value = {'hits': {'hits': [
+            {'_index': 'freezer-backups-2024.10', '_id': 'bk1'}]}}
+        self.assertRaises(exceptions.DocumentNotFound,
+                          self.backup_manager.bulk_update,
+                          [('bk1', {}), ('bk2', {})])
+
+    def test_get_raises_DocumentNotFound_when_not_located(self):
+        self.mock_es.search.return_value = {'hits': {'hits': []}}
+        self.assertRaises(exceptions.DocumentNotFound,
+                          self.backup_manager.get, project_id='tecs',
+                          doc_id='bk')
+        self.mock_es.get.assert_not_called()
+
+    def test_delete_uses_delete_by_query(self):
+        self.mock_es.delete_by_query.return_value = {'deleted': 1}
+        res = self.backup_manager.delete(project_id='tecs', doc_id='bk')
+        self.assertEqual('bk', res)
+        self.mock_es.delete.assert_not_called()
+
+    @patch('freezer_api.storage.elasticv2.timeutils')
+    def test_search_reads_the_indices_since_time_after(self, mock_time):
+        mock_time.utcnow.return_value = datetime.datetime(2024, 11, 17)
+        self.mock_es.search.return_value = {'hits': {'hits': []}}
+        time_after = int(datetime.datetime(
+            2024, 10, 5, tzinfo=datetime.timezone.utc).timestamp())
+        self.backup_manager.search(project_id='tecs',
+                                   search={'time_after': time_after})
+        kwargs = self.mock_es.search.call_args[1]
+        self.assertEqual('freezer-backups-2024.09,freezer-backups-2024.10,'
+                         'freezer-backups-2024.11,freezer-backups-0*',
+                         kwargs['index'])
+        self.assertTrue(kwargs['ignore_unavailable'])
+
+    def test_search_without_time_after_reads_the_alias(self):
+        self.mock_es.search.return_value = {'hits': {'hits': []}}
+        self.backup_manager.search(project_id='tecs', search={})
+        kwargs = self.mock_es.search.call_args[1]
+        self.assertEqual('freezer-backups', kwargs['index'])
+        self.assertNotIn('ignore_unavailable', kwargs)
+
+
 class ClientTypeManagerV2(common.FreezerBaseTestCase):
     def setUp(self):
         super().setUp()
         self.mock_es = mock.Mock()
         self.client_manager = elastic.ClientTypeManagerV2(self.mock_es)
 
+    def test_delete_by_query_is_scoped_to_project_and_user(self):
+        self.mock_es.delete_by_query.return_value = {'deleted': 1}
+        res = self.client_manager.delete(project_id='tecs',
+                                         user_id='my_user_id',
+                                         doc_id='my_client_id')
+        self.assertEqual('my_client_id', res)
+        self.assertFalse(self.mock_es.get.called)
+        self.mock_es.delete_by_query.assert_called_once_with(
+            index='freezer',
+            body=self.client_manager.get_search_query(
+                project_id='tecs', user_id='my_user_id',
+                doc_id='my_client_id'),
+            conflicts='proceed', refresh=True)
+
+    def test_delete_by_query_return_none_when_nothing_is_deleted(self):
+        self.mock_es.delete_by_query.return_value = {'deleted': 0}
+        self.assertIsNone(self.client_manager.delete(
+            project_id='tecs', user_id='my_user_id', doc_id='my_client_id'))
+
+    def test_delete_by_query_raises_StorageEngineError(self):
+        self.mock_es.delete_by_query.side_effect = Exception(
+            'regular test failure')
+        self.assertRaises(exceptions.StorageEngineError,
+                          self.client_manager.delete, project_id='tecs',
+                          user_id='my_user_id', doc_id='my_client_id')
+
     def test_get_search_query(self):
         my_search = {'match': [{'some_field': 'some text'},
                                {'description': 'some other text'}]}
@@ -486,7 +792,8 @@ class JobTypeManagerV2(common.FreezerBaseTestCase):
         self.mock_es.update.assert_called_with(
             index=self.job_manager.index,
             id=common.fake_job_0_job_id,
-            body={"doc": {'status': 'sleepy'}}
+            body={"doc": {'status': 'sleepy'}},
+            refresh='wait_for'
         )
 
     def test_update_raise_DocumentNotFound_when_not_found(self):
@@ -585,7 +892,8 @@ class ActionTypeManagerV2(common.FreezerBaseTestCase):
         self.mock_es.update.assert_called_with(
             index=self.action_manager.index,
             id='poiuuiop7890',
-            body={"doc": {'status': 'sleepy'}}
+            body={"doc": {'status': 'sleepy'}},
+            refresh='wait_for'
         )
 
     def test_update_raise_DocumentNotFound_when_not_found(self):
@@ -688,7 +996,8 @@ class SessionTypeManagerV2(common.FreezerBaseTestCase):
         self.mock_es.update.assert_called_with(
             index=self.session_manager.index,
             id='poiuuiop7890',
-            body={"doc": {'status': 'sleepy'}})
+            body={"doc": {'status': 'sleepy'}},
+            refresh='wait_for')
 
     def test_update_raise_DocumentNotFound_when_not_found(self):
         meta = mock.Mock()
@@ -837,27 +1146,27 @@ class TestElasticSearchEngineV2_backup(
                           backup_id=common.fake_data_0_backup_id)
 
     def test_update_backup_ok(self):
-        self.eng.backup_manager.get.return_value = (
-            common.fake_data_0_wrapped_backup_metadata
-        )
-        self.eng.backup_manager.update.return_value = 1
+        self.eng.backup_manager.script_update.return_value = 1
+        patch = {'status': 'available', 'backup_metadata': {'level': 2}}
         res = self.eng.update_backup(user_id=common.fake_data_0_user_id,
                                      backup_id=common.fake_data_0_backup_id,
-                                     patch_doc={'status': 'available'},
+                                     patch_doc=patch,
                                      project_id='tecs')
         self.assertEqual(common.fake_data_0_backup_id, res)
-        self.eng.backup_manager.update.assert_called_with(
+        self.assertFalse(self.eng.backup_manager.get.called)
+        self.eng.backup_manager.script_update.assert_called_once_with(
             common.fake_data_0_backup_id,
+            elastic.BACKUP_PATCH_SCRIPT,
             {
+                'project_id': 'tecs',
                 'status': 'available',
-                'backup_metadata':
-                    common.fake_data_0_wrapped_backup_metadata[
-                        'backup_metadata']
+                'backup_metadata': {'level': 2}
             }
         )
 
     def test_update_backup_raises_when_not_found(self):
-        self.eng.backup_manager.get.return_value = None
+        self.eng.backup_manager.script_update.side_effect = (
+            exceptions.DocumentNotFound('regular test failure'))
         self.assertRaises(exceptions.DocumentNotFound,
                           self.eng.update_backup,
                           user_id=common.fake_data_0_user_id,
@@ -1351,6 +1660,26 @@ class TestElasticSearchEngine_action(
             common.fake_action_0, common.fake_action_0['action_id']
         )
 
+    def test_add_actions_uses_bulk(self):
+        docs = [{'freezer_action': {'action': 'backup', 'mode': 'fs'}},
+                {'action_id': 'ottonero',
+                 'freezer_action': {'action': 'restore', 'mode': 'fs'}}]
+        res = self.eng.add_actions(project_id='tecs', user_id='duder',
+                                   docs=docs)
+        self.assertEqual([docs[0]['action_id'], 'ottonero'], res)
+        self.eng.action_manager.bulk_insert.assert_called_once_with(
+            [(docs[0]['action_id'], docs[0]), ('ottonero', docs[1])])
+        self.assertEqual('tecs', docs[0]['project_id'])
+        self.assertFalse(self.eng.action_manager.insert.called)
+
+    def test_add_actions_validates_every_doc_first(self):
+        docs = [{'freezer_action': {'action': 'backup', 'mode': 'fs'}},
+                {'action_id': 'not an id',
+                 'freezer_action': {'action': 'backup', 'mode': 'fs'}}]
+        self.assertRaises(exceptions.BadDataFormat, self.eng.add_actions,
+                          project_id='tecs', user_id='duder', docs=docs)
+        self.assertFalse(self.eng.action_manager.bulk_insert.called)
+
     def test_add_action_raises_StorageEngineError_when_manager_insert_raises(
             self):
         self.eng.action_manager.get.return_value = None
@@ -1559,8 +1888,8 @@ class TestElasticSearchEngine_session(
                           session_id=common.fake_session_0['session_id'])
 
     def test_update_session_raises_DocumentNotFound_when_doc_not_exists(self):
-        self.eng.session_manager.get.side_effect = exceptions.DocumentNotFound(
-            'regular test failure')
+        self.eng.session_manager.script_update.side_effect = (
+            exceptions.DocumentNotFound('regular test failure'))
         patch = {'session_id': 'black_milk'}
         self.assertRaises(exceptions.DocumentNotFound, self.eng.update_session,
                           project_id='tecs',
@@ -1568,29 +1897,22 @@ class TestElasticSearchEngine_session(
                           session_id=common.fake_session_0['session_id'],
                           patch_doc=patch)
 
-    def test_update_session_raises_DocumentNotFound_when_update_raises(
-            self):
-        self.eng.session_manager.get.return_value = common.get_fake_session_0()
-        patch = {'session_id': 'black_milk'}
-        self.eng.session_manager.update.side_effect = (
-            exceptions.DocumentNotFound('regular test failure')
-        )
-        self.assertRaises(exceptions.DocumentNotFound, self.eng.update_session,
-                          project_id='tecs',
-                          user_id=common.fake_session_0['session_id'],
-                          session_id=common.fake_session_0['session_id'],
-                          patch_doc=patch)
-
     def test_update_session_returns_new_doc_version(self):
-        self.eng.session_manager.get.return_value = common.get_fake_session_0()
-        patch = {'session_id': 'group_four'}
-        self.eng.session_manager.update.return_value = 11
+        patch = {'session_id': 'group_four', 'project_id': 'other',
+                 'jobs': {'job1': {'status': 'running'}}}
+        self.eng.session_manager.script_update.return_value = 11
         res = self.eng.update_session(
             project_id='tecs',
             user_id=common.fake_session_0['user_id'],
             session_id=common.fake_session_0['session_id'],
             patch_doc=patch)
         self.assertEqual(11, res)
+        self.assertFalse(self.eng.session_manager.get.called)
+        self.eng.session_manager.script_update.assert_called_once_with(
+            common.fake_session_0['session_id'],
+            elastic.MERGE_PATCH_SCRIPT,
+            {'project_id': 'tecs',
+             'patch': {'jobs': {'job1': {'status': 'running'}}}})
 
     def test_replace_session_raises_AccessForbidden_when_session_manager_raise(
             self):
@@ -1640,7 +1962,89 @@ class TestElasticSearchEngineV2(common.FreezerBaseTestCase, ElasticSearchDB):
         self.eng = elastic.ElasticSearchEngineV2(backend=backend)
         self.eng.init(index='freezer', **kwargs)
 
+    @patch('freezer_api.storage.elasticv2.elasticsearch')
+    def test_init_with_an_index_per_type(self, mock_elasticsearch):
+        self.eng.init(index='freezer', index_per_type=True,
+                      hosts='http://elasticservaddr:1997')
+        self.assertEqual('freezer-backups', self.eng.backup_manager.index)
+        self.assertEqual('freezer-clients', self.eng.client_manager.index)
+        self.assertEqual('freezer-jobs', self.eng.job_manager.index)
+        self.assertEqual('freezer-actions', self.eng.action_manager.index)
+        self.assertEqual('freezer-sessions', self.eng.session_manager.index)
+        self.assertNotIn('index_per_type',
+                         mock_elasticsearch.Elasticsearch.call_args[1])
+        self.eng.es.delete_by_query.return_value = {'deleted': 1}
+        self.eng.purge_project(project_id='tecs')
+        self.assertEqual(
+            'freezer-backups,freezer-clients,freezer-jobs,freezer-actions,'
+            'freezer-sessions',
+            self.eng.es.delete_by_query.call_args[1]['index'])
+
+    @patch('freezer_api.storage.elasticv2.elasticsearch')
+    def test_init_with_monthly_backup_indices(self, mock_elasticsearch):
+        self.eng.init(index='freezer', monthly_backup_indices=True,
+                      hosts='http://elasticservaddr:1997')
+        self.assertEqual('freezer-backups', self.eng.backup_manager.index)
+        self.assertEqual('freezer-backups-write',
+                         self.eng.backup_manager.write_index)
+        self.assertEqual('freezer', self.eng.job_manager.index)
+        self.assertNotIn('monthly_backup_indices',
+                         mock_elasticsearch.Elasticsearch.call_args[1])
+
+    def test_scan_uses_the_manager_of_the_type(self):
+        self.eng.job_manager = mock.Mock()
+        self.eng.job_manager.scan.return_value = iter([{'job_id': 'a'}])
+        res = list(self.eng.scan('jobs', all_projects=True, page_size=10))
+        self.assertEqual([{'job_id': 'a'}], res)
+        self.eng.job_manager.scan.assert_called_once_with(
+            project_id=None, all_projects=True, search=None, page_size=10,
+            point_in_time=False)
+        self.assertRaises(exceptions.BadDataFormat, self.eng.scan, 'nodes')
+
     def test_raise_validate_opts_when_ca_certs_file_not_exist(self):
         self.eng.conf.update({'ca_certs': 'invalid_ca_certs_file'})
         self.assertRaises(Exception,
                           self.eng._validate_opts)
+
+    def test_purge_project_deletes_by_query(self):
+        self.eng.es = mock.Mock()
+        self.eng.es.delete_by_query.return_value = {'deleted': 7}
+        progress = mock.Mock()
+        res = self.eng.purge_project(project_id='tecs', batch_size=50,
+                                     progress=progress)
+        self.assertEqual({'freezer': 7}, res)
+        progress.assert_called_once_with('freezer', 7)
+        self.eng.es.delete_by_query.assert_called_once_with(
+            index='freezer', query={'term': {'project_id': 'tecs'}},
+            conflicts='proceed', scroll_size=50, refresh=True)
+
+    @patch('freezer_api.storage.elasticv2.elasticsearch')
+    def test_purge_project_follows_the_refresh_policy(self,
+                                                      mock_elasticsearch):
+        self.eng.init(index='freezer', refresh='false',
+                      hosts='http://elasticservaddr:1997')
+        self.eng.es.delete_by_query.return_value = {'deleted': 1}
+        self.eng.purge_project(project_id='tecs')
+        self.assertFalse(
+            self.eng.es.delete_by_query.call_args[1]['refresh'])
+
+    def test_purge_project_raises_StorageEngineError(self):
+        self.eng.es = mock.Mock()
+        self.eng.es.delete_by_query.side_effect = Exception(
+            'regular test failure')
+        self.assertRaises(exceptions.StorageEngineError,
+                          self.eng.purge_project, project_id='tecs')
+
+    def test_archive_deleted_is_a_noop(self):
+        self.assertEqual({}, self.eng.archive_deleted(before=None))
+
+    @patch('freezer_api.storage.elasticv2.elasticsearch')
+    def test_init_passes_refresh_policy_to_managers(self, mock_elasticsearch):
+        self.eng.init(index='freezer', refresh='false',
+                      hosts='http://elasticservaddr:1997')
+        self.assertNotIn('refresh',
+                         mock_elasticsearch.Elasticsearch.call_args[1])
+        for manager in (self.eng.backup_manager, self.eng.client_manager,
+                        self.eng.job_manager, self.eng.action_manager,
+                        self.eng.session_manager):
+            self.assertEqual('false', manager.refresh)
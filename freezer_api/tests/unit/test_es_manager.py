@@ -0,0 +1,174 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import datetime
+from unittest import mock
+from unittest.mock import patch
+
+from freezer_api.db.elasticsearch import es_manager
+from freezer_api.tests.unit import common
+
+
+class TestElasticSearchManagerIndexPerType(common.FreezerBaseTestCase):
+
+    @patch('freezer_api.db.elasticsearch.es_manager.elasticsearch')
+    def setUp(self, mock_elasticsearch):
+        super().setUp()
+        self.elk = mock.Mock()
+        mock_elasticsearch.Elasticsearch.return_value = self.elk
+        self.manager = es_manager.ElasticSearchManager(
+            index='freezer', index_per_type=True, number_of_replicas=1,
+            select_mapping='', yes=True,
+            type_shards={'backups': '3'},
+            type_replicas={'jobs': '0'},
+            type_refresh_interval={'backups': '30s'})
+        self.aliases = {}
+        self.elk.indices.exists_alias.side_effect = (
+            lambda name: name in self.aliases)
+        self.elk.indices.get_alias.side_effect = (
+            lambda name: {index: {} for index in self.aliases[name]})
+
+    def test_type_settings(self):
+        self.assertEqual({'number_of_replicas': 1, 'number_of_shards': 3,
+                          'refresh_interval': '30s'},
+                         self.manager._type_settings('backups'))
+        self.assertEqual({'number_of_replicas': 0},
+                         self.manager._type_settings('jobs'))
+
+    def test_db_sync_creates_one_index_per_type(self):
+        self.manager.db_sync()
+        created = {c[1]['index']: c[1]['body']
+                   for c in self.elk.indices.create.call_args_list}
+        self.assertEqual(5, len(created))
+        backups = created['freezer-backups-000001']
+        self.assertEqual({'freezer-backups': {}}, backups['aliases'])
+        self.assertEqual(3, backups['settings']['number_of_shards'])
+        self.assertIn('mappings', backups)
+        self.assertNotIn('mappings', created['freezer-sessions-000001'])
+
+    def test_db_sync_updates_mappings_of_existing_indices(self):
+        self.aliases['freezer-jobs'] = ['freezer-jobs-000001']
+        self.manager.db_sync()
+        self.elk.indices.put_mapping.assert_called_once_with(
+            body=self.manager.mappings['jobs'], index='freezer-jobs')
+        self.assertNotIn('freezer-jobs-000002', [
+            c[1]['index'] for c in self.elk.indices.create.call_args_list])
+
+    def test_reindex_splits_the_shared_index(self):
+        self.elk.indices.exists.return_value = True
+        self.elk.reindex.return_value = {'total': 2}
+        res = self.manager.reindex()
+        self.assertEqual(2, res['actions'])
+        sources = {c[1]['body']['dest']['index']: c[1]['body']['source']
+                   for c in self.elk.reindex.call_args_list}
+        self.assertEqual(
+            {'index': 'freezer', 'query': es_manager.TYPE_QUERIES['jobs']},
+            sources['freezer-jobs-000001'])
+        self.elk.indices.update_aliases.assert_any_call(body={'actions': [
+            {'add': {'index': 'freezer-jobs-000001',
+                     'alias': 'freezer-jobs'}}]})
+
+    def test_reindex_rebuilds_and_swaps_alias(self):
+        self.aliases['freezer-backups'] = ['freezer-backups-000002']
+        self.elk.reindex.return_value = {'total': 5}
+        self.manager.reindex()
+        self.elk.reindex.assert_any_call(
+            body={'source': {'index': 'freezer-backups'},
+                  'dest': {'index': 'freezer-backups-000003'}},
+            wait_for_completion=True, refresh=True)
+        self.elk.indices.update_aliases.assert_any_call(body={'actions': [
+            {'add': {'index': 'freezer-backups-000003',
+                     'alias': 'freezer-backups'}},
+            {'remove_index': {'index': 'freezer-backups-000002'}}]})
+
+    def test_reindex_requires_index_per_type_or_monthly_indices(self):
+        self.manager.conf['index_per_type'] = False
+        self.assertRaises(Exception, self.manager.reindex)
+
+
+class TestElasticSearchManagerMonthlyBackups(common.FreezerBaseTestCase):
+
+    now = datetime.datetime(2024, 11, 17, 10, 30)
+
+    @patch('freezer_api.db.elasticsearch.es_manager.elasticsearch')
+    def setUp(self, mock_elasticsearch):
+        super().setUp()
+        self.elk = mock.Mock()
+        mock_elasticsearch.Elasticsearch.return_value = self.elk
+        self.manager = es_manager.ElasticSearchManager(
+            index='freezer', monthly_backup_indices=True,
+            number_of_replicas=1, select_mapping='', yes=True)
+        self.aliases = {}
+        self.elk.indices.exists_alias.side_effect = (
+            lambda name: name in self.aliases)
+        self.elk.indices.get_alias.side_effect = (
+            lambda name: {index: {} for index in self.aliases[name]})
+
+    def test_reindex_copies_the_shared_backups_next_to_monthly_ones(self):
+        self.aliases['freezer-backups'] = ['freezer-backups-2024.11']
+        self.elk.indices.exists.return_value = True
+        self.elk.reindex.return_value = {'total': 3}
+        self.assertEqual({'backups': 3}, self.manager.reindex())
+        self.elk.reindex.assert_called_once_with(
+            body={'source': {'index': 'freezer',
+                             'query': es_manager.TYPE_QUERIES['backups']},
+                  'dest': {'index': 'freezer-backups-000001'}},
+            wait_for_completion=True, refresh=True)
+        self.elk.indices.update_aliases.assert_called_once_with(body={
+            'actions': [{'add': {'index': 'freezer-backups-000001',
+                                 'alias': 'freezer-backups'}}]})
+
+    def test_reindex_copies_the_shared_backups_once(self):
+        self.aliases['freezer-backups'] = ['freezer-backups-000001',
+                                           'freezer-backups-2024.11']
+        self.assertEqual({}, self.manager.reindex())
+        self.elk.reindex.assert_not_called()
+        self.elk.indices.update_aliases.assert_not_called()
+
+    def test_rotate_creates_monthly_indices_and_moves_write_alias(self):
+        self.aliases['freezer-backups'] = ['freezer-backups-2024.10',
+                                           'freezer-backups-2024.11']
+        self.aliases['freezer-backups-write'] = ['freezer-backups-2024.10']
+        created = self.manager.rotate_backup_indices(months_ahead=2,
+                                                     now=self.now)
+        self.assertEqual(['freezer-backups-2024.12',
+                          'freezer-backups-2025.01'], created)
+        body = self.elk.indices.create.call_args[1]['body']
+        self.assertEqual({'freezer-backups': {}}, body['aliases'])
+        self.elk.indices.update_aliases.assert_called_once_with(body={
+            'actions': [
+                {'remove': {'index': 'freezer-backups-2024.10',
+                            'alias': 'freezer-backups-write'}},
+                {'add': {'index': 'freezer-backups-2024.11',
+                         'alias': 'freezer-backups-write',
+                         'is_write_index': True}}]})
+
+    def test_rotate_is_idempotent(self):
+        self.aliases['freezer-backups'] = ['freezer-backups-2024.11',
+                                           'freezer-backups-2024.12']
+        self.aliases['freezer-backups-write'] = ['freezer-backups-2024.11']
+        self.assertEqual([], self.manager.rotate_backup_indices(
+            now=self.now))
+        self.elk.indices.create.assert_not_called()
+        self.elk.indices.update_aliases.assert_not_called()
+
+    def test_drop_backup_indices(self):
+        self.aliases['freezer-backups'] = ['freezer-backups-000001',
+                                           'freezer-backups-2024.09',
+                                           'freezer-backups-2024.10',
+                                           'freezer-backups-2024.11']
+        self.aliases['freezer-backups-write'] = ['freezer-backups-2024.10']
+        dropped = self.manager.drop_backup_indices(self.now)
+        self.assertEqual(['freezer-backups-2024.09'], dropped)
+        self.elk.indices.delete.assert_called_once_with(
+            index='freezer-backups-2024.09')
@@ -0,0 +1,101 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import threading
+from unittest import mock
+
+from freezer_api.tests.benchmarks import fleet
+from freezer_api.tests.unit import common
+
+
+class PercentileTestCase(common.FreezerBaseTestCase):
+
+    def test_nearest_rank(self):
+        ordered = [float(i) for i in range(1, 101)]
+        self.assertEqual(50.0, fleet.percentile(ordered, 50))
+        self.assertEqual(99.0, fleet.percentile(ordered, 99))
+        self.assertEqual(1.0, fleet.percentile([1.0], 99))
+
+    def test_empty(self):
+        self.assertEqual(0.0, fleet.percentile([], 50))
+
+
+class StatsTestCase(common.FreezerBaseTestCase):
+
+    def test_report(self):
+        stats = fleet.Stats()
+        for i in range(1, 11):
+            stats.record('poll_jobs', i / 1000.0, True)
+        stats.record('post_backup', 0.5, False)
+        report = stats.report(2.0)
+        self.assertEqual(11, report['requests'])
+        self.assertEqual(1, report['errors'])
+        self.assertEqual(5.5, report['throughput'])
+        poll = report['operations']['poll_jobs']
+        self.assertEqual(10, poll['requests'])
+        self.assertEqual(0.0, poll['error_rate'])
+        self.assertEqual(5.0, poll['p50_ms'])
+        self.assertEqual(10.0, poll['max_ms'])
+        self.assertEqual(1.0, report['operations']['post_backup'][
+            'error_rate'])
+        self.assertIn('poll_jobs', fleet.format_report(report))
+
+    def test_empty_report(self):
+        report = fleet.Stats().report(1.0)
+        self.assertEqual(0, report['requests'])
+        self.assertEqual(0.0, report['error_rate'])
+
+
+class AgentTestCase(common.FreezerBaseTestCase):
+
+    def _agent(self, *argv):
+        options = fleet.parse_args(['--prefix', 'test'] + list(argv))
+        return fleet.Agent(3, options, fleet.Stats(), threading.Event())
+
+    def test_headers_without_keystone(self):
+        agent = self._agent('--projects', '2')
+        self.assertEqual('test-project-1', agent.project_id)
+        self.assertEqual('test-project-1', agent.headers['X-Tenant-Id'])
+        self.assertEqual('Confirmed', agent.headers['X-Identity-Status'])
+        self.assertEqual('test-agent-3', agent.client_id)
+
+    def test_headers_with_token(self):
+        agent = self._agent('--token', 'secret', '--project-id', 'p1')
+        self.assertEqual('secret', agent.headers['X-Auth-Token'])
+        self.assertNotIn('X-Identity-Status', agent.headers)
+        self.assertEqual('/v2/p1', agent._root)
+
+    def test_token_requires_project(self):
+        self.assertRaises(SystemExit, fleet.parse_args, ['--token', 'secret'])
+
+    def test_cycle_runs_the_polled_jobs(self):
+        agent = self._agent('--poll-interval', '0', '--job-time', '0')
+        agent.session_id = 'session'
+        responses = {'poll_jobs': {'jobs': [{'job_id': 'job1'}]},
+                     'session_start': {'session_tag': 1}}
+        with mock.patch.object(agent, 'request', side_effect=(
+                lambda operation, *args, **kwargs:
+                responses.get(operation, {}))) as request:
+            self.assertTrue(agent.cycle())
+        self.assertEqual(
+            ['poll_jobs', 'job_event', 'session_start', 'post_backup',
+             'session_end', 'job_event'],
+            [call[0][0] for call in request.call_args_list])
+        self.assertEqual(1, agent.session_tag)
+
+    def test_request_error_is_recorded(self):
+        agent = self._agent()
+        with mock.patch('http.client.HTTPConnection.request',
+                        side_effect=ConnectionRefusedError):
+            self.assertIsNone(agent.request('poll_jobs', 'GET', '/jobs'))
+        self.assertEqual(1, agent.stats.report(1.0)['errors'])
+        self.assertIsNone(agent._connection)
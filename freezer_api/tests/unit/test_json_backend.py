@@ -0,0 +1,105 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import datetime
+from unittest import mock
+
+import falcon
+from falcon import testing
+from oslo_serialization import jsonutils
+import testtools
+
+from freezer_api.api.common import json_backend
+from freezer_api.tests.unit import common
+
+DOC = {'job_id': 'job1', 'level': 3, 'ratio': 0.5, 'encrypted': False,
+       'excluded_files': ['/tmp', '/var/cache'], 'description': u'caf\xe9',
+       'schedule': {'event': None}}
+
+
+class BackendsTestCase(common.FreezerBaseTestCase):
+
+    def _backends(self):
+        backends = [json_backend.StdlibBackend]
+        if json_backend.orjson:
+            backends.append(json_backend.OrjsonBackend)
+        return backends
+
+    def test_round_trip(self):
+        for backend in self._backends():
+            encoded = backend.dumps(DOC)
+            self.assertIsInstance(encoded, bytes)
+            for decoder in self._backends():
+                self.assertEqual(DOC, decoder.loads(encoded))
+                self.assertEqual(DOC, decoder.loads(encoded.decode('utf-8')))
+
+    def test_same_primitives_as_jsonutils(self):
+        doc = {'created_at': datetime.datetime(2026, 1, 2, 3, 4, 5),
+               1: 'integer key', 'tags': {'a'}}
+        expected = jsonutils.loads(jsonutils.dumps(doc))
+        for backend in self._backends():
+            self.assertEqual(expected, backend.loads(backend.dumps(doc)))
+
+    def test_malformed(self):
+        for backend in self._backends():
+            self.assertRaises(ValueError, backend.loads, b'{"job_id": ')
+
+    @testtools.skipUnless(json_backend.orjson, 'orjson is not installed')
+    def test_orjson_falls_back_on_large_integers(self):
+        doc = {'size': 2 ** 70}
+        self.assertEqual(doc, json_backend.OrjsonBackend.loads(
+            json_backend.OrjsonBackend.dumps(doc)))
+
+
+class SetBackendTestCase(common.FreezerBaseTestCase):
+
+    def setUp(self):
+        super(SetBackendTestCase, self).setUp()
+        self.addCleanup(setattr, json_backend, '_backend',
+                        json_backend.get_backend())
+
+    def test_stdlib(self):
+        json_backend.set_backend('stdlib')
+        self.assertIs(json_backend.StdlibBackend, json_backend.get_backend())
+        self.assertEqual(DOC, json_backend.loads(json_backend.dumps(DOC)))
+
+    @mock.patch.object(json_backend, 'orjson', None)
+    def test_auto_without_orjson(self):
+        self.assertIs(json_backend.StdlibBackend,
+                      json_backend.set_backend('auto'))
+
+    @mock.patch.object(json_backend, 'orjson', None)
+    def test_orjson_not_installed(self):
+        self.assertRaises(ValueError, json_backend.set_backend, 'orjson')
+
+    @testtools.skipUnless(json_backend.orjson, 'orjson is not installed')
+    def test_auto_with_orjson(self):
+        self.assertIs(json_backend.OrjsonBackend,
+                      json_backend.set_backend('auto'))
+
+
+class Jobs(object):
+    def on_post(self, req, resp):
+        resp.media = {'jobs': [req.get_media()]}
+
+
+class MediaHandlerTestCase(common.FreezerBaseTestCase):
+
+    def test_request_and_response(self):
+        app = falcon.App()
+        handler = json_backend.media_handler()
+        app.req_options.media_handlers[falcon.MEDIA_JSON] = handler
+        app.resp_options.media_handlers[falcon.MEDIA_JSON] = handler
+        app.add_route('/jobs', Jobs())
+        result = testing.TestClient(app).simulate_post('/jobs', json=DOC)
+        self.assertEqual(200, result.status_code)
+        self.assertEqual({'jobs': [DOC]}, result.json)
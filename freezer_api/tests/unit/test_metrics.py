@@ -0,0 +1,90 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+from unittest import mock
+
+import falcon
+from falcon import testing
+
+from freezer_api.api.common import metrics
+from freezer_api.tests.unit import common
+
+
+class JobsResource(object):
+    def on_get(self, req, resp, project_id):
+        resp.media = {'jobs': [], 'project_id': project_id}
+
+    def on_post(self, req, resp, project_id):
+        raise falcon.HTTPBadRequest()
+
+
+class TestMetricsMiddleware(common.FreezerBaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        app = falcon.App(middleware=[metrics.MetricsMiddleware()])
+        app.add_route('/{project_id}/jobs', JobsResource())
+        self.client = testing.TestClient(app)
+
+    @staticmethod
+    def _value(name, **labels):
+        return metrics.REGISTRY.get_sample_value(name, labels) or 0
+
+    def test_requests_are_labelled_by_route_template(self):
+        labels = {'route': '/{project_id}/jobs', 'method': 'GET'}
+        requests = self._value('freezer_api_requests_total', **labels)
+        size = self._value('freezer_api_response_size_bytes_sum', **labels)
+
+        result = self.client.simulate_get('/tecs/jobs')
+
+        self.assertEqual(requests + 1,
+                         self._value('freezer_api_requests_total', **labels))
+        self.assertEqual(requests + 1, self._value(
+            'freezer_api_request_duration_seconds_count', **labels))
+        self.assertEqual(
+            size + len(result.content),
+            self._value('freezer_api_response_size_bytes_sum', **labels))
+
+    def test_errors_are_counted_by_status(self):
+        labels = {'route': '/{project_id}/jobs', 'method': 'POST',
+                  'status': '400'}
+        errors = self._value('freezer_api_request_errors_total', **labels)
+        self.client.simulate_post('/tecs/jobs')
+        self.assertEqual(errors + 1, self._value(
+            'freezer_api_request_errors_total', **labels))
+
+    def test_unmatched_routes_share_a_label(self):
+        labels = {'route': metrics.UNMATCHED_ROUTE, 'method': 'GET'}
+        requests = self._value('freezer_api_requests_total', **labels)
+        self.client.simulate_get('/not/a/route/1')
+        self.client.simulate_get('/not/a/route/2')
+        self.assertEqual(requests + 2,
+                         self._value('freezer_api_requests_total', **labels))
+
+
+class TestMetricsApp(common.FreezerBaseTestCase):
+
+    def test_app_exposes_prometheus_text_format(self):
+        app = metrics.app_factory(None)
+        start_response = mock.Mock()
+        body = b''.join(app({'REQUEST_METHOD': 'GET', 'PATH_INFO': '/',
+                             'QUERY_STRING': ''}, start_response))
+        self.assertEqual('200 OK', start_response.call_args[0][0])
+        self.assertIn(b'# TYPE freezer_api_requests_total counter', body)
+
+    def test_multiprocess_registry_reads_the_worker_files(self):
+        with mock.patch.dict('os.environ', {
+                metrics.MULTIPROC_DIR_ENV: self.test_dir}):
+            registry = metrics.get_registry()
+        self.assertIsNot(metrics.REGISTRY, registry)
+        # no worker wrote metrics to the directory yet
+        self.assertEqual([], list(registry.collect()))
@@ -14,10 +14,13 @@
 
 from unittest import mock
 
+import falcon
+from falcon import testing
 import webob.exc
 
 from freezer_api.api.common import middleware
 from freezer_api.api.common import utils
+from freezer_api.db.sqlalchemy import query_stats
 from freezer_api.tests.unit import common
 
 
@@ -83,3 +86,45 @@ class TestInjectContext(common.FreezerBaseTestCase):
 
         self.assertEqual(existing_context, req.context)
         self.assertEqual(existing_context, req.env['freezer.context'])
+
+
+class QueryingResource(object):
+    def __init__(self, queries):
+        self.queries = queries
+
+    def on_get(self, req, resp):
+        stats = query_stats.current()
+        for i in range(self.queries):
+            stats.record('SELECT * FROM jobs WHERE id = {0}'.format(i), 0.001)
+        resp.media = {}
+
+
+class TestQueryStatsMiddleware(common.FreezerBaseTestCase):
+
+    def _client(self, queries):
+        app = falcon.App(middleware=[
+            utils.FuncMiddleware(utils.inject_context),
+            middleware.QueryStatsMiddleware()])
+        app.add_route('/jobs', QueryingResource(queries))
+        return testing.TestClient(app)
+
+    def test_server_timing_header(self):
+        result = self._client(3).simulate_get('/jobs')
+        header = result.headers['Server-Timing']
+        self.assertIn('db;dur=3.000;desc="3 queries"', header)
+        self.assertIn('total;dur=', header)
+
+    @mock.patch.object(middleware, 'LOG')
+    def test_warning_above_threshold(self, mock_log):
+        self._config_fixture.config(request_query_warning_threshold=2,
+                                    group='database')
+        self._client(3).simulate_get('/jobs')
+        self.assertTrue(mock_log.warning.called)
+        self.assertIn('3 x SELECT * FROM jobs WHERE id = ?',
+                      mock_log.warning.call_args[0][1]['top'])
+
+    @mock.patch.object(middleware, 'LOG')
+    def test_no_warning_below_threshold(self, mock_log):
+        self._client(3).simulate_get('/jobs')
+        self.assertFalse(mock_log.warning.called)
+        self.assertEqual(3, mock_log.info.call_args[0][1]['queries'])
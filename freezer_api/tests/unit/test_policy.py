@@ -40,6 +40,8 @@ class TestPolicyEnforcement(base.BaseTestCase):
         # project-scoped reader (e.g., global or administrative GETs).
         global_get_operations = [
             'jobs:get_all_projects',
+            'admin:pool_statistics',
+            'admin:profile_request',
         ]
 
         for rule in self.rules:
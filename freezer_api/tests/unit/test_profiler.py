@@ -0,0 +1,71 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from unittest import mock
+
+import sqlalchemy as sa
+
+from freezer_api.common import elasticv2_utils
+from freezer_api.common import exceptions
+from freezer_api.common import profiler
+from freezer_api import policy
+from freezer_api.storage import elasticv2
+from freezer_api.tests.unit import common
+from freezer_api.tests.unit import fixtures as freezer_fixtures
+
+
+class TestProfiler(common.FreezerBaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.profiler = self.useFixture(freezer_fixtures.ProfilerFixture())
+
+    def test_policy_checks_are_traced(self):
+        ctx = common.FakeContext(roles=['reader'], is_admin=False)
+        self.assertRaises(exceptions.AccessForbidden, policy.can,
+                          'projects:purge', ctx)
+        self.assertEqual(['policy-start', 'policy-stop'],
+                         self.profiler.names)
+        self.assertEqual('projects:purge',
+                         self.profiler.notifications[0]['info']['rule'])
+
+    def test_schema_validation_is_traced(self):
+        self.assertRaises(exceptions.BadDataFormat,
+                          elasticv2_utils.JobDoc.validate, {})
+        self.assertEqual(['jsonschema-start', 'jsonschema-stop'],
+                         self.profiler.names)
+
+    def test_elasticsearch_calls_are_traced(self):
+        es = mock.Mock()
+        es.index.return_value = {'created': True, '_version': 1}
+        manager = elasticv2.TypeManagerV2(es, 'freezer')
+        manager.insert({'project_id': 'tecs'}, doc_id='doc')
+        self.assertEqual(['elasticsearch-start', 'elasticsearch-stop'],
+                         self.profiler.names)
+
+    def test_sqlalchemy_statements_are_traced(self):
+        self._config_fixture.config(enabled=True, trace_sqlalchemy=True,
+                                    group='profiler')
+        engine = sa.create_engine('sqlite://')
+        self.addCleanup(engine.dispose)
+        profiler.trace_engine(engine)
+        with engine.connect() as connection:
+            connection.execute(sa.text('SELECT 1'))
+        self.assertEqual(['db-start', 'db-stop'], self.profiler.names)
+
+    def test_sqlalchemy_statements_are_not_traced_when_disabled(self):
+        engine = sa.create_engine('sqlite://')
+        self.addCleanup(engine.dispose)
+        profiler.trace_engine(engine)
+        with engine.connect() as connection:
+            connection.execute(sa.text('SELECT 1'))
+        self.assertEqual([], self.profiler.names)
@@ -0,0 +1,93 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import os
+import pstats
+
+import falcon
+from falcon import testing
+
+from freezer_api.api.common import profiling
+from freezer_api.api.common import utils
+from freezer_api.tests.unit import common
+
+
+def list_jobs():
+    return sorted(str(i) for i in range(1000))
+
+
+class JobsResource(object):
+    def on_get(self, req, resp):
+        resp.media = {'jobs': list_jobs()[:3]}
+
+
+class TestProfilingMiddleware(common.FreezerBaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self._config_fixture.config(enabled=True, group='request_profiling')
+        app = falcon.App(middleware=[
+            utils.FuncMiddleware(utils.inject_context),
+            profiling.ProfilingMiddleware()])
+        app.add_route('/jobs', JobsResource())
+        self.client = testing.TestClient(app)
+
+    def _get(self, roles='admin', mode='cpu'):
+        headers = {'X-Roles': roles, 'X-Tenant-Id': 'tenant',
+                   'X-Openstack-Request-ID': 'req-1234'}
+        if mode:
+            headers[profiling.PROFILE_HEADER] = mode
+        return self.client.simulate_get('/jobs', headers=headers)
+
+    def test_summary_header(self):
+        result = self._get()
+        self.assertEqual(falcon.HTTP_200, result.status)
+        summary = result.headers[profiling.SUMMARY_HEADER]
+        self.assertIn('test_profiling.py', summary)
+        self.assertIn('(list_jobs) calls=1', summary)
+        self.assertNotIn(profiling.FILE_HEADER, result.headers)
+
+    def test_summary_is_limited_to_top(self):
+        self._config_fixture.config(top=2, group='request_profiling')
+        summary = self._get().headers[profiling.SUMMARY_HEADER]
+        self.assertEqual(2, len(summary.split('; ')))
+
+    def test_stats_are_stored_in_output_dir(self):
+        self._config_fixture.config(output_dir=self.test_dir,
+                                    group='request_profiling')
+        filename = self._get().headers[profiling.FILE_HEADER]
+        self.assertTrue(filename.endswith('-req-1234.pstats'))
+        stats = pstats.Stats(os.path.join(self.test_dir, filename))
+        self.assertTrue(any(func[2] == 'list_jobs' for func in stats.stats))
+
+    def test_not_profiled_without_header(self):
+        result = self._get(mode=None)
+        self.assertNotIn(profiling.SUMMARY_HEADER, result.headers)
+
+    def test_not_profiled_for_non_admin(self):
+        result = self._get(roles='member')
+        self.assertEqual(falcon.HTTP_200, result.status)
+        self.assertNotIn(profiling.SUMMARY_HEADER, result.headers)
+
+    def test_not_profiled_when_disabled(self):
+        self._config_fixture.config(enabled=False, group='request_profiling')
+        self.assertNotIn(profiling.SUMMARY_HEADER, self._get().headers)
+
+    def test_unsupported_mode(self):
+        self.assertEqual(falcon.HTTP_400, self._get(mode='memory').status)
+
+    def test_one_request_profiled_at_a_time(self):
+        with profiling._LOCK:
+            result = self._get()
+        self.assertEqual(falcon.HTTP_200, result.status)
+        self.assertNotIn(profiling.SUMMARY_HEADER, result.headers)
+        self.assertIn(profiling.SUMMARY_HEADER, self._get().headers)
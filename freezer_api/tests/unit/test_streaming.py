@@ -0,0 +1,109 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import json
+
+import falcon
+from falcon import testing
+
+from freezer_api.api.common import middleware
+from freezer_api.api.common import streaming
+from freezer_api.common import exceptions as freezer_api_exc
+from freezer_api.tests.unit import common
+
+
+def jobs(count):
+    for number in range(count):
+        yield {'job_id': 'job{0}'.format(number), 'description': u'caf\xe9'}
+
+
+class JobsResource(object):
+    def __init__(self):
+        self.count = 3
+
+    def on_get(self, req, resp):
+        media_type = streaming.requested(req)
+        if media_type:
+            streaming.stream_collection(resp, 'jobs', jobs(self.count),
+                                        media_type)
+        else:
+            resp.media = {'jobs': list(jobs(self.count))}
+
+
+def failing():
+    raise freezer_api_exc.StorageEngineError(message='unavailable')
+    yield
+
+
+class FailingResource(object):
+    def on_get(self, req, resp):
+        streaming.stream_collection(resp, 'jobs', failing(),
+                                    streaming.requested(req))
+
+
+class StreamingTestCase(common.FreezerBaseTestCase):
+
+    def setUp(self):
+        super(StreamingTestCase, self).setUp()
+        app = falcon.App(middleware=[middleware.RequireJSON()])
+        self.resource = JobsResource()
+        app.add_route('/jobs', self.resource)
+        app.add_route('/failing', FailingResource())
+        app.add_error_handler(freezer_api_exc.StorageEngineError,
+                              freezer_api_exc.StorageEngineError.handle)
+        self.client = testing.TestClient(app)
+
+    def test_json_unchanged_by_default(self):
+        result = self.client.simulate_get('/jobs')
+        self.assertEqual({'jobs': list(jobs(3))}, result.json)
+
+    def test_streamed_json(self):
+        result = self.client.simulate_get('/jobs',
+                                          params={'stream': 'true'})
+        self.assertEqual(200, result.status_code)
+        self.assertEqual(falcon.MEDIA_JSON, result.headers['Content-Type'])
+        self.assertEqual({'jobs': list(jobs(3))}, result.json)
+
+    def test_streamed_json_empty(self):
+        self.resource.count = 0
+        result = self.client.simulate_get('/jobs',
+                                          params={'stream': 'true'})
+        self.assertEqual({'jobs': []}, result.json)
+
+    def test_ndjson(self):
+        result = self.client.simulate_get(
+            '/jobs', headers={'Accept': streaming.NDJSON})
+        self.assertEqual(200, result.status_code)
+        self.assertEqual(streaming.NDJSON, result.headers['Content-Type'])
+        lines = result.text.splitlines()
+        self.assertEqual(list(jobs(3)), [json.loads(line) for line in lines])
+
+    def test_ndjson_empty(self):
+        self.resource.count = 0
+        result = self.client.simulate_get(
+            '/jobs', headers={'Accept': streaming.NDJSON})
+        self.assertEqual(200, result.status_code)
+        self.assertEqual('', result.text)
+
+    def test_not_acceptable(self):
+        result = self.client.simulate_get(
+            '/jobs', headers={'Accept': 'text/html'})
+        self.assertEqual(406, result.status_code)
+
+    def test_first_error_is_returned(self):
+        result = self.client.simulate_get(
+            '/failing', headers={'Accept': streaming.NDJSON})
+        self.assertEqual(500, result.status_code)
+
+    def test_chunks(self):
+        chunks = list(streaming._chunks([b'a' * 3] * 5, chunk_size=7))
+        self.assertEqual([b'a' * 9, b'a' * 6], chunks)
@@ -18,6 +18,7 @@ limitations under the License.
 import random
 
 import falcon
+from oslo_serialization import jsonutils as json
 from unittest import mock
 
 from freezer_api.api.v2 import actions as v2_actions
@@ -34,6 +35,7 @@ class TestActionsCollectionResource(common.FreezerBaseTestCase):
         self.mock_req.env.__getitem__.side_effect = common.get_req_items
         self.mock_req.get_header.return_value = common.fake_action_0['user_id']
         self.mock_req.status = falcon.HTTP_200
+        self.mock_req.get_param_as_bool.return_value = False
         self.resource = v2_actions.ActionsCollectionResource(self.mock_db)
         self.mock_json_body = mock.Mock()
         self.mock_json_body.return_value = {}
@@ -61,6 +63,19 @@ class TestActionsCollectionResource(common.FreezerBaseTestCase):
         self.assertEqual(expected_result, result)
         self.assertEqual(falcon.HTTP_200, self.mock_req.status)
 
+    def test_on_get_streams_json(self):
+        self.mock_db.iter_action.return_value = iter(
+            [common.get_fake_action_0()])
+        self.mock_req.client_prefers.return_value = falcon.MEDIA_JSON
+        self.mock_req.get_param_as_bool.return_value = True
+        self.resource.on_get(self.mock_req, self.mock_req,
+                             common.fake_action_0['project_id'])
+        self.mock_db.search_action.assert_not_called()
+        self.assertEqual(falcon.MEDIA_JSON, self.mock_req.content_type)
+        self.assertEqual(
+            {'actions': [common.get_fake_action_0()]},
+            json.loads(b''.join(self.mock_req.stream)))
+
     def test_on_post_raises_when_missing_body(self):
         self.mock_db.add_action.return_value = common.fake_action_0[
             'action_id']
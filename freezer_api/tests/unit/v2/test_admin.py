@@ -0,0 +1,35 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import falcon
+from unittest import mock
+
+from freezer_api.api.v2 import admin as v2_admin
+from freezer_api.tests.unit import common
+
+
+class TestPoolStatisticsResource(common.FreezerBaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.mock_db = mock.Mock()
+        self.mock_req = mock.MagicMock()
+        self.mock_req.context.user_id = common.fake_data_0_user_id
+        self.mock_req.env.__getitem__.side_effect = common.get_req_items
+        self.mock_req.status = falcon.HTTP_200
+        self.resource = v2_admin.PoolStatisticsResource(self.mock_db)
+
+    def test_on_get_return_pool_statistics(self):
+        self.mock_db.pool_statistics.return_value = {'checked_out': 2}
+        self.resource.on_get(self.mock_req, self.mock_req)
+        self.assertEqual({'checked_out': 2}, self.mock_req.media)
+        self.assertEqual(falcon.HTTP_200, self.mock_req.status)
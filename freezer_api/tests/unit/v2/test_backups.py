@@ -17,6 +17,7 @@ limitations under the License.
 """
 
 import falcon
+from oslo_serialization import jsonutils as json
 from unittest import mock
 
 from freezer_api.api.v2 import backups
@@ -34,6 +35,7 @@ class TestBackupsCollectionResource(common.FreezerBaseTestCase):
         self.mock_req.get_header.return_value = {
             'X-User-ID': common.fake_data_0_user_id}
         self.mock_req.status = falcon.HTTP_200
+        self.mock_req.get_param_as_bool.return_value = False
         self.resource = backups.BackupsCollectionResource(self.mock_db)
         self.mock_json_body = mock.Mock()
         self.mock_json_body.return_value = {}
@@ -58,6 +60,19 @@ class TestBackupsCollectionResource(common.FreezerBaseTestCase):
         self.assertEqual(expected_result, result)
         self.assertEqual(falcon.HTTP_200, self.mock_req.status)
 
+    def test_on_get_streams_json(self):
+        self.mock_db.iter_backup.return_value = iter(
+            [common.fake_data_0_backup_metadata])
+        self.mock_req.client_prefers.return_value = falcon.MEDIA_JSON
+        self.mock_req.get_param_as_bool.return_value = True
+        self.resource.on_get(self.mock_req, self.mock_req,
+                             project_id='tecs')
+        self.mock_db.search_backup.assert_not_called()
+        self.assertEqual(falcon.MEDIA_JSON, self.mock_req.content_type)
+        self.assertEqual(
+            {'backups': [common.fake_data_0_backup_metadata]},
+            json.loads(b''.join(self.mock_req.stream)))
+
     def test_on_post_raises_when_missing_body(self):
         self.mock_db.add_backup.return_value = [
             common.fake_data_0_wrapped_backup_metadata['backup_id']]
@@ -13,6 +13,7 @@
 # limitations under the License.
 
 import falcon
+from oslo_serialization import jsonutils as json
 from unittest import mock
 
 from freezer_api.api.v2 import clients as v2_clients
@@ -30,6 +31,7 @@ class TestClientsCollectionResource(common.FreezerBaseTestCase):
         self.mock_req.env.__getitem__.side_effect = common.get_req_items
         self.mock_req.get_header.return_value = common.fake_data_0_user_id
         self.mock_req.status = falcon.HTTP_200
+        self.mock_req.get_param_as_bool.return_value = False
         self.resource = v2_clients.ClientsCollectionResource(self.mock_db)
         self.mock_json_body = mock.Mock()
         self.mock_json_body.return_value = {}
@@ -55,6 +57,19 @@ class TestClientsCollectionResource(common.FreezerBaseTestCase):
         self.assertEqual(expected_result, result)
         self.assertEqual(falcon.HTTP_200, self.mock_req.status)
 
+    def test_on_get_streams_json(self):
+        self.mock_db.iter_client.return_value = iter(
+            [common.fake_client_entry_0])
+        self.mock_req.client_prefers.return_value = falcon.MEDIA_JSON
+        self.mock_req.get_param_as_bool.return_value = True
+        self.resource.on_get(self.mock_req, self.mock_req,
+                             common.fake_client_info_0['project_id'])
+        self.mock_db.get_client.assert_not_called()
+        self.assertEqual(falcon.MEDIA_JSON, self.mock_req.content_type)
+        self.assertEqual(
+            {'clients': [common.fake_client_entry_0]},
+            json.loads(b''.join(self.mock_req.stream)))
+
     def test_on_post_raises_when_missing_body(self):
         self.mock_db.add_client.return_value = common.fake_client_info_0[
             'client_id']
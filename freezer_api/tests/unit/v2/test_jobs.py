@@ -24,6 +24,7 @@ from unittest.mock import patch
 
 from oslo_serialization import jsonutils as json
 
+from freezer_api.api.common import streaming
 from freezer_api.api.v2 import jobs as v2_jobs
 from freezer_api.common import exceptions
 from freezer_api.tests.unit import common
@@ -33,6 +34,7 @@ class TestJobsBaseResource(common.FreezerBaseTestCase):
     def setUp(self):
         super().setUp()
         self.mock_db = mock.Mock()
+        self.mock_db.find_identical_action.return_value = None
         self.resource = v2_jobs.JobsBaseResource(self.mock_db)
 
     def test_get_action_returns_found_action(self):
@@ -61,9 +63,9 @@ class TestJobsBaseResource(common.FreezerBaseTestCase):
                    "description": "three actions backup"
                    }
         self.resource.update_actions_in_job('tecs', 'duder', job_doc=job_doc)
-        self.mock_db.add_action.assert_called_with(project_id='tecs',
-                                                   user_id='duder',
-                                                   doc=action_doc)
+        self.mock_db.add_actions.assert_called_with(project_id='tecs',
+                                                    user_id='duder',
+                                                    docs=[action_doc])
 
     def test_update_actions_in_job_action_id_not_found(self):
         self.resource.get_action = mock.Mock()
@@ -80,9 +82,9 @@ class TestJobsBaseResource(common.FreezerBaseTestCase):
                    "description": "three actions backup"
                    }
         self.resource.update_actions_in_job('tecs', 'duder', job_doc=job_doc)
-        self.mock_db.add_action.assert_called_with(project_id='tecs',
-                                                   user_id='duder',
-                                                   doc=action_doc)
+        self.mock_db.add_actions.assert_called_with(project_id='tecs',
+                                                    user_id='duder',
+                                                    docs=[action_doc])
 
     def test_update_actions_in_job_action_id_found_and_same_action(self):
         self.resource.get_action = mock.Mock()
@@ -99,7 +101,7 @@ class TestJobsBaseResource(common.FreezerBaseTestCase):
                    }
         self.resource.get_action.return_value = action_doc.copy()
         self.resource.update_actions_in_job('tecs', 'duder', job_doc=job_doc)
-        self.mock_db.add_action.assert_not_called()
+        self.mock_db.add_actions.assert_not_called()
 
     def test_update_actions_in_job_action_id_found_and_different_action(self):
         self.resource.get_action = mock.Mock()
@@ -128,9 +130,50 @@ class TestJobsBaseResource(common.FreezerBaseTestCase):
         new_doc['action_id'] = ''
         self.resource.get_action.return_value = found_action
         self.resource.update_actions_in_job('tecs', 'duder', job_doc=job_doc)
-        self.mock_db.add_action.assert_called_with(project_id='tecs',
-                                                   user_id='duder',
-                                                   doc=new_doc)
+        self.mock_db.add_actions.assert_called_with(project_id='tecs',
+                                                    user_id='duder',
+                                                    docs=[new_doc])
+
+    def test_update_actions_in_job_reuses_identical_action(self):
+        self.mock_db.find_identical_action.return_value = 'ottonero'
+        action_doc = {
+            "freezer_action": {
+                "mode": "mysql",
+                "container": "freezer_backup_test"
+            },
+            "max_retries": 3
+        }
+        job_doc = {"job_actions": [action_doc.copy()],
+                   "description": "three actions backup"
+                   }
+        self.resource.update_actions_in_job('tecs', 'duder', job_doc=job_doc)
+        self.mock_db.find_identical_action.assert_called_with(
+            project_id='tecs', doc=job_doc['job_actions'][0])
+        self.mock_db.add_actions.assert_not_called()
+        self.assertEqual('ottonero', job_doc['job_actions'][0]['action_id'])
+
+    def test_update_actions_in_job_adds_the_new_actions_together(self):
+        self.resource.get_action = mock.Mock()
+        job_doc = {"job_actions": [
+            {"freezer_action": {"mode": "fs", "action": "backup"}},
+            {"action_id": "ottonero"},
+            {"freezer_action": {"mode": "fs", "action": "restore"}}],
+            "description": "three actions backup"
+        }
+        self.resource.update_actions_in_job('tecs', 'duder', job_doc=job_doc)
+        self.mock_db.add_actions.assert_called_once_with(
+            project_id='tecs', user_id='duder',
+            docs=[job_doc['job_actions'][0], job_doc['job_actions'][2]])
+        self.mock_db.add_action.assert_not_called()
+
+    def test_update_actions_in_job_action_id_reference_only(self):
+        self.resource.get_action = mock.Mock()
+        job_doc = {"job_actions": [{"action_id": "ottonero"}],
+                   "description": "three actions backup"
+                   }
+        self.resource.update_actions_in_job('tecs', 'duder', job_doc=job_doc)
+        self.resource.get_action.assert_not_called()
+        self.mock_db.add_actions.assert_not_called()
 
     @mock.patch.object(v2_jobs, 'CONF')
     def test_should_create_trust_disabled(self, mock_conf):
@@ -278,6 +321,25 @@ class TestJobsCollectionResource(common.FreezerBaseTestCase):
         self.assertNotIn('current_pid',
                          self.mock_req.media['jobs'][0]['job_schedule'])
 
+    @patch('freezer_api.policy.can')
+    def test_on_get_streams_ndjson(self, mock_policy_can):
+        job = common.get_fake_job_0()
+        job['job_schedule']['current_pid'] = 1234
+        self.mock_db.iter_job.return_value = iter([job])
+        self.mock_db.get_client.return_value = [
+            {'project_id': 'admin_project'}]
+        mock_policy_can.return_value = False
+        self.mock_req.client_prefers.return_value = streaming.NDJSON
+
+        self.resource.on_get(self.mock_req, self.mock_req, 'my_project')
+
+        self.mock_db.search_job.assert_not_called()
+        self.assertEqual(streaming.NDJSON, self.mock_req.content_type)
+        body = b''.join(self.mock_req.stream)
+        streamed = json.loads(body)
+        self.assertEqual(job['job_id'], streamed['job_id'])
+        self.assertNotIn('current_pid', streamed['job_schedule'])
+
     def test_on_post_inserts_correct_data(self):
         job = common.get_fake_job_0()
         self.mock_json_body.return_value = job
@@ -0,0 +1,58 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import falcon
+from falcon import testing
+from unittest import mock
+
+from freezer_api.api.v2 import projects as v2_projects
+from freezer_api.tests.unit import common
+
+
+class TestProjectsResource(common.FreezerBaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.mock_db = mock.Mock()
+        self.mock_req = mock.MagicMock()
+        self.mock_req.context.user_id = common.fake_data_0_user_id
+        self.mock_req.env.__getitem__.side_effect = common.get_req_items
+        self.mock_req.status = falcon.HTTP_200
+        self.resource = v2_projects.ProjectsResource(self.mock_db)
+
+    def test_on_delete_purges_project(self):
+        self.mock_req.get_param_as_bool.return_value = True
+        self.mock_req.get_param_as_int.return_value = 10
+        self.mock_db.purge_project.return_value = {'jobs': 3}
+        self.resource.on_delete(self.mock_req, self.mock_req, 'tecs')
+        self.mock_db.purge_project.assert_called_once_with(
+            project_id='tecs', hard_delete=True, batch_size=10)
+        self.assertEqual({'project_id': 'tecs', 'purged': {'jobs': 3}},
+                         self.mock_req.media)
+        self.assertEqual(falcon.HTTP_200, self.mock_req.status)
+
+    def test_on_delete_uses_defaults(self):
+        self.mock_req.get_param_as_bool.return_value = None
+        self.mock_req.get_param_as_int.return_value = 1000
+        self.resource.on_delete(self.mock_req, self.mock_req, 'tecs')
+        self.mock_req.get_param_as_int.assert_called_once_with(
+            'batch_size', default=1000, min_value=1)
+        self.mock_db.purge_project.assert_called_once_with(
+            project_id='tecs', hard_delete=False, batch_size=1000)
+
+    def test_on_delete_raises_on_invalid_batch_size(self):
+        req = testing.create_req(query_string='batch_size=0')
+        self.mock_req.get_param_as_int.side_effect = req.get_param_as_int
+        self.assertRaises(falcon.HTTPInvalidParam,
+                          self.resource.on_delete,
+                          self.mock_req, self.mock_req, 'tecs')
+        self.assertFalse(self.mock_db.purge_project.called)
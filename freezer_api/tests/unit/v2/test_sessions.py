@@ -18,6 +18,7 @@ limitations under the License.
 import random
 
 import falcon
+from oslo_serialization import jsonutils as json
 from unittest import mock
 from unittest.mock import patch
 
@@ -36,6 +37,7 @@ class TestSessionsCollectionResource(common.FreezerBaseTestCase):
         self.mock_req.get_header.return_value = common.fake_session_0[
             'user_id']
         self.mock_req.status = falcon.HTTP_200
+        self.mock_req.get_param_as_bool.return_value = False
         self.resource = v2_sessions.SessionsCollectionResource(self.mock_db)
         self.mock_json_body = mock.Mock()
         self.mock_json_body.return_value = {}
@@ -61,6 +63,19 @@ class TestSessionsCollectionResource(common.FreezerBaseTestCase):
         self.assertEqual(expected_result, result)
         self.assertEqual(falcon.HTTP_200, self.mock_req.status)
 
+    def test_on_get_streams_json(self):
+        self.mock_db.iter_session.return_value = iter(
+            [common.get_fake_session_0()])
+        self.mock_req.client_prefers.return_value = falcon.MEDIA_JSON
+        self.mock_req.get_param_as_bool.return_value = True
+        self.resource.on_get(self.mock_req, self.mock_req,
+                             common.fake_session_0['project_id'])
+        self.mock_db.search_session.assert_not_called()
+        self.assertEqual(falcon.MEDIA_JSON, self.mock_req.content_type)
+        self.assertEqual(
+            {'sessions': [common.get_fake_session_0()]},
+            json.loads(b''.join(self.mock_req.stream)))
+
     def test_on_post_raises_when_missing_body(self):
         self.mock_db.add_session.return_value = common.fake_session_0[
             'session_id']